@@ -2,97 +2,1091 @@
 # Analyze mesh topology: Non-manifold, Triangles, N-gons, Small faces, Concave faces, Boundary edges, Loose edges/vertices
 
 import bpy
-from mathutils import Vector
+import bmesh
 import gpu
-from gpu_extras.batch import batch_for_shader
+import numpy as np
+import base64
+import hashlib
+import json
+import os
 import time
+import zlib
+from collections import OrderedDict
+from mathutils.bvhtree import BVHTree
 
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 
-class DrawFace:
-    '''Draw colored faces in the 3D view.'''
+from .KHB_Topology import classify_topology, find_coincident_vertices, iter_classify_topology, loop_next
+
+
+# ========== VECTORIZED ANALYSIS ENGINE (NUMPY) ==========
+# Đọc toàn bộ mesh vào NumPy arrays bằng foreach_get rồi phân loại bằng array operations,
+# thay cho vòng lặp Python trên từng polygon/loop/edge (rất chậm với mesh 500k+ faces)
+
+AREA_THRESHOLD = 0.000001  # Ngưỡng diện tích rất nhỏ (object space)
+DISTANCE_THRESHOLD = 0.0001  # Ngưỡng khoảng cách vertices / độ dài edge
+COINCIDENT_HASH_MIN_CORNERS = 32  # N-gon > 32 corners: spatial hash thay cho so sánh từng offset
+
+
+class MeshArrays:
+    '''Flat NumPy snapshot of the mesh data used by the analysis engine.'''
     
-    def __init__(self, tris_points, color):
-        self.shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-        self.color = color
-        self.batch = self._create_batch(tris_points)
+    def __init__(self, me):
+        n_verts = len(me.vertices)
+        n_edges = len(me.edges)
+        n_loops = len(me.loops)
+        n_faces = len(me.polygons)
+        
+        self.co = np.empty(n_verts * 3, dtype=np.float32)
+        me.vertices.foreach_get("co", self.co)
+        self.co.shape = (n_verts, 3)
+        self.vert_hide = np.empty(n_verts, dtype=bool)
+        me.vertices.foreach_get("hide", self.vert_hide)
+        
+        self.edge_verts = np.empty(n_edges * 2, dtype=np.int32)
+        me.edges.foreach_get("vertices", self.edge_verts)
+        self.edge_verts.shape = (n_edges, 2)
+        self.edge_hide = np.empty(n_edges, dtype=bool)
+        me.edges.foreach_get("hide", self.edge_hide)
+        
+        self.loop_verts = np.empty(n_loops, dtype=np.int32)
+        me.loops.foreach_get("vertex_index", self.loop_verts)
+        self.loop_edges = np.empty(n_loops, dtype=np.int32)
+        me.loops.foreach_get("edge_index", self.loop_edges)
+        
+        self.face_start = np.empty(n_faces, dtype=np.int32)
+        me.polygons.foreach_get("loop_start", self.face_start)
+        self.face_size = np.empty(n_faces, dtype=np.int32)
+        me.polygons.foreach_get("loop_total", self.face_size)
+        self.face_hide = np.empty(n_faces, dtype=bool)
+        me.polygons.foreach_get("hide", self.face_hide)
+        self.face_normal = np.empty(n_faces * 3, dtype=np.float32)
+        me.polygons.foreach_get("normal", self.face_normal)
+        self.face_normal.shape = (n_faces, 3)
+        
+        me.calc_loop_triangles()
+        n_tris = len(me.loop_triangles)
+        self.tri_verts = np.empty(n_tris * 3, dtype=np.int32)
+        me.loop_triangles.foreach_get("vertices", self.tri_verts)
+        self.tri_verts.shape = (n_tris, 3)
+        self.tri_faces = np.empty(n_tris, dtype=np.int32)
+        me.loop_triangle_polygons.foreach_get("value", self.tri_faces)
+        
+        # Blender 4.x lưu face offsets tăng dần → loops của mỗi face liên tục
+        self.loop_faces = np.repeat(np.arange(n_faces, dtype=np.int32), self.face_size)
+        self.loop_next = loop_next(self.face_start, self.face_size, n_loops)
+
+
+class FaceSubset:
+    '''Loops of a subset of faces, re-based so the face metrics can run on them alone.'''
+    
+    def __init__(self, arrays, faces):
+        self.faces = faces
+        self.co = arrays.co
+        self.face_size = arrays.face_size[faces]
+        self.face_start = (np.cumsum(self.face_size) - self.face_size).astype(np.int32)
+        self.face_normal = arrays.face_normal[faces]
+        n_loops = int(self.face_size.sum())
+        loops = np.repeat(arrays.face_start[faces] - self.face_start, self.face_size) + np.arange(n_loops)
+        self.loop_verts = arrays.loop_verts[loops]
+        self.loop_faces = np.repeat(np.arange(len(faces), dtype=np.int32), self.face_size)
+        self.loop_next = loop_next(self.face_start, self.face_size, n_loops)
+
+
+def _to_world(co, matrix):
+    '''Transform (N, 3) coordinates by a 4x4 matrix.'''
+    m = np.array(matrix, dtype=np.float64)
+    return co @ m[:3, :3].T + m[:3, 3]
+
+
+def matrix_metric_key(matrix):
+    '''Key that only changes when world-space lengths/angles change (scale or shear).
     
-    def _create_batch(self, tris_points):
-        vertices = [v for tri in tris_points for v in tri]
-        return batch_for_shader(self.shader, 'TRIS', {"pos": vertices})
+    Rotation and translation leave every face metric unchanged, so the key is the
+    Gram matrix of the 3x3 part.
+    '''
+    m3 = np.array(matrix.to_3x3(), dtype=np.float64)
+    return tuple(np.round(m3.T @ m3, 6).ravel())
+
+
+def _face_any(mask, faces):
+    '''Reduce a per-loop boolean mask to a per-face "any".'''
+    return np.add.reduceat(mask.astype(np.int32), faces.face_start) > 0
+
+
+def _degenerate_faces(faces, co, world):
+    '''Zero-area faces, collapsed corners and zero-length edges.'''
+    nxt = faces.loop_next
     
-    def update_batch(self, tris_points):
-        self.batch = self._create_batch(tris_points)
+    # Check 1: Diện tích (Newell, object space) - trừ vertex đầu để giữ độ chính xác
+    origin = co[faces.face_start][faces.loop_faces]
+    cross = np.cross(co - origin, co[nxt] - origin)
+    area = 0.5 * np.linalg.norm(np.add.reduceat(cross, faces.face_start, axis=0), axis=1)
+    degenerate = area < AREA_THRESHOLD
     
-    def draw(self, context):
-        gpu.state.face_culling_set('BACK')
-        gpu.state.depth_test_set('NONE')
-        gpu.state.blend_set('ALPHA_PREMULT')
-        
-        self.shader.bind()
-        self.shader.uniform_float('color', self.color)
-        self.batch.draw(self.shader)
-        
-        gpu.state.face_culling_set('NONE')
+    # Check 2: Zero-length edge (object space)
+    edge_len = np.linalg.norm(co[nxt] - co, axis=1)
+    degenerate |= _face_any(edge_len < DISTANCE_THRESHOLD, faces)
+    
+    # Check 3: 2+ corners trùng vị trí (world space) - so sánh từng offset k giữa các corners
+    corner = np.arange(len(co), dtype=np.int32) - faces.face_start[faces.loop_faces]
+    size = faces.face_size[faces.loop_faces]
+    small = size <= COINCIDENT_HASH_MIN_CORNERS
+    max_small = int(faces.face_size[faces.face_size <= COINCIDENT_HASH_MIN_CORNERS].max(initial=0))
+    for k in range(1, max_small // 2 + 1):
+        loops = np.flatnonzero(small & (size >= 2 * k))
+        if not len(loops):
+            break
+        partner = faces.face_start[faces.loop_faces[loops]] + (corner[loops] + k) % size[loops]
+        dist = np.linalg.norm(world[loops] - world[partner], axis=1)
+        degenerate[faces.loop_faces[loops[dist < DISTANCE_THRESHOLD]]] = True
+    
+    # OPTIMIZATION: Chỉ n-gon rất lớn dùng spatial hash theo face - số offset pass tăng theo
+    # số corners (O(k²)), còn hash có chi phí cố định cao (8 lần sort) nên chỉ lợi khi k lớn
+    loops = np.flatnonzero(~small)
+    if len(loops):
+        pairs = find_coincident_vertices(world[loops], DISTANCE_THRESHOLD, groups=faces.loop_faces[loops])
+        degenerate[faces.loop_faces[loops[pairs[:, 0]]]] = True
+    
+    return degenerate
 
 
-class DrawEdge:
-    '''Draw colored edges in the 3D view.'''
+def _edge_ratio(faces, world):
+    '''Min/max edge length ratio (percent) per face; +inf when the face has no real edge.'''
+    edge_len = np.linalg.norm(world[faces.loop_next] - world, axis=1)
+    min_edge = np.minimum.reduceat(edge_len, faces.face_start)
+    max_edge = np.maximum.reduceat(edge_len, faces.face_start)
+    ratio = np.full(len(min_edge), np.inf)
+    np.divide(min_edge * 100.0, max_edge, out=ratio, where=max_edge >= DISTANCE_THRESHOLD)
+    return ratio.astype(np.float32)
+
+
+def _concavity(faces, world, matrix):
+    '''Concavity score per face: concave for every threshold below the score.
     
-    def __init__(self, edge_lines, color, line_width=3.0):
-        self.shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+    A face is concave when some corner turns along the normal by more than the
+    threshold and another turns against it by more than the threshold, i.e. when
+    min(max(dot), -min(dot)) > threshold. Faces with < 4 corners score -inf.
+    '''
+    nxt = faces.loop_next
+    m3 = np.array(matrix.to_3x3(), dtype=np.float64)
+    normal = faces.face_normal @ m3.T
+    length = np.linalg.norm(normal, axis=1, keepdims=True)
+    np.divide(normal, length, out=normal, where=length > 0.0)
+    
+    edge = world[nxt] - world
+    edge_len = np.linalg.norm(edge, axis=1)
+    valid = (edge_len >= DISTANCE_THRESHOLD) & (edge_len[nxt] >= DISTANCE_THRESHOLD)
+    dot = np.einsum('ij,ij->i', np.cross(edge, edge[nxt]), normal[faces.loop_faces])
+    
+    max_dot = np.maximum.reduceat(np.where(valid, dot, -np.inf), faces.face_start)
+    min_dot = np.minimum.reduceat(np.where(valid, dot, np.inf), faces.face_start)
+    score = np.minimum(max_dot, -min_dot)
+    score[faces.face_size < 4] = -np.inf
+    return score.astype(np.float32)
+
+
+def classify_faces(ratio, concavity, edge_ratio, concave_threshold):
+    '''Threshold cached face metrics into (small, concave) masks'''
+    return ratio < edge_ratio, concavity > concave_threshold
+
+
+def analyze_face_geometry(faces, matrix):
+    '''Per-face (degenerate mask, edge ratio, concavity) for a MeshArrays or FaceSubset.'''
+    n_faces = len(faces.face_start)
+    if not n_faces:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    
+    # Tọa độ theo từng loop (corner) - chỉ transform các vertices thật sự dùng tới
+    co = faces.co[faces.loop_verts].astype(np.float64)
+    world = _to_world(co, matrix)
+    return _degenerate_faces(faces, co, world), _edge_ratio(faces, world), _concavity(faces, world, matrix)
+
+
+def analyze_topology(arrays):
+    '''Topology-only categories: n-gons, boundary/loose/non-manifold edges and vertices.'''
+    return classify_topology(arrays)
+
+
+def build_categories(arrays, topology, degenerate, small, concave):
+    '''Combine topology and per-face geometry masks into overlay categories.
+    
+    Returns a dict of index arrays: face indices (ngons, small_faces, concave_faces,
+    degenerate_faces), loop triangle indices (*_tris), edge indices (*_edges) and
+    vertex indices (*_vertices).
+    '''
+    visible_face = topology['visible_face']
+    ngon = topology['ngon']
+    degenerate = degenerate & visible_face
+    small = small & visible_face
+    concave = concave & visible_face & ~small
+    
+    degenerate_edges = np.unique(arrays.loop_edges[degenerate[arrays.loop_faces]])
+    
+    # Triangles: priority n-gon > concave face > small face
+    tri_ngon = ngon[arrays.tri_faces]
+    tri_concave = concave[arrays.tri_faces] & ~tri_ngon
+    tri_small = small[arrays.tri_faces] & ~tri_ngon & ~tri_concave
+    
+    return {
+        'ngons': np.flatnonzero(ngon),
+        'small_faces': np.flatnonzero(small & ~ngon),
+        'concave_faces': np.flatnonzero(concave & ~ngon),
+        'degenerate_faces': np.flatnonzero(degenerate),
+        'ngon_tris': np.flatnonzero(tri_ngon),
+        'small_faces_tris': np.flatnonzero(tri_small),
+        'concave_faces_tris': np.flatnonzero(tri_concave),
+        'boundary_edges': topology['boundary_edges'],
+        'loose_edges': topology['loose_edges'],
+        'non_manifold_edges': topology['non_manifold_edges'],
+        'degenerate_face_edges': degenerate_edges,
+        'loose_vertices': topology['loose_vertices'],
+        'non_manifold_vertices': topology['non_manifold_vertices'],
+    }
+
+
+def analyze_mesh_arrays(arrays, matrix, edge_ratio, concave_threshold):
+    '''Classify mesh elements into overlay categories in one full pass.'''
+    topology = analyze_topology(arrays)
+    degenerate, ratio, concavity = analyze_face_geometry(arrays, matrix)
+    small, concave = classify_faces(ratio, concavity, edge_ratio, concave_threshold)
+    return build_categories(arrays, topology, degenerate, small, concave)
+
+
+class AnalysisResults:
+    '''Category index arrays (int32) of one analyzed mesh and its float32 vertex coordinates.
+    
+    Holds no RNA references, so it stays valid across undo; an empty instance
+    stands in while no analysis is running.
+    '''
+    
+    # Domain của index trong từng category: TRI = loop triangle, FACE, EDGE, VERT
+    DOMAINS = {
+        'ngon_tris': 'TRI',
+        'ngons': 'FACE',
+        'small_faces_tris': 'TRI',
+        'small_faces': 'FACE',
+        'concave_faces_tris': 'TRI',
+        'concave_faces': 'FACE',
+        'boundary_edges': 'EDGE',
+        'loose_vertices': 'VERT',
+        'loose_edges': 'EDGE',
+        'non_manifold_vertices': 'VERT',
+        'non_manifold_edges': 'EDGE',
+        'degenerate_face_edges': 'EDGE',
+        'degenerate_faces': 'FACE',
+        # Highlight: vấn đề mới so với baseline report (điền bởi highlight())
+        'new_problem_tris': 'TRI',
+        'new_problem_edges': 'EDGE',
+        'new_problem_vertices': 'VERT',
+    }
+    
+    # Categories được ghi vào report / so sánh khi diff (không gồm *_tris chỉ dùng để vẽ)
+    REPORT_CATEGORIES = (
+        'ngons', 'small_faces', 'concave_faces', 'degenerate_faces',
+        'boundary_edges', 'loose_edges', 'non_manifold_edges', 'degenerate_face_edges',
+        'loose_vertices', 'non_manifold_vertices',
+    )
+    
+    _EMPTY = np.zeros(0, dtype=np.int32)
+    
+    def __init__(self, categories=None, co=None, tri_verts=None, edge_verts=None, tri_faces=None):
+        categories = categories or {}
+        self.categories = {
+            name: np.ascontiguousarray(categories.get(name, self._EMPTY), dtype=np.int32)
+            for name in self.DOMAINS
+        }
+        self.co = np.zeros((0, 3), dtype=np.float32) if co is None else np.ascontiguousarray(co, dtype=np.float32)
+        self.tri_verts = np.zeros((0, 3), dtype=np.int32) if tri_verts is None else tri_verts
+        self.edge_verts = np.zeros((0, 2), dtype=np.int32) if edge_verts is None else edge_verts
+        self.tri_faces = self._EMPTY if tri_faces is None else tri_faces
+    
+    @classmethod
+    def from_arrays(cls, arrays, categories):
+        return cls(categories, arrays.co, arrays.tri_verts, arrays.edge_verts, arrays.tri_faces)
+    
+    def __getitem__(self, name):
+        return self.categories[name]
+    
+    def __iter__(self):
+        '''Iterate (category name, index array) pairs'''
+        return iter(self.categories.items())
+    
+    def count(self, name):
+        return len(self.categories[name])
+    
+    def counts(self):
+        return {name: len(indices) for name, indices in self.categories.items()}
+    
+    @property
+    def nbytes(self):
+        return self.co.nbytes + sum(indices.nbytes for indices in self.categories.values())
+    
+    def primitives(self, name):
+        '''Vertex indices to draw a category: (N, 3) tris, (N, 2) edges or (N,) vertices'''
+        indices = self.categories[name]
+        domain = self.DOMAINS[name]
+        if domain == 'TRI':
+            return self.tri_verts[indices]
+        if domain == 'EDGE':
+            return self.edge_verts[indices]
+        if domain == 'VERT':
+            return indices
+        raise ValueError(f"Category '{name}' has no drawable primitives")
+    
+    def diff(self, baseline):
+        '''{category: indices} not in baseline {category: indices}; all arrays are sorted and unique'''
+        return {
+            name: np.setdiff1d(self.categories[name], baseline.get(name, self._EMPTY),
+                               assume_unique=True).astype(np.int32)
+            for name in self.REPORT_CATEGORIES
+        }
+    
+    def highlight(self, introduced):
+        '''Fill the new_problem_* categories from diff() output (faces are drawn as their tris)'''
+        def merged(domain):
+            parts = [introduced[name] for name in self.REPORT_CATEGORIES if self.DOMAINS[name] == domain]
+            return np.unique(np.concatenate(parts)).astype(np.int32)
+        
+        faces = merged('FACE')
+        self.categories['new_problem_tris'] = np.flatnonzero(np.isin(self.tri_faces, faces)).astype(np.int32)
+        self.categories['new_problem_edges'] = merged('EDGE')
+        self.categories['new_problem_vertices'] = merged('VERT')
+    
+    def upload(self, overlay):
+        '''Send coordinates and the primitives of every overlay layer to the GPU'''
+        overlay.occluder_tris = self.tri_verts
+        overlay.update(self.co, {layer.name: self.primitives(layer.name) for layer in overlay.layers})
+
+
+# ========== ANALYSIS RESULT CACHE ==========
+# Kết quả được lưu gọn dưới dạng bitmask theo face/edge/vertex + metric của face, key = hash nội dung mesh
+# → bật/tắt Analyze Check hoặc vào lại Edit Mode với mesh không đổi sẽ có overlay ngay
+
+FACE_DEGENERATE = 1
+EDGE_BOUNDARY, EDGE_LOOSE, EDGE_NON_MANIFOLD = 1, 2, 4
+VERT_LOOSE, VERT_NON_MANIFOLD = 1, 2
+
+CACHE_IDPROP = "khb_analysis_cache"  # Custom property trên mesh khi lưu vào .blend
+
+_HASH_FIELDS = (
+    'co', 'loop_verts', 'loop_edges', 'face_start', 'edge_verts',
+    'face_hide', 'edge_hide', 'vert_hide',
+)
+
+
+def mesh_content_hash(arrays):
+    '''Fast content hash of coordinates, topology and hide state'''
+    h = hashlib.blake2b(digest_size=16)
+    for name in _HASH_FIELDS:
+        data = np.ascontiguousarray(getattr(arrays, name))
+        h.update(np.int64(data.size).tobytes())
+        h.update(data.data)
+    return h.hexdigest()
+
+
+def _pack_array(data):
+    '''zlib + base64 text of an array (index lists and bitmasks are sparse / sorted)'''
+    return base64.b64encode(zlib.compress(np.ascontiguousarray(data).tobytes())).decode('ascii')
+
+
+def _unpack_array(text, dtype=np.uint8):
+    return np.frombuffer(zlib.decompress(base64.b64decode(text)), dtype=dtype).copy()
+
+
+def _bits(*masks):
+    bits = np.zeros(len(masks[0][0]), dtype=np.uint8)
+    for mask, bit in masks:
+        bits[mask] |= bit
+    return bits
+
+
+def _index_bits(count, *indices):
+    bits = np.zeros(count, dtype=np.uint8)
+    for index, bit in indices:
+        bits[index] |= bit
+    return bits
+
+
+class CachedAnalysis:
+    '''Per-element category bitmasks and face metrics of one analyzed mesh state.'''
+    
+    def __init__(self, geometry_key, face_bits, face_ratio, face_concavity, edge_bits, vert_bits):
+        self.geometry_key = geometry_key
+        self.face_bits = face_bits
+        self.face_ratio = face_ratio
+        self.face_concavity = face_concavity
+        self.edge_bits = edge_bits
+        self.vert_bits = vert_bits
+    
+    @property
+    def nbytes(self):
+        return (self.face_bits.nbytes + self.face_ratio.nbytes + self.face_concavity.nbytes
+                + self.edge_bits.nbytes + self.vert_bits.nbytes)
+    
+    @classmethod
+    def from_analyzer(cls, analyzer):
+        arrays = analyzer.arrays
+        topology = analyzer.topology
+        return cls(
+            analyzer.geometry_key,
+            _bits((analyzer.degenerate, FACE_DEGENERATE)),
+            analyzer.ratio.copy(),
+            analyzer.concavity.copy(),
+            _index_bits(len(arrays.edge_verts),
+                        (topology['boundary_edges'], EDGE_BOUNDARY),
+                        (topology['loose_edges'], EDGE_LOOSE),
+                        (topology['non_manifold_edges'], EDGE_NON_MANIFOLD)),
+            _index_bits(len(arrays.co),
+                        (topology['loose_vertices'], VERT_LOOSE),
+                        (topology['non_manifold_vertices'], VERT_NON_MANIFOLD)),
+        )
+    
+    def restore(self, analyzer, arrays):
+        '''Load topology and face masks into an IncrementalAnalyzer for arrays'''
+        visible_face = ~arrays.face_hide
+        analyzer.arrays = arrays
+        analyzer.topology = {
+            'visible_face': visible_face,
+            'ngon': visible_face & (arrays.face_size > 4),
+            'boundary_edges': np.flatnonzero(self.edge_bits & EDGE_BOUNDARY),
+            'loose_edges': np.flatnonzero(self.edge_bits & EDGE_LOOSE),
+            'non_manifold_edges': np.flatnonzero(self.edge_bits & EDGE_NON_MANIFOLD),
+            'loose_vertices': np.flatnonzero(self.vert_bits & VERT_LOOSE),
+            'non_manifold_vertices': np.flatnonzero(self.vert_bits & VERT_NON_MANIFOLD),
+        }
+        analyzer.degenerate = (self.face_bits & FACE_DEGENERATE) > 0
+        analyzer.ratio = self.face_ratio.copy()
+        analyzer.concavity = self.face_concavity.copy()
+        analyzer.geometry_key = self.geometry_key
+    
+    def to_idprop(self, content_hash):
+        '''Serialize to an ID property dict (zlib + base64, masks are sparse)'''
+        return {
+            'hash': content_hash,
+            'geometry_key': json.dumps(self.geometry_key),
+            'faces': _pack_array(self.face_bits),
+            'ratio': _pack_array(self.face_ratio),
+            'concavity': _pack_array(self.face_concavity),
+            'edges': _pack_array(self.edge_bits),
+            'verts': _pack_array(self.vert_bits),
+        }
+    
+    @classmethod
+    def from_idprop(cls, data):
+        '''Inverse of to_idprop(); returns (content_hash, CachedAnalysis)'''
+        return data['hash'], cls(
+            tuple(json.loads(data['geometry_key'])),
+            _unpack_array(data['faces']),
+            _unpack_array(data['ratio'], np.float32),
+            _unpack_array(data['concavity'], np.float32),
+            _unpack_array(data['edges']), _unpack_array(data['verts']),
+        )
+
+
+class AnalysisCache:
+    '''In-memory LRU of CachedAnalysis keyed by mesh content hash.'''
+    
+    MAX_BYTES = 256 * 1024 * 1024
+    
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.nbytes = 0
+    
+    def get(self, content_hash):
+        entry = self.entries.get(content_hash)
+        if entry is not None:
+            self.entries.move_to_end(content_hash)
+        return entry
+    
+    def put(self, content_hash, entry):
+        old = self.entries.pop(content_hash, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self.entries[content_hash] = entry
+        self.nbytes += entry.nbytes
+        
+        # OPTIMIZATION: LRU eviction theo tổng dung lượng
+        while self.nbytes > self.MAX_BYTES and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+    
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+    
+    def load_from_mesh(self, me):
+        '''Import a result stored in the .blend (if any) into the LRU'''
+        data = me.get(CACHE_IDPROP)
+        if data is None or data.get('hash') in self.entries:
+            return
+        try:
+            content_hash, entry = CachedAnalysis.from_idprop(data)
+        except (KeyError, ValueError, TypeError, zlib.error) as e:
+            print(f"KeyHabit: Ignoring invalid analysis cache on '{me.name}': {e}")
+            return
+        self.put(content_hash, entry)
+    
+    def save_to_mesh(self, me, content_hash, entry):
+        me[CACHE_IDPROP] = entry.to_idprop(content_hash)
+
+
+ANALYSIS_CACHE = AnalysisCache()
+
+
+class IncrementalAnalyzer:
+    '''Keep per-face metrics between passes and re-evaluate only dirty faces.
+    
+    Dirty faces are the one-ring of vertices whose coordinates changed since the
+    previous pass. Any topology or hide-state change falls back to a full rebuild,
+    unless the new mesh state is found in the result cache. Thresholds are applied
+    in categories(), so changing them never re-scans the mesh.
+    '''
+    
+    _TOPOLOGY_FIELDS = (
+        'loop_verts', 'loop_edges', 'face_start', 'edge_verts',
+        'face_hide', 'edge_hide', 'vert_hide',
+    )
+    
+    CHUNK_FACES = 20000  # Số faces (vertices với topology) mỗi bước khi phân tích theo từng phần (progressive)
+    TOPOLOGY_SHARE = 0.5  # Phần đầu của progress dành cho topology khi phân tích lại cả mesh
+    
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.reset()
+    
+    def reset(self):
+        self.arrays = None
+        self.topology = None
+        self.degenerate = None
+        self.ratio = None
+        self.concavity = None
+        self.geometry_key = None
+        self.geometry_valid = False
+        self.last_dirty_faces = 0
+        self.last_full_rebuild = True
+        self.last_cache_hit = False
+    
+    def _same_topology(self, arrays):
+        prev = self.arrays
+        if prev is None or len(prev.co) != len(arrays.co):
+            return False
+        return all(
+            np.array_equal(getattr(prev, name), getattr(arrays, name))
+            for name in self._TOPOLOGY_FIELDS
+        )
+    
+    def update(self, arrays, matrix, edge_ratio, concave_threshold):
+        '''Analyze arrays and return the categories at the given thresholds.'''
+        for _ in self.iter_update(arrays, matrix):
+            pass
+        return self.categories(edge_ratio, concave_threshold)
+    
+    def iter_update(self, arrays, matrix):
+        '''Generator version of update(): yields progress (0..1) between chunks of faces.
+        
+        A small dirty region finishes without yielding. If the generator is closed
+        before it finishes, the face masks are marked invalid and the next pass
+        recomputes all face geometry.
+        '''
+        key = matrix_metric_key(matrix)
+        n_faces = len(arrays.face_start)
+        dirty = None
+        geometry_start = 0.0
+        
+        self.last_cache_hit = False
+        if not self._same_topology(arrays):
+            self.geometry_valid = False
+            entry = self.cache.get(mesh_content_hash(arrays)) if self.cache is not None else None
+            if entry is not None:
+                entry.restore(self, arrays)
+                self.last_cache_hit = True
+                if entry.geometry_key == key:
+                    self.geometry_valid = True
+                    self.last_full_rebuild = False
+                    self.last_dirty_faces = 0
+                    return
+            else:
+                # OPTIMIZATION: Topology cũng chia theo từng dải vertex → không bước timer nào quét cả mesh
+                yield 0.0
+                topology = iter_classify_topology(arrays, self.CHUNK_FACES)
+                while True:
+                    try:
+                        progress = next(topology)
+                    except StopIteration as stop:
+                        self.topology = stop.value
+                        break
+                    yield progress * self.TOPOLOGY_SHARE
+                geometry_start = self.TOPOLOGY_SHARE
+        elif self.geometry_valid and key == self.geometry_key:
+            moved = np.any(arrays.co != self.arrays.co, axis=1)
+            dirty = np.unique(arrays.loop_faces[moved[arrays.loop_verts]])
+        
+        self.arrays = arrays
+        self.last_full_rebuild = dirty is None
+        if dirty is None:
+            dirty = np.arange(n_faces, dtype=np.int32)
+            self.degenerate = np.zeros(n_faces, dtype=bool)
+            # Face chưa tính xong không thuộc category nào
+            self.ratio = np.full(n_faces, np.inf, dtype=np.float32)
+            self.concavity = np.full(n_faces, -np.inf, dtype=np.float32)
+        self.last_dirty_faces = len(dirty)
+        
+        # Geometry đang được cập nhật → chỉ hợp lệ khi xử lý xong toàn bộ dirty faces
+        self.geometry_valid = False
+        for start in range(0, len(dirty), self.CHUNK_FACES):
+            if start:
+                yield geometry_start + (1.0 - geometry_start) * start / len(dirty)
+            chunk = dirty[start:start + self.CHUNK_FACES]
+            degenerate, ratio, concavity = analyze_face_geometry(FaceSubset(arrays, chunk), matrix)
+            self.degenerate[chunk] = degenerate
+            self.ratio[chunk] = ratio
+            self.concavity[chunk] = concavity
+        
+        self.geometry_key = key
+        self.geometry_valid = True
+    
+    def store(self):
+        '''Put the finished state into the cache; returns (content_hash, entry) or None'''
+        if self.cache is None or not self.geometry_valid or self.arrays is None:
+            return None
+        content_hash = mesh_content_hash(self.arrays)
+        entry = CachedAnalysis.from_analyzer(self)
+        self.cache.put(content_hash, entry)
+        return content_hash, entry
+    
+    def categories(self, edge_ratio, concave_threshold):
+        '''Overlay categories for the current (possibly partial) state at the given thresholds.'''
+        small, concave = classify_faces(self.ratio, self.concavity, edge_ratio, concave_threshold)
+        return build_categories(self.arrays, self.topology, self.degenerate, small, concave)
+
+
+# ========== EVALUATED MESH (SAU MODIFIERS) ==========
+# Mirror / Boolean / Weld / Data Transfer (KHB_Normal thêm vào) có thể tạo lỗi mà mesh gốc không có
+
+_MODIFIER_SKIP_PROPS = {'rna_type', 'name', 'type', 'is_active', 'is_override_data', 'show_expanded'}
+
+
+def _rna_value(value):
+    '''Hashable snapshot of an RNA property value (ID pointers by name/transform)'''
+    if isinstance(value, bpy.types.Object):
+        return (value.name, tuple(np.round(np.array(value.matrix_world), 6).ravel()))
+    if isinstance(value, bpy.types.ID):
+        return value.name
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    try:
+        return tuple(value)
+    except TypeError:
+        return None  # Struct lồng nhau (settings) - bỏ qua
+
+
+def modifier_stack_key(obj):
+    '''Signature of the modifier stack and the objects it references.
+    
+    Returns (key, dependency object names). The key changes with the order, the
+    settings or the operand transforms of the modifiers, and with the object's own
+    transform when an operand exists (the result depends on their relative placement);
+    edits inside operand meshes are caught through the dependency names in the
+    depsgraph handler.
+    '''
+    key = []
+    dependencies = set()
+    for mod in obj.modifiers:
+        values = [mod.type, mod.name]
+        for prop in mod.bl_rna.properties:
+            if prop.identifier in _MODIFIER_SKIP_PROPS or prop.type == 'COLLECTION':
+                continue
+            value = getattr(mod, prop.identifier, None)
+            if isinstance(value, bpy.types.Object):
+                dependencies.add(value.name)
+            values.append(_rna_value(value))
+        key.append(tuple(values))
+    if dependencies:
+        key.append(_rna_value(obj))
+    return tuple(key), dependencies
+
+
+class EvaluatedMeshCache:
+    '''Post-modifier MeshArrays of one object, refreshed only when the base mesh or stack changes.'''
+    
+    def __init__(self):
+        self.key = None
+        self.arrays = None
+        self.dependencies = set()
+    
+    def invalidate(self):
+        self.key = None
+    
+    def get(self, obj, depsgraph):
+        '''MeshArrays of the evaluated mesh; obj must be synced from Edit Mode'''
+        stack_key, dependencies = modifier_stack_key(obj)
+        key = (mesh_content_hash(MeshArrays(obj.data)), stack_key)
+        if key == self.key:
+            return self.arrays
+        
+        # OPTIMIZATION: to_mesh() + snapshot chỉ khi mesh gốc hoặc modifier stack đổi
+        eval_obj = obj.evaluated_get(depsgraph)
+        me = eval_obj.to_mesh()
+        try:
+            self.arrays = MeshArrays(me)
+        finally:
+            eval_obj.to_mesh_clear()
+        self.key = key
+        self.dependencies = dependencies
+        return self.arrays
+
+
+def _tag_redraw_view3d():
+    '''Redraw every 3D View (timers have no context area)'''
+    wm = bpy.context.window_manager
+    if wm is None:
+        return
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+# Chunk: nhóm primitives theo lưới không gian, mỗi chunk một index buffer + bounding box
+OVERLAY_CHUNK_PRIMS = 16384  # Số primitives mục tiêu mỗi chunk
+OVERLAY_CHUNK_RES = 8        # Tối đa 8×8×8 chunks mỗi layer (giới hạn số draw call)
+LOD_PIXELS = 16.0            # Chunk nhỏ hơn mức này trên màn hình → vẽ 1 marker thay cho cả cụm
+LOD_MARKER_SIZE = 10.0
+
+# Occlusion: đếm vấn đề bị mesh che bằng raycast trên BVHTree (cache đến khi mesh đổi)
+OCCLUSION_MAX_RAYS = 20000  # Rays tối đa mỗi lần đếm - nhiều hơn thì lấy mẫu đều và nhân tỉ lệ
+OCCLUSION_DELAY = 0.2       # Giây view phải đứng yên trước khi đếm lại (không raycast khi đang orbit)
+OCCLUSION_EPSILON = 1e-4    # Dung sai (theo kích thước mesh) để element không tự che chính nó
+
+# 8 góc của bounding box: chọn min (0) hoặc max (1) theo từng trục
+_BOX_CORNERS = np.array([(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=bool)
+
+
+def chunk_primitives(positions, prims, target=OVERLAY_CHUNK_PRIMS, max_res=OVERLAY_CHUNK_RES):
+    '''Bucket primitives ((N, k) vertex indices) into a grid over their centroids.
+    
+    Returns (order, starts, counts, lo, hi, centers): prims[order] is grouped by
+    chunk, chunk c spans starts[c]:starts[c] + counts[c] and has the object-space
+    bounds lo[c]..hi[c] and the mean centroid centers[c].
+    '''
+    n = len(prims)
+    verts = positions[prims]
+    centroid = verts.mean(axis=1)
+    
+    res = int(np.clip(np.ceil(np.cbrt(n / target)), 1, max_res))
+    lo_all = centroid.min(axis=0)
+    extent = np.maximum(centroid.max(axis=0) - lo_all, 1e-9)
+    cell = np.clip((centroid - lo_all) / extent * res, 0, res - 1).astype(np.int64)
+    chunk_id = (cell[:, 0] * res + cell[:, 1]) * res + cell[:, 2]
+    
+    order = np.argsort(chunk_id, kind='stable')
+    sorted_ids = chunk_id[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    lo = np.minimum.reduceat(verts.min(axis=1)[order], starts)
+    hi = np.maximum.reduceat(verts.max(axis=1)[order], starts)
+    centers = np.add.reduceat(centroid[order], starts) / counts[:, None]
+    return order, starts, counts, lo, hi, centers
+
+
+def classify_chunks(lo, hi, mvp, region_size, lod_pixels=LOD_PIXELS):
+    '''(visible, collapsed) masks of chunk bounding boxes for an object-space MVP matrix.
+    
+    A chunk is culled when all 8 corners lie outside the same clip plane. A visible
+    chunk fully in front of the camera whose screen extent is below lod_pixels is
+    collapsed into a marker.
+    '''
+    corners = np.where(_BOX_CORNERS[None], hi[:, None], lo[:, None])  # (n, 8, 3)
+    clip = corners @ mvp[:3, :3].T + mvp[:3, 3]
+    w = corners @ mvp[3, :3] + mvp[3, 3]
+    
+    outside = np.zeros(len(lo), dtype=bool)
+    for axis in range(3):
+        outside |= (clip[..., axis] < -w).all(axis=1)
+        outside |= (clip[..., axis] > w).all(axis=1)
+    visible = ~outside
+    
+    # Kích thước trên màn hình (pixels) - chỉ tính khi mọi góc ở trước camera
+    in_front = (w > 1e-6).all(axis=1)
+    ndc = clip[..., :2] / np.where(w > 1e-6, w, 1.0)[..., None]
+    size_px = (ndc.max(axis=1) - ndc.min(axis=1)) * 0.5 * np.asarray(region_size, dtype=np.float64)
+    collapsed = visible & in_front & (size_px.max(axis=1) < lod_pixels)
+    return visible, collapsed
+
+
+class OverlayLayer:
+    '''One analysis category drawn as per-chunk index buffers over the shared vertex buffer.'''
+    
+    def __init__(self, name, prim_type, color, size=1.0):
+        self.name = name
+        self.prim_type = prim_type  # 'TRIS' | 'LINES' | 'POINTS'
         self.color = color
-        self.line_width = line_width
-        self.batch = self._create_batch(edge_lines)
+        self.size = size  # Line width / point size
+        self.indices = None
+        self.batches = []  # Một GPUBatch mỗi chunk
+        self.lo = self.hi = self.centers = None
+    
+    def rebuild(self, positions, vbo):
+        '''Re-bucket the indices into chunks and create their index buffers'''
+        self.batches = []
+        if vbo is None or not len(self.indices):
+            return
+        prims = self.indices.reshape(len(self.indices), -1)
+        order, starts, counts, self.lo, self.hi, self.centers = chunk_primitives(positions, prims)
+        prims = prims[order]
+        for start, count in zip(starts, counts):
+            ibo = gpu.types.GPUIndexBuf(type=self.prim_type, seq=prims[start:start + count])
+            self.batches.append(gpu.types.GPUBatch(type=self.prim_type, buf=vbo, elem=ibo))
+
+
+class OcclusionTester:
+    '''Count flagged primitives hidden behind the mesh, raycasting a cached BVHTree.
     
-    def _create_batch(self, edge_lines):
-        vertices = [v for edge in edge_lines for v in edge]
-        return batch_for_shader(self.shader, 'LINES', {"pos": vertices})
+    The tree is built from the analyzed (edit or evaluated) mesh triangles and kept
+    until coordinates or triangles change, so view changes only cost the rays.
+    '''
     
-    def update_batch(self, edge_lines):
-        self.batch = self._create_batch(edge_lines)
+    def __init__(self):
+        self.bvh = None
+        self.co = None
+        self.tri_verts = None
+        self.hidden = {}          # Số primitives bị che theo layer (lần đếm cuối)
+        self.estimated = False    # True khi đếm trên mẫu (quá OCCLUSION_MAX_RAYS)
     
-    def draw(self, context):
-        # Vẽ edges với độ sâu ưu tiên để dễ thấy
-        gpu.state.depth_test_set('ALWAYS')  # Luôn vẽ trên cùng
-        gpu.state.blend_set('ALPHA')
-        gpu.state.line_width_set(self.line_width)
-        
-        self.shader.bind()
-        self.shader.uniform_float('color', self.color)
-        self.batch.draw(self.shader)
-        
-        # Reset
-        gpu.state.line_width_set(1.0)
-        gpu.state.depth_test_set('LESS_EQUAL')
+    def ensure_bvh(self, co, tri_verts):
+        '''Rebuild the tree only if the mesh changed; returns True when rebuilt'''
+        if (self.bvh is not None and np.array_equal(self.co, co) and
+                np.array_equal(self.tri_verts, tri_verts)):
+            return False
+        self.bvh = BVHTree.FromPolygons(co.tolist(), tri_verts.tolist(), all_triangles=True) if len(tri_verts) else None
+        self.co, self.tri_verts = co, tri_verts
+        return True
+    
+    def count(self, layers, positions, eye, forward, perspective):
+        '''Count hidden primitives per layer for an object-space eye position / view direction'''
+        total = sum(len(layer.indices) for layer in layers if layer.indices is not None)
+        step = max(1, -(-total // OCCLUSION_MAX_RAYS))
+        extent = float(np.ptp(positions, axis=0).max()) if len(positions) else 1.0
+        margin = OCCLUSION_EPSILON * extent + 1e-6
+        
+        self.hidden = {}
+        self.estimated = step > 1
+        for layer in layers:
+            if self.bvh is None or layer.indices is None or not len(layer.indices):
+                self.hidden[layer.name] = 0
+                continue
+            
+            # Điểm đại diện: tâm tri / trung điểm edge / chính vertex
+            prims = layer.indices.reshape(len(layer.indices), -1)[::step]
+            points = positions[prims].mean(axis=1).astype(np.float64)
+            if perspective:
+                origin = np.broadcast_to(eye, points.shape)
+                ray = points - eye
+            else:
+                ray = np.broadcast_to(forward * (2.0 * extent + 1.0), points.shape)
+                origin = points - ray
+            dist = np.linalg.norm(ray, axis=1)
+            direction = ray / np.maximum(dist, 1e-12)[:, None]
+            limit = dist - margin
+            
+            # Hit trước khi tới điểm (trừ dung sai) → bị che
+            ray_cast = self.bvh.ray_cast
+            hidden = sum(
+                1 for o, d, lim in zip(origin.tolist(), direction.tolist(), limit.tolist())
+                if lim > 0.0 and ray_cast(o, d, lim)[0] is not None
+            )
+            self.hidden[layer.name] = hidden * step
+        return self.hidden
 
 
-class DrawVertex:
-    '''Draw colored points (vertices) in the 3D view.'''
+class AnalysisOverlay:
+    '''Draw every analysis category from one GPUVertBuf in a single draw handler.
+    
+    Object-space positions of all mesh vertices are uploaded once; each category
+    is split into spatial chunks, each a GPUIndexBuf over them, rebuilt only when
+    the category or the positions change. At draw time chunks outside the view
+    frustum are skipped and chunks smaller than LOD_PIXELS on screen are drawn as
+    one marker, so draw cost follows what is visible. matrix_world is applied on
+    the GPU matrix stack, so moving the object never touches the buffers.
+    
+    With occlusion enabled every layer is depth tested against the viewport depth
+    buffer (only visible problems are drawn) and an OcclusionTester counts the
+    hidden ones once the view has settled.
+    '''
     
-    def __init__(self, points, color, point_size=5.0):
+    def __init__(self, layers, object_name):
         self.shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-        self.color = color
-        self.point_size = point_size
-        self.batch = self._create_batch(points)
+        self.layers = layers
+        self.object_name = object_name
+        self.positions = None
+        self.vbo = None
+        self.occluder_tris = np.zeros((0, 3), dtype=np.int32)  # Triangles của mesh dùng để build BVH
+        self.stats = (0, 0, 0)  # (chunks vẽ, chunks bị cull, chunks gộp thành marker) của frame cuối
+        
+        # Occlusion (None = tắt, vẽ xuyên mesh như cũ)
+        self.occlusion = None
+        self._occlusion_view = None     # (eye, forward, perspective) mới nhất từ draw()
+        self._occlusion_counted = None  # View đã được đếm
+        self._occlusion_dirty = False   # Kết quả/mesh đổi → cần đếm lại
+        self._view_changed_at = 0.0
+        self._timer_pending = False
+    
+    def set_occlusion(self, enabled):
+        if enabled and self.occlusion is None:
+            self.occlusion = OcclusionTester()
+            self._occlusion_dirty = True
+        elif not enabled:
+            self.occlusion = None
+    
+    @property
+    def hidden_count(self):
+        return sum(self.occlusion.hidden.values()) if self.occlusion is not None else 0
+    
+    @property
+    def occlusion_pending(self):
+        return self.occlusion is not None and self._timer_pending
+    
+    @staticmethod
+    def _same_view(a, b):
+        return b is not None and all(np.array_equal(x, y) for x, y in zip(a, b))
+    
+    def _schedule_occlusion(self, view):
+        '''Remember the latest view; count hidden primitives once it stops changing'''
+        if not self._same_view(view, self._occlusion_view):
+            self._occlusion_view = view
+            self._view_changed_at = time.perf_counter()
+        if self._timer_pending:
+            return
+        if not self._occlusion_dirty and self._same_view(view, self._occlusion_counted):
+            return
+        self._timer_pending = True
+        bpy.app.timers.register(self._count_occlusion, first_interval=OCCLUSION_DELAY)
     
-    def _create_batch(self, points):
-        if not points:
-            points = []
-        return batch_for_shader(self.shader, 'POINTS', {"pos": points})
+    def _count_occlusion(self):
+        '''Timer: raycast once the view has been still for OCCLUSION_DELAY seconds'''
+        if self.occlusion is None or self._occlusion_view is None:
+            self._timer_pending = False
+            return None
+        wait = self._view_changed_at + OCCLUSION_DELAY - time.perf_counter()
+        if wait > 0.0:
+            return wait
+        
+        self._timer_pending = False
+        if self.positions is None:
+            return None
+        self.occlusion.ensure_bvh(self.positions, self.occluder_tris)
+        self.occlusion.count(self.layers, self.positions, *self._occlusion_view)
+        self._occlusion_counted = self._occlusion_view
+        self._occlusion_dirty = False
+        _tag_redraw_view3d()
+        return None
     
-    def update_batch(self, points):
-        self.batch = self._create_batch(points)
+    def _create_vbo(self, positions):
+        if not len(positions):
+            return None
+        fmt = gpu.types.GPUVertFormat()
+        fmt.attr_add(id="pos", comp_type='F32', len=3, fetch_mode='FLOAT')
+        vbo = gpu.types.GPUVertBuf(len=len(positions), format=fmt)
+        vbo.attr_fill(id="pos", data=positions)
+        return vbo
+    
+    def update(self, positions, indices):
+        '''Upload positions if they changed and rebuild only the layers whose indices changed'''
+        positions = np.ascontiguousarray(positions, dtype=np.float32)
+        vbo_changed = self.positions is None or not np.array_equal(self.positions, positions)
+        if vbo_changed:
+            self.positions = positions
+            self.vbo = self._create_vbo(positions)
+        
+        for layer in self.layers:
+            new = np.ascontiguousarray(indices[layer.name], dtype=np.int32)
+            indices_changed = layer.indices is None or not np.array_equal(layer.indices, new)
+            if indices_changed:
+                layer.indices = new
+            # Vị trí đổi → bounding box của chunk cũng đổi
+            if indices_changed or vbo_changed:
+                layer.rebuild(positions, self.vbo)
+                self._occlusion_dirty = True
     
     def draw(self, context):
-        gpu.state.depth_test_set('LESS_EQUAL')
-        gpu.state.blend_set('ALPHA')
-        gpu.state.point_size_set(self.point_size)
+        obj = bpy.data.objects.get(self.object_name)
+        region = context.region
+        rv3d = context.region_data
+        if obj is None or rv3d is None:
+            return
         
+        matrix_world = np.array(obj.matrix_world, dtype=np.float64)
+        mvp = np.array(rv3d.perspective_matrix, dtype=np.float64) @ matrix_world
+        region_size = (region.width, region.height)
+        drawn = culled = merged = 0
+        markers = []
+        occlusion = self.occlusion is not None
+        
+        if occlusion:
+            # View (eye + hướng nhìn) trong object space cho raycast
+            view_to_object = np.linalg.inv(matrix_world) @ np.linalg.inv(np.array(rv3d.view_matrix, dtype=np.float64))
+            eye = view_to_object[:3, 3].copy()
+            forward = -view_to_object[:3, 2]
+            forward /= max(np.linalg.norm(forward), 1e-12)
+            self._schedule_occlusion((eye, forward, bool(rv3d.is_perspective)))
+        
+        # Model matrix: builtin shader đọc ModelViewProjection từ GPU matrix stack
+        gpu.matrix.push()
+        gpu.matrix.multiply_matrix(obj.matrix_world)
         self.shader.bind()
-        self.shader.uniform_float('color', self.color)
-        self.batch.draw(self.shader)
+        for layer in self.layers:
+            if not layer.batches:
+                continue
+            
+            # OPTIMIZATION: Frustum culling + LOD theo chunk (vectorized trên bounding boxes)
+            visible, collapsed = classify_chunks(layer.lo, layer.hi, mvp, region_size)
+            draw_chunks = np.flatnonzero(visible & ~collapsed)
+            culled += int(np.count_nonzero(~visible))
+            if collapsed.any():
+                merged += int(np.count_nonzero(collapsed))
+                markers.append((layer, layer.centers[collapsed]))
+            if not len(draw_chunks):
+                continue
+            
+            if layer.prim_type == 'TRIS':
+                gpu.state.face_culling_set('BACK')
+                gpu.state.depth_test_set('LESS_EQUAL' if occlusion else 'NONE')
+                gpu.state.blend_set('ALPHA_PREMULT')
+            elif layer.prim_type == 'LINES':
+                # Vẽ edges với độ sâu ưu tiên để dễ thấy (occlusion: bị mesh che thì không vẽ)
+                gpu.state.depth_test_set('LESS_EQUAL' if occlusion else 'ALWAYS')
+                gpu.state.blend_set('ALPHA')
+                gpu.state.line_width_set(layer.size)
+            else:
+                gpu.state.depth_test_set('LESS_EQUAL')
+                gpu.state.blend_set('ALPHA')
+                gpu.state.point_size_set(layer.size)
+            
+            self.shader.uniform_float('color', layer.color)
+            for index in draw_chunks:
+                layer.batches[index].draw(self.shader)
+            drawn += len(draw_chunks)
+        
+        # Cụm ở xa: 1 marker (point) tại tâm chunk, màu đậm của category
+        if markers:
+            gpu.state.face_culling_set('NONE')
+            gpu.state.depth_test_set('LESS_EQUAL' if occlusion else 'ALWAYS')
+            gpu.state.blend_set('ALPHA')
+            gpu.state.point_size_set(LOD_MARKER_SIZE)
+            for layer, centers in markers:
+                vbo = self._create_vbo(np.ascontiguousarray(centers, dtype=np.float32))
+                self.shader.uniform_float('color', (*layer.color[:3], max(layer.color[3], 0.8)))
+                gpu.types.GPUBatch(type='POINTS', buf=vbo).draw(self.shader)
+        
+        self.stats = (drawn, culled, merged)
         
+        # Reset
+        gpu.state.face_culling_set('NONE')
+        gpu.state.line_width_set(1.0)
         gpu.state.point_size_set(1.0)
+        gpu.state.depth_test_set('LESS_EQUAL')
+        gpu.matrix.pop()
 
 
 class KHABIT_OT_AnalyzeCheck(bpy.types.Operator):
@@ -105,28 +1099,40 @@ class KHABIT_OT_AnalyzeCheck(bpy.types.Operator):
     _operator = None
     _running = False
     
-    # Face data
-    ngon_tris: list = []
-    ngons: list = []
-    small_faces_tris: list = []
-    small_faces: list = []
-    concave_faces_tris: list = []
-    concave_faces: list = []
-    boundary_edges: list = []
-    loose_vertices: list = []  # Vertices không thuộc bất kỳ face nào
-    loose_edges: list = []  # Edges không thuộc bất kỳ face nào
-    non_manifold_vertices: list = []  # Non-manifold vertices
-    non_manifold_edges: list = []  # Non-manifold edges (3+ faces)
-    degenerate_face_edges: list = []  # Edges của degenerate faces (zero-area, collapsed vertices)
-    degenerate_faces: list = []  # Degenerate faces
+    # Kết quả: index arrays theo category (faces / loop triangles / edges / vertices)
+    _results = AnalysisResults()
+    
+    # Incremental analysis state (giữ classification giữa các lần update)
+    _analyzer = None
+    
+    # Progressive analysis: pass đang chạy (generator) được timer xử lý từng phần
+    _job = None
+    _job_progress = 1.0
+    _matrix = None
+    TIME_BUDGET = 0.015  # Giây xử lý tối đa mỗi lần timer chạy (giữ viewport mượt)
+    
+    # Evaluated mesh (sau modifiers) - chỉ dùng khi use_evaluated bật
+    _evaluated = None
+    
+    # Baseline report để so sánh giữa các revision: {'name', 'categories', 'elements'}
+    # _diff = index arrays của vấn đề mới (không có trong baseline) theo category
+    _baseline = None
+    _diff = None
     
     # Drawing handlers
     _handles = []
-    _callbacks = []
+    _overlay = None
     
-    # OPTIMIZATION: Throttle update rate để tránh lag
-    _last_update_time = 0.0
-    _update_interval = 1.0  # Update tối đa 1 lần/giây (tối ưu cho hiệu suất cao)
+    # OPTIMIZATION: Adaptive scheduler - khoảng cách giữa các pass theo thời gian pass trước
+    # Mesh nhẹ gần như realtime, mesh nặng chờ đến khi ngừng edit (debounce), pass cuối luôn chạy
+    MIN_INTERVAL = 0.05    # Giây - trần ~20 pass/giây
+    MAX_INTERVAL = 1.0     # Giây - chờ tối đa sau edit cuối
+    INTERVAL_FACTOR = 4.0  # Interval = thời gian pass × hệ số (phân tích chiếm <= ~20% thời gian edit)
+    HITCH_SECONDS = 0.1    # Pass lâu hơn mức này sẽ làm khựng viewport → chỉ chạy khi edit dừng
+    _last_edit_time = 0.0
+    _last_pass_end = 0.0
+    _job_cost = 0.0    # Thời gian xử lý của pass đang chạy (cộng dồn qua các timer step)
+    _pass_cost = 0.0   # Thời gian xử lý của pass gần nhất
     
     # Edge ratio threshold for small face detection
     edge_ratio: bpy.props.FloatProperty(
@@ -151,6 +1157,34 @@ class KHABIT_OT_AnalyzeCheck(bpy.types.Operator):
         update=lambda self, ctx: self._update_mesh(ctx)
     )
     
+    progressive: bpy.props.BoolProperty(
+        name="Progressive",
+        description="Split analysis of large meshes into chunks and update the overlay as they finish",
+        default=True,
+    )
+    
+    cache_in_blend: bpy.props.BoolProperty(
+        name="Store in .blend",
+        description="Save analysis results on the mesh so reopening the file shows the overlay instantly",
+        default=False,
+    )
+    
+    use_evaluated: bpy.props.BoolProperty(
+        name="After Modifiers",
+        description="Analyze the mesh with its modifier stack applied (modifiers shown in Edit Mode). "
+                    "Selection tools are disabled in this mode",
+        default=False,
+        update=lambda self, ctx: self._restart_analysis(ctx)
+    )
+    
+    occlusion: bpy.props.BoolProperty(
+        name="Occlusion",
+        description="Hide problems covered by the mesh (viewport depth test) and count them with "
+                    "raycasts against a cached BVH of the analyzed mesh",
+        default=False,
+        update=lambda self, ctx: self._update_occlusion(ctx)
+    )
+    
     # Colors
     NGON_COLOR = (1.0, 0.0, 0.0, 0.1)      # Red
     SMALL_COLOR = (0.0, 0.5, 1.0, 0.1)     # Blue
@@ -161,6 +1195,8 @@ class KHABIT_OT_AnalyzeCheck(bpy.types.Operator):
     NON_MANIFOLD_VERTEX_COLOR = (1.0, 1.0, 0.0, 1.0)  # Yellow (solid) - Nghiêm trọng!
     NON_MANIFOLD_EDGE_COLOR = (1.0, 1.0, 0.0, 1.0)  # Yellow (solid) - Nghiêm trọng!
     DEGENERATE_EDGE_COLOR = (0.0, 0.5, 1.0, 1.0)  # Blue (solid) - Giống Small Face
+    NEW_PROBLEM_FACE_COLOR = (1.0, 0.45, 0.0, 0.35)  # Orange - Vấn đề mới so với baseline
+    NEW_PROBLEM_COLOR = (1.0, 0.45, 0.0, 1.0)  # Orange (solid)
     
     @classmethod
     def poll(cls, context):
@@ -174,15 +1210,23 @@ class KHABIT_OT_AnalyzeCheck(bpy.types.Operator):
         
         self._running = True
         self.__class__._operator = self
+        self._handles = []  # Draw handler của riêng instance này (không dùng chung list của class)
         
-        # OPTIMIZATION: Reset throttle timer
-        self._last_update_time = 0.0
+        # OPTIMIZATION: Reset scheduler
+        cls = self.__class__
+        cls._last_edit_time = cls._last_pass_end = 0.0
+        cls._pass_cost = 0.0
         
         obj = context.edit_object
         obj.update_from_editmode()
         
-        self._analyze_mesh(obj.data, obj.matrix_world)
+        # Kết quả đã lưu trong .blend (nếu có) → đưa vào cache trước khi phân tích
+        ANALYSIS_CACHE.load_from_mesh(obj.data)
+        
+        # Overlay rỗng trước, kết quả sẽ được đổ vào dần (progressive) với mesh lớn
+        self.__class__._evaluated = EvaluatedMeshCache()
         self._setup_drawing(context)
+        self._start_analysis(obj, depsgraph=context.evaluated_depsgraph_get())
         
         bpy.app.handlers.depsgraph_update_post.append(self._depsgraph_update)
         context.window_manager.modal_handler_add(self)
@@ -207,28 +1251,31 @@ class KHABIT_OT_AnalyzeCheck(bpy.types.Operator):
     
     def end(self, context):
         self._running = False
+        # Operator đã bị thay thế (toggle / Inspect Object mở analysis mới) → modal cũ gọi end()
+        # lần nữa: không được đụng vào state của class đang thuộc về operator mới
+        if self.__class__._operator is not self:
+            return
         self.__class__._operator = None
         
         # Clear data
-        self.ngon_tris.clear()
-        self.ngons.clear()
-        self.small_faces_tris.clear()
-        self.small_faces.clear()
-        self.concave_faces_tris.clear()
-        self.concave_faces.clear()
-        self.boundary_edges.clear()
-        self.loose_vertices.clear()
-        self.loose_edges.clear()
-        self.non_manifold_vertices.clear()
-        self.non_manifold_edges.clear()
-        self.degenerate_face_edges.clear()
-        self.degenerate_faces.clear()
+        self.__class__._results = AnalysisResults()
+        # Giữ kết quả trong cache (và .blend nếu bật) để lần bật sau có overlay ngay
+        self._store_cache()
+        self._cancel_job()
+        if bpy.app.timers.is_registered(self._scheduled_update):
+            bpy.app.timers.unregister(self._scheduled_update)
+        self.__class__._analyzer = None
+        self.__class__._evaluated = None
+        self.__class__._baseline = None
+        self.__class__._diff = None
         
         # Remove handlers
         for handle in self._handles:
             bpy.types.SpaceView3D.draw_handler_remove(handle, 'WINDOW')
         self._handles.clear()
-        self._callbacks.clear()
+        if self._overlay is not None:
+            self._overlay.set_occlusion(False)  # Timer đếm occlusion đang chờ sẽ tự dừng
+        self.__class__._overlay = None
         
         if self._depsgraph_update in bpy.app.handlers.depsgraph_update_post:
             bpy.app.handlers.depsgraph_update_post.remove(self._depsgraph_update)
@@ -237,657 +1284,665 @@ class KHABIT_OT_AnalyzeCheck(bpy.types.Operator):
             context.area.tag_redraw()
     
     def _update_mesh(self, context):
+        # OPTIMIZATION: Đổi threshold chỉ phân loại lại metric đã cache (edge ratio, concavity)
+        # → không quét lại topology/geometry, overlay chỉ rebuild index buffer của small/concave
+        if self._running and self._analyzer is not None and self._analyzer.arrays is not None:
+            self._apply_results()
+            if context.area:
+                context.area.tag_redraw()
+    
+    def _update_occlusion(self, context):
+        if self._running and self._overlay is not None:
+            self._overlay.set_occlusion(self.occlusion)
+            if context.area:
+                context.area.tag_redraw()
+    
+    def _restart_analysis(self, context):
         if self._running and context.edit_object:
             obj = context.edit_object
             obj.update_from_editmode()
-            self._analyze_mesh(obj.data, obj.matrix_world)
-            self._update_drawing()
-            
-            # OPTIMIZATION: Không cần tag_redraw - depsgraph sẽ tự trigger redraw
+            self._start_analysis(obj, depsgraph=context.evaluated_depsgraph_get())
     
     def _depsgraph_update(self, scene, depsgraph):
-        # OPTIMIZATION: Throttle update rate - tránh update quá nhiều lần/giây
-        current_time = time.time()
-        if current_time - self._last_update_time < self._update_interval:
-            return  # Skip update nếu chưa đủ thời gian
-        
+        # Handler chỉ ghi nhận edit; pass thật sự do _scheduled_update chạy (adaptive + debounce)
         obj = bpy.context.edit_object
         if not obj:
             return
         
+        # Object được modifier tham chiếu (Boolean cutter, Data Transfer source...) thay đổi
+        # → evaluated mesh cũ không còn đúng
+        if self.use_evaluated and self._evaluated is not None and self._evaluated.dependencies:
+            for update in depsgraph.updates:
+                if (isinstance(update.id, bpy.types.Object) and
+                        update.id.original.name in self._evaluated.dependencies):
+                    self._evaluated.invalidate()
+                    self._request_update()
+                    return
+        
         # OPTIMIZATION: Chỉ update khi object thực sự thay đổi
         for update in depsgraph.updates:
             if isinstance(update.id, bpy.types.Object) and update.id.original == obj:
-                obj.update_from_editmode()
-                self._analyze_mesh(obj.data, obj.matrix_world)
-                self._update_drawing()
-                self._last_update_time = current_time  # Cập nhật thời gian
+                # Chỉ move/rotate: overlay tự theo matrix_world trên GPU, không cần phân tích lại
+                # (trừ khi modifier tham chiếu object khác - kết quả Boolean/Mirror đổi theo vị trí tương đối)
+                depends_on_placement = (self.use_evaluated and self._evaluated is not None and
+                                        bool(self._evaluated.dependencies))
+                if (not update.is_updated_geometry and not depends_on_placement and self._matrix is not None and
+                        matrix_metric_key(obj.matrix_world) == matrix_metric_key(self._matrix)):
+                    self.__class__._matrix = obj.matrix_world.copy()
+                    break
+                self._request_update()
                 break
     
+    @classmethod
+    def update_interval(cls):
+        '''Seconds between passes, scaled by the measured cost of the previous pass'''
+        return min(max(cls._pass_cost * cls.INTERVAL_FACTOR, cls.MIN_INTERVAL), cls.MAX_INTERVAL)
+    
+    @classmethod
+    def is_debounced(cls):
+        '''True when passes are too slow to run while editing and wait for edits to stop'''
+        return cls._pass_cost >= cls.HITCH_SECONDS
+    
+    def _request_update(self):
+        '''Record an edit and make sure a trailing pass is scheduled'''
+        cls = self.__class__
+        cls._last_edit_time = time.perf_counter()
+        if not bpy.app.timers.is_registered(cls._scheduled_update):
+            bpy.app.timers.register(cls._scheduled_update, first_interval=cls._wait_time())
+    
+    @classmethod
+    def _wait_time(cls):
+        now = time.perf_counter()
+        if cls.is_debounced():
+            return max(0.0, cls._last_edit_time + cls.update_interval() - now)
+        return max(0.0, cls._last_pass_end + cls.update_interval() - now)
+    
+    @staticmethod
+    def _scheduled_update():
+        '''Timer: run the pending pass once its interval has elapsed (never drops the last edit)'''
+        cls = KHABIT_OT_AnalyzeCheck
+        op = cls._operator
+        if op is None or not op._running:
+            return None
+        
+        # Có edit mới trong lúc chờ → lùi lại (debounce) thay vì chạy pass với mesh đang đổi
+        wait = cls._wait_time()
+        if wait > 0.0:
+            return wait
+        
+        obj = bpy.context.edit_object
+        if obj is None:
+            return None
+        obj.update_from_editmode()
+        op._start_analysis(obj)
+        return None
+    
     def _setup_drawing(self, context):
-        self._callbacks = [
-            DrawFace(self.ngon_tris, self.NGON_COLOR),
-            DrawFace(self.small_faces_tris, self.SMALL_COLOR),
-            DrawFace(self.concave_faces_tris, self.CONCAVE_COLOR),
-            DrawEdge(self.boundary_edges, self.BOUNDARY_COLOR, line_width=3.0),
-            DrawEdge(self.loose_edges, self.LOOSE_EDGE_COLOR, line_width=4.0),
-            DrawVertex(self.loose_vertices, self.LOOSE_VERTEX_COLOR, point_size=6.0),
-            DrawEdge(self.non_manifold_edges, self.NON_MANIFOLD_EDGE_COLOR, line_width=5.0),
-            DrawVertex(self.non_manifold_vertices, self.NON_MANIFOLD_VERTEX_COLOR, point_size=8.0),
-            DrawEdge(self.degenerate_face_edges, self.DEGENERATE_EDGE_COLOR, line_width=4.0)
-        ]
-        
-        for callback in self._callbacks:
-            handle = bpy.types.SpaceView3D.draw_handler_add(
-                callback.draw, (context,), 'WINDOW', 'POST_VIEW'
-            )
-            self._handles.append(handle)
+        self.__class__._overlay = AnalysisOverlay([
+            OverlayLayer('ngon_tris', 'TRIS', self.NGON_COLOR),
+            OverlayLayer('small_faces_tris', 'TRIS', self.SMALL_COLOR),
+            OverlayLayer('concave_faces_tris', 'TRIS', self.CONCAVE_COLOR),
+            OverlayLayer('boundary_edges', 'LINES', self.BOUNDARY_COLOR, 3.0),
+            OverlayLayer('loose_edges', 'LINES', self.LOOSE_EDGE_COLOR, 4.0),
+            OverlayLayer('loose_vertices', 'POINTS', self.LOOSE_VERTEX_COLOR, 6.0),
+            OverlayLayer('non_manifold_edges', 'LINES', self.NON_MANIFOLD_EDGE_COLOR, 5.0),
+            OverlayLayer('non_manifold_vertices', 'POINTS', self.NON_MANIFOLD_VERTEX_COLOR, 8.0),
+            OverlayLayer('degenerate_face_edges', 'LINES', self.DEGENERATE_EDGE_COLOR, 4.0),
+            # Vẽ sau cùng → vấn đề mới (diff với baseline) nằm trên các category khác
+            OverlayLayer('new_problem_tris', 'TRIS', self.NEW_PROBLEM_FACE_COLOR),
+            OverlayLayer('new_problem_edges', 'LINES', self.NEW_PROBLEM_COLOR, 6.0),
+            OverlayLayer('new_problem_vertices', 'POINTS', self.NEW_PROBLEM_COLOR, 10.0),
+        ], context.edit_object.name)
+        self._overlay.set_occlusion(self.occlusion)
+        
+        # OPTIMIZATION: Một draw handler duy nhất cho tất cả categories
+        handle = bpy.types.SpaceView3D.draw_handler_add(
+            self._overlay.draw, (context,), 'WINDOW', 'POST_VIEW'
+        )
+        self._handles.append(handle)
     
     def _update_drawing(self):
-        if len(self._callbacks) == 9:
-            self._callbacks[0].update_batch(self.ngon_tris)
-            self._callbacks[1].update_batch(self.small_faces_tris)
-            self._callbacks[2].update_batch(self.concave_faces_tris)
-            self._callbacks[3].update_batch(self.boundary_edges)
-            self._callbacks[4].update_batch(self.loose_edges)
-            self._callbacks[5].update_batch(self.loose_vertices)
-            self._callbacks[6].update_batch(self.non_manifold_edges)
-            self._callbacks[7].update_batch(self.non_manifold_vertices)
-            self._callbacks[8].update_batch(self.degenerate_face_edges)
-    
-    def _analyze_mesh(self, me, matrix):
-        '''Analyze mesh and categorize faces'''
-        me.calc_loop_triangles()
-        
-        # Clear previous data
-        self.ngon_tris.clear()
-        self.ngons.clear()
-        self.small_faces_tris.clear()
-        self.small_faces.clear()
-        self.concave_faces_tris.clear()
-        self.concave_faces.clear()
-        self.boundary_edges.clear()
-        self.loose_vertices.clear()
-        self.loose_edges.clear()
-        self.non_manifold_vertices.clear()
-        self.non_manifold_edges.clear()
-        self.degenerate_face_edges.clear()
-        self.degenerate_faces.clear()
-        
-        # ========== TẠO BMESH MỘT LẦN DUY NHẤT (OPTIMIZATION) ==========
-        # Tạo bmesh để xử lý cả degenerate faces và non-manifold vertices
-        
-        import bmesh
-        bm = bmesh.new()
-        bm.from_mesh(me)
-        bm.verts.ensure_lookup_table()
-        bm.faces.ensure_lookup_table()
-        bm.edges.ensure_lookup_table()
-        
-        # ========== PHÁT HIỆN DEGENERATE FACES (ƯU TIÊN RẤT CAO) ==========
-        # Degenerate faces: zero-area faces, collapsed vertices, zero-length edges
-        
-        degenerate_face_set = set()
-        AREA_THRESHOLD = 0.000001  # Ngưỡng diện tích rất nhỏ
-        DISTANCE_THRESHOLD = 0.0001  # Ngưỡng khoảng cách vertices
-        
-        for face in bm.faces:
-            if face.hide:
-                continue
-            
-            is_degenerate = False
-            
-            # Check 1: Face có diện tích = 0 hoặc gần 0
-            if face.calc_area() < AREA_THRESHOLD:
-                is_degenerate = True
-            
-            # Check 2: Face có 2+ vertices ở cùng vị trí (hoặc rất gần)
-            if not is_degenerate:
-                verts = [matrix @ v.co for v in face.verts]
-                for i in range(len(verts)):
-                    for j in range(i + 1, len(verts)):
-                        if (verts[i] - verts[j]).length < DISTANCE_THRESHOLD:
-                            is_degenerate = True
-                            break
-                    if is_degenerate:
-                        break
-            
-            # Check 3: Face có zero-length edge
-            if not is_degenerate:
-                for edge in face.edges:
-                    edge_length = edge.calc_length()
-                    if edge_length < DISTANCE_THRESHOLD:
-                        is_degenerate = True
-                        break
-            
-            if is_degenerate:
-                degenerate_face_set.add(face.index)
-                self.degenerate_faces.append(me.polygons[face.index])
-                
-                # Vẽ TẤT CẢ edges của degenerate face
-                for edge in face.edges:
-                    v1_co = matrix @ edge.verts[0].co
-                    v2_co = matrix @ edge.verts[1].co
-                    self.degenerate_face_edges.append((v1_co, v2_co))
-        
-        # ========== PHÁT HIỆN NON-MANIFOLD (ƯU TIÊN CAO NHẤT) ==========
-        
-        # Find vertices used by faces
-        vertices_in_faces = set()
-        vertex_edge_count = {}  # Đếm edges của mỗi vertex
-        
-        for poly in me.polygons:
-            if poly.hide:
-                continue
-            vertices_in_faces.update(poly.vertices)
-        
-        # Build edge-face mapping và vertex-edge mapping
-        edge_face_count = {}
-        for poly in me.polygons:
-            if poly.hide:
-                continue
-            for i in range(len(poly.vertices)):
-                v1 = poly.vertices[i]
-                v2 = poly.vertices[(i + 1) % len(poly.vertices)]
-                edge_key = tuple(sorted([v1, v2]))
-                edge_face_count[edge_key] = edge_face_count.get(edge_key, 0) + 1
-        
-        # Detect non-manifold edges (3+ faces)
-        non_manifold_edge_set = set()
-        for edge_key, count in edge_face_count.items():
-            if count >= 3:  # Non-manifold: edge có 3+ faces
-                non_manifold_edge_set.add(edge_key)
-                v1_co = matrix @ me.vertices[edge_key[0]].co
-                v2_co = matrix @ me.vertices[edge_key[1]].co
-                self.non_manifold_edges.append((v1_co, v2_co))
-        
-        # Detect non-manifold vertices (dùng chung bmesh đã tạo ở trên)
-        # SỬ DỤNG bmesh.verts[].is_manifold để detect CHÍNH XÁC
-        non_manifold_vertex_set = set()
-        for vert in bm.verts:
-            if not vert.hide:
-                is_non_manifold = False
-                
-                # METHOD 1: Sử dụng is_manifold attribute của BMesh (CHÍNH XÁC NHẤT)
-                # is_manifold = False khi vertex có bất kỳ vấn đề topology nào
-                if hasattr(vert, 'is_manifold'):
-                    # Blender 2.91+ có attribute is_manifold
-                    is_non_manifold = not vert.is_manifold
-                else:
-                    # Fallback cho Blender cũ hơn: Manual checks
-                    edge_count = len(vert.link_edges)
-                    face_count = len(vert.link_faces)
-                    
-                    # Non-manifold conditions:
-                    # 1. Vertex nằm trong non-manifold edge (edge có 3+ faces)
-                    # 2. Vertex có >2 boundary edges
-                    # 3. Wire edges mixed với faces
-                    # 4. Vertex có disjoint face fans (faces không liên tục)
-                    
-                    # Check 1: Vertex có trong non-manifold edge
-                    for edge in vert.link_edges:
-                        edge_key = tuple(sorted([v.index for v in edge.verts]))
-                        if edge_key in non_manifold_edge_set:
-                            is_non_manifold = True
-                            break
-                    
-                    # Check 2: Vertex có >2 boundary edges (T-junction, Y-junction, etc.)
-                    if not is_non_manifold and face_count > 0:
-                        boundary_edge_count = sum(1 for e in vert.link_edges if e.is_boundary)
-                        if boundary_edge_count > 2:
-                            is_non_manifold = True
-                    
-                    # Check 3: Wire edges (edges không có face) mixed với faces
-                    if not is_non_manifold and face_count > 0:
-                        wire_edges = [e for e in vert.link_edges if len(e.link_faces) == 0]
-                        if len(wire_edges) > 0:
-                            is_non_manifold = True
-                    
-                    # Check 4: Disjoint face fans - các faces không tạo thành disk topology liên tục
-                    # Đây là trường hợp khó nhất: vertex có faces nhưng chúng tách rời nhau
-                    if not is_non_manifold and face_count > 1:
-                        # Build face connectivity graph qua vertex
-                        visited_faces = set()
-                        stack = [vert.link_faces[0]]
-                        visited_faces.add(vert.link_faces[0])
-                        
-                        # DFS từ face đầu tiên để tìm tất cả faces liên thông qua edges của vertex
-                        while stack:
-                            current_face = stack.pop()
-                            # Tìm các faces khác liên kết với current_face qua edges của vertex này
-                            for edge in vert.link_edges:
-                                if current_face in edge.link_faces:
-                                    for neighbor_face in edge.link_faces:
-                                        if neighbor_face not in visited_faces and neighbor_face in vert.link_faces:
-                                            visited_faces.add(neighbor_face)
-                                            stack.append(neighbor_face)
-                        
-                        # Nếu không phải tất cả faces đều được visit → có disjoint components → non-manifold
-                        if len(visited_faces) < face_count:
-                            is_non_manifold = True
-                
-                if is_non_manifold:
-                    non_manifold_vertex_set.add(vert.index)
-                    vert_co = matrix @ vert.co
-                    self.non_manifold_vertices.append(vert_co)
-        
-        # OPTIMIZATION: Giải phóng bmesh sau khi dùng xong
-        bm.free()
-        
-        # ========== LOOSE GEOMETRY (BỎ QUA NẾU ĐÃ LÀ NON-MANIFOLD) ==========
-        
-        # Find loose vertices (vertices not in any face) - BỎ QUA non-manifold
-        loose_vertex_set = set()
-        for vert in me.vertices:
-            if not vert.hide and vert.index not in vertices_in_faces:
-                if vert.index not in non_manifold_vertex_set:  # BỎ QUA non-manifold
-                    loose_vertex_set.add(vert.index)
-                    vert_co = matrix @ vert.co
-                    self.loose_vertices.append(vert_co)
-        
-        # Collect boundary edges (count == 1) - BỎ QUA non-manifold
-        for edge_key, count in edge_face_count.items():
-            if count == 1 and edge_key not in non_manifold_edge_set:  # BỎ QUA non-manifold
-                v1_co = matrix @ me.vertices[edge_key[0]].co
-                v2_co = matrix @ me.vertices[edge_key[1]].co
-                self.boundary_edges.append((v1_co, v2_co))
-        
-        # Find loose edges (edges not connected to any face)
-        # BỎ QUA non-manifold VÀ edges có cả 2 vertices trong loose_vertex_set
-        for edge in me.edges:
-            if edge.hide:
-                continue
-            edge_key = tuple(sorted([edge.vertices[0], edge.vertices[1]]))
-            
-            # BỎ QUA nếu là non-manifold
-            if edge_key in non_manifold_edge_set:
-                continue
-            
-            # BỎ QUA nếu cả 2 vertices đều trong loose_vertex_set
-            v1_idx, v2_idx = edge.vertices[0], edge.vertices[1]
-            if v1_idx in loose_vertex_set and v2_idx in loose_vertex_set:
-                continue  # Đã được thể hiện qua loose vertices
-            
-            # Nếu edge không có trong edge_face_count, nghĩa là không thuộc face nào
-            if edge_key not in edge_face_count:
-                v1_co = matrix @ me.vertices[v1_idx].co
-                v2_co = matrix @ me.vertices[v2_idx].co
-                self.loose_edges.append((v1_co, v2_co))
-        
-        # Classify faces
-        small_faces = set()
-        concave_faces = set()
-        
-        for poly in me.polygons:
-            if poly.hide:
-                continue
-            
-            # Check small faces (edge ratio)
-            if self._is_small_face(me, poly, matrix):
-                small_faces.add(poly.index)
-            
-            # Check concave faces (4+ vertices only)
-            elif len(poly.vertices) >= 4 and self._is_concave_face(me, poly, matrix):
-                concave_faces.add(poly.index)
-        
-        # Build triangle batches (priority: n-gon > concave face > small face)
-        for i, loop in enumerate(me.loop_triangles):
-            poly = me.polygons[me.loop_triangle_polygons[i].value]
-            if poly.hide:
-                continue
-            
-            tri = tuple(matrix @ me.vertices[j].co for j in loop.vertices)
-            
-            # Priority 1: N-gon (5+ vertices) - show as red
-            if len(poly.vertices) > 4:
-                self.ngon_tris.append(tri)
-            # Priority 2: Concave face - show as magenta
-            elif poly.index in concave_faces:
-                self.concave_faces_tris.append(tri)
-                if poly not in self.concave_faces:
-                    self.concave_faces.append(poly)
-            # Priority 3: Small face - show as blue
-            elif poly.index in small_faces:
-                self.small_faces_tris.append(tri)
-                if poly not in self.small_faces:
-                    self.small_faces.append(poly)
-        
-        # Count n-gons
-        self.ngons = [p for p in me.polygons if len(p.vertices) > 4 and not p.hide]
-    
-    def _is_small_face(self, me, poly, matrix):
-        '''Check if face has small edge ratio (min/max < threshold)'''
-        verts = poly.vertices
-        if len(verts) < 3:
-            return False
-        
-        # Get edge lengths
-        edge_lengths = []
-        for i in range(len(verts)):
-            v1 = matrix @ me.vertices[verts[i]].co
-            v2 = matrix @ me.vertices[verts[(i + 1) % len(verts)]].co
-            edge_lengths.append((v2 - v1).length)
-        
-        min_edge = min(edge_lengths)
-        max_edge = max(edge_lengths)
-        
-        if max_edge < 0.0001:
-            return False
+        if self._overlay is None or self._analyzer.arrays is None:
+            return
         
-        ratio = (min_edge / max_edge) * 100.0
-        return ratio < self.edge_ratio
+        # Object-space positions, index theo vertex của shared vertex buffer
+        self._results.upload(self._overlay)
     
-    def _is_concave_face(self, me, poly, matrix):
-        '''Check if face is concave (has any interior angle > 180 degrees)'''
-        n = len(poly.vertices)
-        if n < 4:
-            return False
-        
-        verts = [matrix @ me.vertices[i].co for i in poly.vertices]
-        
-        # Get polygon normal
-        poly_normal = (matrix.to_3x3() @ poly.normal).normalized()
-        
-        # Check each vertex for concavity using the sign of cross products
-        # For a convex polygon, all cross products should point in same direction as normal
-        positive_count = 0
-        negative_count = 0
+    def _start_analysis(self, obj, progressive=True, depsgraph=None):
+        '''Start an analysis pass; large meshes are time-sliced through bpy.app.timers'''
+        self._cancel_job()
+        if self._analyzer is None:
+            self.__class__._analyzer = IncrementalAnalyzer(ANALYSIS_CACHE)
+        
+        start_time = time.perf_counter()
+        me = obj.data
+        self.__class__._matrix = obj.matrix_world.copy()
+        if self.use_evaluated and self._evaluated is not None:
+            arrays = self._evaluated.get(obj, depsgraph or bpy.context.evaluated_depsgraph_get())
+        else:
+            arrays = MeshArrays(me)
+        job = self._analyzer.iter_update(arrays, self._matrix)
+        
+        cls = self.__class__
+        if not (progressive and self.progressive):
+            for _ in job:
+                pass
+            cls._job_cost = time.perf_counter() - start_time
+            self._finish_pass()
+            return
         
-        for i in range(n):
-            v0 = verts[i]
-            v1 = verts[(i + 1) % n]
-            v2 = verts[(i + 2) % n]
-            
-            # Get edges
-            edge1 = v1 - v0
-            edge2 = v2 - v1
-            
-            # Skip degenerate edges
-            if edge1.length < 0.0001 or edge2.length < 0.0001:
-                continue
-            
-            # Calculate cross product
-            cross = edge1.cross(edge2)
-            
-            # Check direction relative to polygon normal
-            dot_normal = cross.dot(poly_normal)
-            
-            # Count positive and negative orientations
-            if dot_normal > self.concave_threshold:
-                positive_count += 1
-            elif dot_normal < -self.concave_threshold:
-                negative_count += 1
+        # Bước đầu chạy đồng bộ: dirty region nhỏ sẽ xong ngay, không cần timer
+        progress = next(job, None)
+        cls._job_cost = time.perf_counter() - start_time
+        if progress is None:
+            self._finish_pass()
+            return
         
-        # Concave if we have both positive and negative orientations
-        # This means some vertices bend inward
-        return positive_count > 0 and negative_count > 0
+        cls._job = job
+        cls._job_progress = progress
+        bpy.app.timers.register(lambda: self._step_job(job), first_interval=0.0)
+    
+    def _step_job(self, job):
+        '''Timer callback: advance the in-flight pass for at most TIME_BUDGET seconds'''
+        cls = KHABIT_OT_AnalyzeCheck
+        if cls._job is not job:
+            return None  # Pass đã bị hủy (edit mới hoặc tắt analysis)
+        
+        start_time = time.perf_counter()
+        deadline = start_time + cls.TIME_BUDGET
+        try:
+            while time.perf_counter() < deadline:
+                cls._job_progress = next(job)
+        except StopIteration:
+            cls._job = None
+            cls._job_progress = 1.0
+        cls._job_cost += time.perf_counter() - start_time
+        
+        if cls._job is None:
+            self._finish_pass()
+        elif self._analyzer.arrays is not None:
+            # Pass đầu tiên còn đang ở bước topology → chưa có gì để vẽ
+            self._apply_results()
+        _tag_redraw_view3d()
+        return None if cls._job is None else 0.0
+    
+    def _finish_pass(self):
+        '''Publish results of a completed pass and record its cost for the scheduler'''
+        self._apply_results()
+        cls = self.__class__
+        cls._pass_cost = cls._job_cost
+        cls._last_pass_end = time.perf_counter()
+    
+    def _store_cache(self):
+        if self._analyzer is None or self._overlay is None:
+            return
+        stored = self._analyzer.store()
+        # Kết quả của evaluated mesh không thuộc về mesh gốc → chỉ giữ trong bộ nhớ
+        if stored is not None and self.cache_in_blend and not self.use_evaluated:
+            obj = bpy.data.objects.get(self._overlay.object_name)
+            if obj is not None:
+                ANALYSIS_CACHE.save_to_mesh(obj.data, *stored)
+    
+    @classmethod
+    def _cancel_job(cls):
+        if cls._job is not None:
+            cls._job.close()
+            cls._job = None
+            cls._job_progress = 1.0
+    
+    def _apply_results(self):
+        '''Push the analyzer state into the results container and overlay'''
+        cls = self.__class__
+        result = self._analyzer.categories(self.edge_ratio, self.concave_threshold)
+        results = AnalysisResults.from_arrays(self._analyzer.arrays, result)
+        
+        # OPTIMIZATION: Diff với baseline trên chính các index arrays (setdiff1d), không quét lại mesh
+        if cls._baseline is not None:
+            cls._diff = results.diff(cls._baseline['categories'])
+            results.highlight(cls._diff)
+        cls._results = results
+        self._update_drawing()
+    
+    def finish_analysis(self, obj):
+        '''Make the result index arrays match the edit mesh; returns the analyzed MeshArrays'''
+        cls = self.__class__
+        arrays = self._analyzer.arrays if self._analyzer is not None else None
+        
+        # Edit chưa được phân tích (pass đang chờ scheduler hoặc chạy dở, kể cả chỉ đổi tọa độ)
+        # hoặc số elements đã đổi → đồng bộ edit mesh và chạy nốt pass trước khi dùng index
+        # (evaluated mesh có số elements riêng, không so với edit mesh)
+        dirty = (self._job is not None or arrays is None or
+                 bpy.app.timers.is_registered(cls._scheduled_update) or
+                 cls._last_edit_time > cls._last_pass_end)
+        if not dirty and not self.use_evaluated:
+            bm = bmesh.from_edit_mesh(obj.data)
+            dirty = (len(arrays.co) != len(bm.verts) or len(arrays.edge_verts) != len(bm.edges) or
+                     len(arrays.face_start) != len(bm.faces))
+        if dirty:
+            if bpy.app.timers.is_registered(cls._scheduled_update):
+                bpy.app.timers.unregister(cls._scheduled_update)
+            obj.update_from_editmode()
+            self._start_analysis(obj, progressive=False)
+        return self._analyzer.arrays
+    
 
+# ========== SELECTION FROM ANALYSIS RESULTS ==========
+# OPTIMIZATION: Chọn trực tiếp từ index arrays của analysis, chỉ chạm vào elements được chọn
 
-class KHABIT_OT_SelectLooseVertices(bpy.types.Operator):
-    bl_idname = "keyhabit.select_loose_vertices"
-    bl_label = "Select Loose Vertices"
-    bl_description = "Select all loose vertices (vertices not connected to any face)"
+SELECT_CATEGORY_DOMAINS = {
+    'ngons': 'FACE',
+    'small_faces': 'FACE',
+    'concave_faces': 'FACE',
+    'degenerate_faces': 'FACE',
+    'boundary_edges': 'EDGE',
+    'loose_edges': 'EDGE',
+    'non_manifold_edges': 'EDGE',
+    'loose_vertices': 'VERT',
+    'non_manifold_vertices': 'VERT',
+}
+
+SELECT_CATEGORY_ITEMS = [
+    ('ngons', "N-gons", "Faces with more than 4 vertices"),
+    ('small_faces', "Small Faces", "Faces below the edge ratio threshold"),
+    ('concave_faces', "Concave Faces", "Faces above the concave threshold"),
+    ('degenerate_faces', "Degenerate Faces", "Zero-area faces, collapsed corners or zero-length edges"),
+    ('boundary_edges', "Boundary Edges", "Edges with only one face"),
+    ('loose_edges', "Loose Edges", "Edges not connected to any face"),
+    ('non_manifold_edges', "Non-Manifold Edges", "Edges with 3+ faces"),
+    ('loose_vertices', "Loose Vertices", "Vertices not connected to any face"),
+    ('non_manifold_vertices', "Non-Manifold Vertices", "Non-manifold vertices"),
+]
+
+_DOMAIN_ORDER = ('VERT', 'EDGE', 'FACE')
+
+
+def _category_vert_mask(arrays, indices, domain):
+    '''Vertices used by the elements of one category'''
+    mask = np.zeros(len(arrays.co), dtype=bool)
+    if domain == 'VERT':
+        mask[indices] = True
+    elif domain == 'EDGE':
+        mask[arrays.edge_verts[indices].ravel()] = True
+    else:
+        mask[FaceSubset(arrays, indices).loop_verts] = True
+    return mask
+
+
+def combine_categories(arrays, result, categories, mode='UNION'):
+    '''Combine category index arrays into {domain: bool mask}.
+    
+    Union keeps every category in its own domain. Intersection of categories
+    from different domains is taken on the vertices they use.
+    '''
+    domains = {SELECT_CATEGORY_DOMAINS[name] for name in categories}
+    if mode == 'INTERSECT' and len(domains) > 1:
+        return {'VERT': np.logical_and.reduce([
+            _category_vert_mask(arrays, result[name], SELECT_CATEGORY_DOMAINS[name])
+            for name in categories
+        ])}
+    
+    sizes = {'VERT': len(arrays.co), 'EDGE': len(arrays.edge_verts), 'FACE': len(arrays.face_start)}
+    masks = {}
+    for name in categories:
+        domain = SELECT_CATEGORY_DOMAINS[name]
+        mask = np.zeros(sizes[domain], dtype=bool)
+        mask[result[name]] = True
+        if domain not in masks:
+            masks[domain] = mask
+        elif mode == 'INTERSECT':
+            masks[domain] &= mask
+        else:
+            masks[domain] |= mask
+    return masks
+
+
+def select_elements(context, obj, arrays, masks, extend=False):
+    '''Apply {domain: bool mask} as the edit-mesh selection, staying in Edit Mode.
+    
+    Flags are flushed like Blender's select modes: down from faces/edges to their
+    edges/vertices, up from the lowest selected domain. Returns the number of
+    elements selected in that domain.
+    '''
+    me = obj.data
+    lowest = next((d for d in _DOMAIN_ORDER if d in masks), 'FACE')
+    vert = masks.get('VERT', np.zeros(len(arrays.co), dtype=bool)).copy()
+    edge = masks.get('EDGE', np.zeros(len(arrays.edge_verts), dtype=bool)).copy()
+    face = masks.get('FACE', np.zeros(len(arrays.face_start), dtype=bool)).copy()
+    count = int(np.count_nonzero({'VERT': vert, 'EDGE': edge, 'FACE': face}[lowest]))
+    
+    # Flush xuống: face → edges + vertices, edge → vertices
+    face_loops = face[arrays.loop_faces]
+    edge[arrays.loop_edges[face_loops]] = True
+    vert[arrays.loop_verts[face_loops]] = True
+    vert[arrays.edge_verts[edge].ravel()] = True
+    
+    # Flush lên từ domain thấp nhất (giống Vertex/Edge select mode)
+    if lowest == 'VERT':
+        edge |= vert[arrays.edge_verts].all(axis=1)
+    if lowest in ('VERT', 'EDGE') and len(face):
+        face |= np.logical_and.reduceat(edge[arrays.loop_edges], arrays.face_start)
+    
+    vert &= ~arrays.vert_hide
+    edge &= ~arrays.edge_hide
+    face &= ~arrays.face_hide
+    
+    context.tool_settings.mesh_select_mode = tuple(d == lowest for d in _DOMAIN_ORDER)
+    
+    # OPTIMIZATION: Ghi thẳng vào BMesh của edit mesh - không mode_set qua Object Mode
+    # (rebuild BMesh, thêm undo step, depsgraph update). Deselect bằng operator (C),
+    # rồi chỉ set flag cho index được chọn (flatnonzero) thay vì duyệt toàn bộ mesh
+    if not extend:
+        bpy.ops.mesh.select_all(action='DESELECT')
+    bm = bmesh.from_edit_mesh(me)
+    for seq, mask in ((bm.verts, vert), (bm.edges, edge), (bm.faces, face)):
+        seq.ensure_lookup_table()
+        for index in np.flatnonzero(mask).tolist():
+            seq[index].select = True
+    bmesh.update_edit_mesh(me, loop_triangles=False, destructive=False)
+    return count
+
+
+class _AnalysisSelectMixin:
+    '''Shared poll/selection for operators that select analysis categories'''
     bl_options = {'REGISTER', 'UNDO'}
     
     @classmethod
     def poll(cls, context):
-        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator
+        op = KHABIT_OT_AnalyzeCheck._operator
+        if op is not None and op.use_evaluated:
+            # Index của evaluated mesh không trùng với edit mesh
+            cls.poll_message_set("Not available while analyzing after modifiers")
+            return False
+        return context.mode == 'EDIT_MESH' and op is not None
     
-    def execute(self, context):
-        import bmesh
+    def select_categories(self, context, categories, mode='UNION', extend=False):
+        op = KHABIT_OT_AnalyzeCheck._operator
         obj = context.edit_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        
-        # Deselect all
-        for v in bm.verts:
-            v.select = False
-        
-        # Select loose vertices
-        for v in bm.verts:
-            if not v.hide and len(v.link_faces) == 0:
-                v.select = True
-        
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"Selected {len([v for v in bm.verts if v.select])} loose vertices")
+        arrays = op.finish_analysis(obj)
+        masks = combine_categories(arrays, op._results, categories, mode)
+        return select_elements(context, obj, arrays, masks, extend)
+
+
+class _SelectCategoryOperator(_AnalysisSelectMixin):
+    '''One-click select of a single analysis category'''
+    category = ''
+    
+    def execute(self, context):
+        count = self.select_categories(context, [self.category])
+        label = dict(item[:2] for item in SELECT_CATEGORY_ITEMS)[self.category]
+        self.report({'INFO'}, f"Selected {count} {label.lower()}")
         return {'FINISHED'}
 
 
-class KHABIT_OT_SelectLooseEdges(bpy.types.Operator):
+class KHABIT_OT_SelectLooseVertices(_SelectCategoryOperator, bpy.types.Operator):
+    bl_idname = "keyhabit.select_loose_vertices"
+    bl_label = "Select Loose Vertices"
+    bl_description = "Select all loose vertices (vertices not connected to any face)"
+    category = 'loose_vertices'
+
+
+class KHABIT_OT_SelectLooseEdges(_SelectCategoryOperator, bpy.types.Operator):
     bl_idname = "keyhabit.select_loose_edges"
     bl_label = "Select Loose Edges"
     bl_description = "Select all loose edges (edges not connected to any face)"
-    bl_options = {'REGISTER', 'UNDO'}
-    
-    @classmethod
-    def poll(cls, context):
-        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator
-    
-    def execute(self, context):
-        import bmesh
-        obj = context.edit_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        
-        # Deselect all
-        for e in bm.edges:
-            e.select = False
-        
-        # Select loose edges
-        for e in bm.edges:
-            if not e.hide and len(e.link_faces) == 0:
-                e.select = True
-        
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"Selected {len([e for e in bm.edges if e.select])} loose edges")
-        return {'FINISHED'}
+    category = 'loose_edges'
 
 
-class KHABIT_OT_SelectBoundaryEdges(bpy.types.Operator):
+class KHABIT_OT_SelectBoundaryEdges(_SelectCategoryOperator, bpy.types.Operator):
     bl_idname = "keyhabit.select_boundary_edges"
     bl_label = "Select Boundary Edges"
     bl_description = "Select all boundary edges (edges with only one face)"
-    bl_options = {'REGISTER', 'UNDO'}
-    
-    @classmethod
-    def poll(cls, context):
-        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator
-    
-    def execute(self, context):
-        import bmesh
-        obj = context.edit_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        
-        # Deselect all
-        for e in bm.edges:
-            e.select = False
-        
-        # Select boundary edges
-        for e in bm.edges:
-            if not e.hide and e.is_boundary:
-                e.select = True
-        
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"Selected {len([e for e in bm.edges if e.select])} boundary edges")
-        return {'FINISHED'}
+    category = 'boundary_edges'
 
 
-class KHABIT_OT_SelectNgons(bpy.types.Operator):
+class KHABIT_OT_SelectNgons(_SelectCategoryOperator, bpy.types.Operator):
     bl_idname = "keyhabit.select_ngons"
     bl_label = "Select N-gons"
     bl_description = "Select all n-gons (faces with more than 4 vertices)"
-    bl_options = {'REGISTER', 'UNDO'}
-    
-    @classmethod
-    def poll(cls, context):
-        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator
-    
-    def execute(self, context):
-        import bmesh
-        obj = context.edit_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        
-        # Deselect all
-        for f in bm.faces:
-            f.select = False
-        
-        # Select n-gons
-        count = 0
-        for f in bm.faces:
-            if not f.hide and len(f.verts) > 4:
-                f.select = True
-                count += 1
-        
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"Selected {count} n-gons")
-        return {'FINISHED'}
+    category = 'ngons'
 
 
-class KHABIT_OT_SelectSmallFaces(bpy.types.Operator):
+class KHABIT_OT_SelectSmallFaces(_SelectCategoryOperator, bpy.types.Operator):
     bl_idname = "keyhabit.select_small_faces"
     bl_label = "Select Small Faces"
     bl_description = "Select all small faces detected by analysis"
-    bl_options = {'REGISTER', 'UNDO'}
+    category = 'small_faces'
+
+
+class KHABIT_OT_SelectConcaveFaces(_SelectCategoryOperator, bpy.types.Operator):
+    bl_idname = "keyhabit.select_concave_faces"
+    bl_label = "Select Concave Faces"
+    bl_description = "Select all concave faces detected by analysis"
+    category = 'concave_faces'
+
+
+class KHABIT_OT_SelectNonManifoldVertices(_SelectCategoryOperator, bpy.types.Operator):
+    bl_idname = "keyhabit.select_non_manifold_vertices"
+    bl_label = "Select Non-Manifold Vertices"
+    bl_description = "Select all non-manifold vertices"
+    category = 'non_manifold_vertices'
+
+
+class KHABIT_OT_SelectNonManifoldEdges(_SelectCategoryOperator, bpy.types.Operator):
+    bl_idname = "keyhabit.select_non_manifold_edges"
+    bl_label = "Select Non-Manifold Edges"
+    bl_description = "Select all non-manifold edges (3+ faces)"
+    category = 'non_manifold_edges'
+
+
+class KHABIT_OT_SelectAnalysis(_AnalysisSelectMixin, bpy.types.Operator):
+    bl_idname = "keyhabit.select_analysis"
+    bl_label = "Select Analysis Categories"
+    bl_description = "Select the union or intersection of several analysis categories"
     
-    @classmethod
-    def poll(cls, context):
-        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator
+    categories: bpy.props.EnumProperty(
+        name="Categories",
+        items=SELECT_CATEGORY_ITEMS,
+        options={'ENUM_FLAG'},
+        default={'ngons'},
+    )
+    
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=[
+            ('UNION', "Union", "Elements in any of the categories"),
+            ('INTERSECT', "Intersection", "Elements in every category (vertices when domains differ)"),
+        ],
+        default='UNION',
+    )
+    
+    extend: bpy.props.BoolProperty(
+        name="Extend",
+        description="Add to the current selection instead of replacing it",
+        default=False,
+    )
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
     
     def execute(self, context):
-        import bmesh
-        obj = context.edit_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        
-        # Deselect all
-        for v in bm.verts:
-            v.select = False
-        for e in bm.edges:
-            e.select = False
-        for f in bm.faces:
-            f.select = False
-        
-        # Get operator
-        op = KHABIT_OT_AnalyzeCheck._operator
-        if not op:
+        if not self.categories:
+            self.report({'WARNING'}, "No category chosen")
             return {'CANCELLED'}
         
-        # Select small faces
-        for face in op.small_faces:
-            bm.faces[face.index].select = True
-        
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"Selected {len(op.small_faces)} small faces")
+        # Giữ thứ tự của SELECT_CATEGORY_ITEMS
+        categories = [item[0] for item in SELECT_CATEGORY_ITEMS if item[0] in self.categories]
+        count = self.select_categories(context, categories, self.mode, self.extend)
+        self.report({'INFO'}, f"Selected {count} elements")
         return {'FINISHED'}
 
 
-class KHABIT_OT_SelectConcaveFaces(bpy.types.Operator):
-    bl_idname = "keyhabit.select_concave_faces"
-    bl_label = "Select Concave Faces"
-    bl_description = "Select all concave faces detected by analysis"
-    bl_options = {'REGISTER', 'UNDO'}
+# ========== ANALYSIS REPORTS (EXPORT / DIFF) ==========
+# Report = counts + index arrays (int32, zlib + base64) theo category → diff giữa các revision
+# chỉ là setdiff1d trên các arrays đã sort, tức thì kể cả với mesh lớn
+
+REPORT_VERSION = 1
+
+REPORT_LABELS = dict(item[:2] for item in SELECT_CATEGORY_ITEMS)
+REPORT_LABELS['degenerate_face_edges'] = "Degenerate Face Edges"
+
+
+def analysis_report(results, arrays, **meta):
+    '''JSON-ready report of an analysis: element counts, content hash and per-category indices'''
+    report = {
+        'version': REPORT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'elements': {
+            'vertices': len(arrays.co),
+            'edges': len(arrays.edge_verts),
+            'faces': len(arrays.face_start),
+        },
+        'content_hash': mesh_content_hash(arrays),
+        'categories': {
+            name: {
+                'domain': AnalysisResults.DOMAINS[name],
+                'count': results.count(name),
+                'indices': _pack_array(results[name]),
+            }
+            for name in AnalysisResults.REPORT_CATEGORIES
+        },
+    }
+    report.update(meta)
+    return report
+
+
+def write_analysis_report(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def read_analysis_report(path):
+    '''Load a report; returns (report dict, {category: sorted int32 indices})'''
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    if report.get('version') != REPORT_VERSION:
+        raise ValueError(f"unsupported report version {report.get('version')}")
+    
+    categories = {}
+    for name, data in report['categories'].items():
+        indices = _unpack_array(data['indices'], np.int32)
+        if len(indices) != data['count']:
+            raise ValueError(f"category '{name}' has {len(indices)} indices, expected {data['count']}")
+        categories[name] = indices
+    return report, categories
+
+
+class _AnalysisReportMixin:
+    '''Shared poll for report operators (needs a running Analyze Check)'''
     
     @classmethod
     def poll(cls, context):
-        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator
+        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator is not None
+
+
+class KHABIT_OT_ExportAnalysisReport(_AnalysisReportMixin, bpy.types.Operator, ExportHelper):
+    bl_idname = "keyhabit.export_analysis_report"
+    bl_label = "Export Analysis Report"
+    bl_description = "Save the current analysis (counts and element indices per category) as a JSON report"
+    bl_options = {'REGISTER'}
+    
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
     
     def execute(self, context):
-        import bmesh
+        op = KHABIT_OT_AnalyzeCheck._operator
         obj = context.edit_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        
-        # Deselect all
-        for v in bm.verts:
-            v.select = False
-        for e in bm.edges:
-            e.select = False
-        for f in bm.faces:
-            f.select = False
+        arrays = op.finish_analysis(obj)
+        report = analysis_report(
+            op._results, arrays,
+            object=obj.name, mesh=obj.data.name, file=bpy.data.filepath,
+            evaluated=op.use_evaluated, edge_ratio=op.edge_ratio, concave_threshold=op.concave_threshold,
+        )
+        write_analysis_report(self.filepath, report)
         
-        # Get operator
-        op = KHABIT_OT_AnalyzeCheck._operator
-        if not op:
+        total = sum(data['count'] for data in report['categories'].values())
+        self.report({'INFO'}, f"Saved report ({total} flagged elements) → {self.filepath}")
+        return {'FINISHED'}
+
+
+class KHABIT_OT_DiffAnalysisReport(_AnalysisReportMixin, bpy.types.Operator, ImportHelper):
+    bl_idname = "keyhabit.diff_analysis_report"
+    bl_label = "Compare with Report"
+    bl_description = "Highlight problems that are not in a stored baseline report (new since that revision)"
+    bl_options = {'REGISTER'}
+    
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+    
+    def execute(self, context):
+        try:
+            report, categories = read_analysis_report(self.filepath)
+        except (OSError, ValueError, KeyError, TypeError, zlib.error) as e:
+            self.report({'ERROR'}, f"Cannot read report: {e}")
             return {'CANCELLED'}
         
-        # Select concave faces
-        for face in op.concave_faces:
-            bm.faces[face.index].select = True
-        
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"Selected {len(op.concave_faces)} concave faces")
+        op = KHABIT_OT_AnalyzeCheck._operator
+        obj = context.edit_object
+        arrays = op.finish_analysis(obj)
+        
+        elements = report.get('elements', {})
+        current = {'vertices': len(arrays.co), 'edges': len(arrays.edge_verts), 'faces': len(arrays.face_start)}
+        if elements != current:
+            # Topology đổi → index có thể đã dịch chuyển, diff chỉ mang tính tham khảo
+            self.report({'WARNING'}, "Element counts differ from the baseline, indices may not correspond")
+        elif bool(report.get('evaluated')) != op.use_evaluated:
+            self.report({'WARNING'}, "Baseline was analyzed with a different After Modifiers setting")
+        
+        KHABIT_OT_AnalyzeCheck._baseline = {
+            'name': os.path.basename(self.filepath),
+            'categories': categories,
+            'elements': elements,
+        }
+        op._apply_results()
+        context.area.tag_redraw()
+        
+        introduced = sum(len(indices) for indices in op._diff.values())
+        self.report({'INFO'}, f"{introduced} new problem elements vs {KHABIT_OT_AnalyzeCheck._baseline['name']}")
         return {'FINISHED'}
 
 
-class KHABIT_OT_SelectNonManifoldVertices(bpy.types.Operator):
-    bl_idname = "keyhabit.select_non_manifold_vertices"
-    bl_label = "Select Non-Manifold Vertices"
-    bl_description = "Select all non-manifold vertices"
-    bl_options = {'REGISTER', 'UNDO'}
+class KHABIT_OT_ClearAnalysisDiff(bpy.types.Operator):
+    bl_idname = "keyhabit.clear_analysis_diff"
+    bl_label = "Clear Comparison"
+    bl_description = "Stop comparing with the baseline report"
+    bl_options = {'REGISTER'}
     
     @classmethod
     def poll(cls, context):
-        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator
+        return KHABIT_OT_AnalyzeCheck._baseline is not None
     
     def execute(self, context):
-        import bmesh
-        obj = context.edit_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        
-        # Deselect all
-        for v in bm.verts:
-            v.select = False
-        for e in bm.edges:
-            e.select = False
-        for f in bm.faces:
-            f.select = False
-        
-        # Switch to vertex selection mode (required for select_non_manifold)
-        bpy.context.tool_settings.mesh_select_mode = (True, False, False)
-        
-        # Select using Blender's built-in non-manifold select
-        bpy.ops.mesh.select_non_manifold(
-            extend=False,
-            use_wire=True,
-            use_boundary=False,
-            use_multi_face=True,
-            use_non_contiguous=True,
-            use_verts=True
-        )
-        
-        count = len([v for v in bm.verts if v.select])
-        self.report({'INFO'}, f"Selected {count} non-manifold vertices")
+        KHABIT_OT_AnalyzeCheck._baseline = None
+        KHABIT_OT_AnalyzeCheck._diff = None
+        op = KHABIT_OT_AnalyzeCheck._operator
+        if op is not None and op._analyzer is not None and op._analyzer.arrays is not None:
+            op._apply_results()
+        context.area.tag_redraw()
         return {'FINISHED'}
 
 
-class KHABIT_OT_SelectNonManifoldEdges(bpy.types.Operator):
-    bl_idname = "keyhabit.select_non_manifold_edges"
-    bl_label = "Select Non-Manifold Edges"
-    bl_description = "Select all non-manifold edges (3+ faces)"
-    bl_options = {'REGISTER', 'UNDO'}
+class KHABIT_OT_SelectAnalysisDiff(_AnalysisSelectMixin, bpy.types.Operator):
+    bl_idname = "keyhabit.select_analysis_diff"
+    bl_label = "Select New Problems"
+    bl_description = "Select elements flagged now that were not flagged in the baseline report"
     
     @classmethod
     def poll(cls, context):
-        return context.mode == 'EDIT_MESH' and KHABIT_OT_AnalyzeCheck._operator
+        return super().poll(context) and KHABIT_OT_AnalyzeCheck._diff is not None
     
     def execute(self, context):
-        import bmesh
+        op = KHABIT_OT_AnalyzeCheck._operator
         obj = context.edit_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        
-        # Deselect all
-        for v in bm.verts:
-            v.select = False
-        for e in bm.edges:
-            e.select = False
-        for f in bm.faces:
-            f.select = False
-        
-        # Select non-manifold edges (3+ faces)
-        count = 0
-        for edge in bm.edges:
-            if not edge.hide and len(edge.link_faces) >= 3:
-                edge.select = True
-                count += 1
-        
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"Selected {count} non-manifold edges")
+        arrays = op.finish_analysis(obj)
+        categories = [name for name in SELECT_CATEGORY_DOMAINS if len(op._diff[name])]
+        if not categories:
+            self.report({'INFO'}, "No new problems")
+            return {'CANCELLED'}
+        
+        masks = combine_categories(arrays, op._diff, categories)
+        count = select_elements(context, obj, arrays, masks)
+        self.report({'INFO'}, f"Selected {count} new problem elements")
         return {'FINISHED'}
 
 
@@ -923,17 +1978,53 @@ class KHABIT_PT_AnalysisPanel(bpy.types.Panel):
         else:
             # Active analysis controls
             layout.operator("keyhabit.analyze_check", text="Stop Analysis", icon='PAUSE')
+            if op._job is not None:
+                layout.progress(factor=op._job_progress, type='BAR',
+                                text=f"Analyzing... {op._job_progress * 100.0:.0f}%")
+            elif op._analyzer is not None and op._analyzer.last_cache_hit:
+                layout.label(text="Loaded from cache", icon='FILE_CACHE')
+            row = layout.row(align=True)
+            row.prop(op, "progressive")
+            row.prop(op, "cache_in_blend")
+            layout.prop(op, "use_evaluated", icon='MODIFIER')
+            row = layout.row(align=True)
+            row.prop(op, "occlusion", icon='HIDE_ON')
+            if op.occlusion and op._overlay is not None:
+                if op._overlay.occlusion_pending:
+                    row.label(text="Counting hidden...")
+                else:
+                    prefix = "~" if op._overlay.occlusion.estimated else ""
+                    row.label(text=f"Hidden: {prefix}{op._overlay.hidden_count}")
+            
+            # Thời gian pass gần nhất và interval scheduler đang dùng
+            if op._analyzer is not None and op._job is None:
+                analyzer = op._analyzer
+                if analyzer.last_cache_hit:
+                    kind = "cache"
+                elif analyzer.last_full_rebuild:
+                    kind = "full"
+                else:
+                    kind = f"{analyzer.last_dirty_faces} faces"
+                col = layout.column(align=True)
+                col.label(text=f"Last pass: {op._pass_cost * 1000.0:.1f} ms ({kind})", icon='TIME')
+                mode = "after edits stop" if op.is_debounced() else "while editing"
+                col.label(text=f"Update every {op.update_interval() * 1000.0:.0f} ms, {mode}")
+                if op._overlay is not None:
+                    drawn, culled, merged = op._overlay.stats
+                    col.label(text=f"Overlay chunks: {drawn} drawn, {culled} culled, {merged} merged")
             
             layout.separator()
             
             box = layout.box()
             box.label(text="Detection Settings:", icon='SETTINGS')
             
+            results = op._results
+            
             # Small Face Settings
             col = box.column(align=True)
             col.label(text="Small Face Detection:")
             col.prop(op, "edge_ratio", slider=True)
-            col.label(text=f"Found: {len(op.small_faces)} faces", icon='INFO')
+            col.label(text=f"Found: {results.count('small_faces')} faces", icon='INFO')
             
             # Separator
             col.separator()
@@ -941,7 +2032,7 @@ class KHABIT_PT_AnalysisPanel(bpy.types.Panel):
             # Concave Face Settings
             col.label(text="Concave Face Detection:")
             col.prop(op, "concave_threshold", slider=True)
-            col.label(text=f"Found: {len(op.concave_faces)} faces", icon='INFO')
+            col.label(text=f"Found: {results.count('concave_faces')} faces", icon='INFO')
             
             # Separator
             box.separator()
@@ -953,50 +2044,319 @@ class KHABIT_PT_AnalysisPanel(bpy.types.Panel):
             # ========== TOPOLOGY ISSUES ==========
             # N-gons
             row = box2.row(align=True)
-            row.label(text=f"N-gons: {len(op.ngons)}", icon='MESH_DATA')
-            if len(op.ngons) > 0:
+            row.label(text=f"N-gons: {results.count('ngons')}", icon='MESH_DATA')
+            if results.count('ngons') > 0:
                 row.operator("keyhabit.select_ngons", text="", icon='RESTRICT_SELECT_OFF')
             
             # Small Faces
             row = box2.row(align=True)
-            row.label(text=f"Small Faces: {len(op.small_faces)}", icon='MESH_DATA')
-            if len(op.small_faces) > 0:
+            row.label(text=f"Small Faces: {results.count('small_faces')}", icon='MESH_DATA')
+            if results.count('small_faces') > 0:
                 row.operator("keyhabit.select_small_faces", text="", icon='RESTRICT_SELECT_OFF')
             
             # Concave Faces
             row = box2.row(align=True)
-            row.label(text=f"Concave Faces: {len(op.concave_faces)}", icon='MESH_DATA')
-            if len(op.concave_faces) > 0:
+            row.label(text=f"Concave Faces: {results.count('concave_faces')}", icon='MESH_DATA')
+            if results.count('concave_faces') > 0:
                 row.operator("keyhabit.select_concave_faces", text="", icon='RESTRICT_SELECT_OFF')
             
             # Boundary Edges
             row = box2.row(align=True)
-            row.label(text=f"Boundary Edges: {len(op.boundary_edges)}", icon='EDGESEL')
-            if len(op.boundary_edges) > 0:
+            row.label(text=f"Boundary Edges: {results.count('boundary_edges')}", icon='EDGESEL')
+            if results.count('boundary_edges') > 0:
                 row.operator("keyhabit.select_boundary_edges", text="", icon='RESTRICT_SELECT_OFF')
             
             # Non-Manifold (chỉ hiển thị vertices để tránh lỗi selection mode)
-            if len(op.non_manifold_vertices) > 0:
+            if results.count('non_manifold_vertices') > 0:
                 row = box2.row(align=True)
-                row.label(text=f"Non-Manifold Verts: {len(op.non_manifold_vertices)}", icon='VERTEXSEL')
+                row.label(text=f"Non-Manifold Verts: {results.count('non_manifold_vertices')}", icon='VERTEXSEL')
                 row.operator("keyhabit.select_non_manifold_vertices", text="", icon='RESTRICT_SELECT_OFF')
             
             # ========== LOOSE GEOMETRY (Cyan) ==========
-            if len(op.loose_edges) > 0 or len(op.loose_vertices) > 0:
+            if results.count('loose_edges') > 0 or results.count('loose_vertices') > 0:
                 box2.separator()
                 box2.label(text="Loose Geometry:", icon='INFO')
             
             # Loose Edges
-            if len(op.loose_edges) > 0:
+            if results.count('loose_edges') > 0:
                 row = box2.row(align=True)
-                row.label(text=f"  Loose Edges: {len(op.loose_edges)}", icon='EDGESEL')
+                row.label(text=f"  Loose Edges: {results.count('loose_edges')}", icon='EDGESEL')
                 row.operator("keyhabit.select_loose_edges", text="", icon='RESTRICT_SELECT_OFF')
             
             # Loose Vertices
-            if len(op.loose_vertices) > 0:
+            if results.count('loose_vertices') > 0:
                 row = box2.row(align=True)
-                row.label(text=f"  Loose Vertices: {len(op.loose_vertices)}", icon='VERTEXSEL')
+                row.label(text=f"  Loose Vertices: {results.count('loose_vertices')}", icon='VERTEXSEL')
                 row.operator("keyhabit.select_loose_vertices", text="", icon='RESTRICT_SELECT_OFF')
+            
+            box2.separator()
+            box2.operator("keyhabit.select_analysis", text="Select Categories...", icon='SELECT_EXTEND')
+            
+            # ========== REVISION REPORTS ==========
+            box3 = layout.box()
+            box3.label(text="Revision Report:", icon='FILE_TICK')
+            row = box3.row(align=True)
+            row.operator("keyhabit.export_analysis_report", text="Export", icon='EXPORT')
+            row.operator("keyhabit.diff_analysis_report", text="Compare", icon='IMPORT')
+            
+            if op._baseline is not None and op._diff is not None:
+                row = box3.row(align=True)
+                row.label(text=f"vs {op._baseline['name']}", icon='FILE')
+                row.operator("keyhabit.clear_analysis_diff", text="", icon='X')
+                
+                new_counts = [(name, len(indices)) for name, indices in op._diff.items() if len(indices)]
+                if not new_counts:
+                    box3.label(text="No new problems", icon='CHECKMARK')
+                for name, count in new_counts:
+                    box3.label(text=f"  New {REPORT_LABELS[name]}: {count}", icon='ERROR')
+                if new_counts:
+                    box3.operator("keyhabit.select_analysis_diff", text="Select New Problems",
+                                  icon='RESTRICT_SELECT_OFF')
+
+
+# ========== BATCH ANALYSIS (MULTI-OBJECT / SCENE) ==========
+
+BATCH_COUNT_KEYS = ('ngons', 'non_manifold', 'degenerate', 'loose', 'small', 'concave')
+
+
+def category_counts(result):
+    '''Per-object problem counts shown in the batch table'''
+    return {
+        'ngons': len(result['ngons']),
+        'non_manifold': len(result['non_manifold_vertices']),
+        'degenerate': len(result['degenerate_faces']),
+        'loose': len(result['loose_edges']) + len(result['loose_vertices']),
+        'small': len(result['small_faces']),
+        'concave': len(result['concave_faces']),
+    }
+
+
+def snapshot_object_arrays(obj, depsgraph, use_evaluated):
+    '''Read the MeshArrays of an object on the main thread'''
+    if obj.mode == 'EDIT':
+        obj.update_from_editmode()
+    if not use_evaluated:
+        return MeshArrays(obj.data)
+    
+    eval_obj = obj.evaluated_get(depsgraph)
+    me = eval_obj.to_mesh()
+    try:
+        return MeshArrays(me)
+    finally:
+        eval_obj.to_mesh_clear()
+
+
+class KHABIT_AnalysisBatchItem(bpy.types.PropertyGroup):
+    # name (built-in) = tên object
+    ngons: bpy.props.IntProperty(name="N-gons")
+    non_manifold: bpy.props.IntProperty(name="Non-Manifold")
+    degenerate: bpy.props.IntProperty(name="Degenerate")
+    loose: bpy.props.IntProperty(name="Loose")
+    small: bpy.props.IntProperty(name="Small")
+    concave: bpy.props.IntProperty(name="Concave")
+    total: bpy.props.IntProperty(name="Total")
+
+
+class KHABIT_AnalysisBatchProperties(bpy.types.PropertyGroup):
+    items: bpy.props.CollectionProperty(type=KHABIT_AnalysisBatchItem)
+    active_index: bpy.props.IntProperty(default=0)
+    
+    scope: bpy.props.EnumProperty(
+        name="Scope",
+        items=[
+            ('SCENE', "Scene", "All mesh objects in the scene"),
+            ('COLLECTION', "Collection", "All mesh objects in a collection (including children)"),
+            ('SELECTED', "Selected", "Selected mesh objects"),
+        ],
+        default='SCENE',
+    )
+    collection: bpy.props.PointerProperty(name="Collection", type=bpy.types.Collection)
+    use_evaluated: bpy.props.BoolProperty(
+        name="Evaluated Mesh",
+        description="Analyze meshes after modifiers (depsgraph-evaluated)",
+        default=True,
+    )
+    sort_key: bpy.props.EnumProperty(
+        name="Sort By",
+        items=[
+            ('total', "Total", "Sort by total problem count"),
+            ('ngons', "N-gons", ""),
+            ('non_manifold', "Non-Manifold", ""),
+            ('degenerate', "Degenerate", ""),
+            ('loose', "Loose", ""),
+            ('small', "Small", ""),
+            ('concave', "Concave", ""),
+            ('name', "Name", "Sort by object name"),
+        ],
+        default='total',
+    )
+
+
+class KHABIT_OT_AnalyzeBatch(bpy.types.Operator):
+    bl_idname = "keyhabit.analyze_batch"
+    bl_label = "Batch Mesh Analysis"
+    bl_description = "Analyze every mesh in the scene / collection / selection and list problem counts per object"
+    bl_options = {'REGISTER'}
+    
+    edge_ratio: bpy.props.FloatProperty(
+        name="Edge Ratio", default=1.0, min=0.1, max=50.0, precision=1, subtype='PERCENTAGE',
+    )
+    concave_threshold: bpy.props.FloatProperty(
+        name="Concave Threshold", default=0.1, min=0.01, max=1.0, precision=2,
+    )
+    
+    def _collect_objects(self, context, props):
+        if props.scope == 'COLLECTION':
+            objects = props.collection.all_objects if props.collection else []
+        elif props.scope == 'SELECTED':
+            objects = context.selected_objects
+        else:
+            objects = context.scene.objects
+        return [obj for obj in objects if obj.type == 'MESH']
+    
+    def execute(self, context):
+        from concurrent.futures import ThreadPoolExecutor
+        
+        props = context.scene.khb_analysis_batch
+        objects = self._collect_objects(context, props)
+        if not objects:
+            self.report({'WARNING'}, "No mesh objects to analyze")
+            return {'CANCELLED'}
+        
+        depsgraph = context.evaluated_depsgraph_get()
+        wm = context.window_manager
+        wm.progress_begin(0, len(objects))
+        start_time = time.perf_counter()
+        
+        # bpy chỉ đọc được trên main thread → snapshot arrays tuần tự,
+        # phần NumPy (nhả GIL) của các objects chạy song song trong thread pool
+        futures = []
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            for i, obj in enumerate(objects):
+                arrays = snapshot_object_arrays(obj, depsgraph, props.use_evaluated)
+                futures.append((obj.name, pool.submit(
+                    analyze_mesh_arrays, arrays, obj.matrix_world.copy(),
+                    self.edge_ratio, self.concave_threshold,
+                )))
+                wm.progress_update(i)
+            results = [(name, category_counts(future.result())) for name, future in futures]
+        wm.progress_end()
+        
+        props.items.clear()
+        for name, counts in results:
+            item = props.items.add()
+            item.name = name
+            for key, value in counts.items():
+                setattr(item, key, value)
+            item.total = sum(counts.values())
+        
+        problems = sum(1 for _, counts in results if any(counts.values()))
+        self.report({'INFO'}, f"Analyzed {len(results)} objects in {time.perf_counter() - start_time:.2f}s "
+                              f"({problems} with problems)")
+        return {'FINISHED'}
+
+
+class KHABIT_OT_AnalysisBatchJump(bpy.types.Operator):
+    bl_idname = "keyhabit.analysis_batch_jump"
+    bl_label = "Inspect Object"
+    bl_description = "Open the object in Edit Mode with the Mesh Analysis overlay"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    object_name: bpy.props.StringProperty()
+    
+    def execute(self, context):
+        obj = context.scene.objects.get(self.object_name)
+        if obj is None or obj.type != 'MESH':
+            self.report({'ERROR'}, f"Object '{self.object_name}' not found")
+            return {'CANCELLED'}
+        
+        # Tắt analysis đang chạy trên object khác (invoke là toggle)
+        if KHABIT_OT_AnalyzeCheck._operator:
+            KHABIT_OT_AnalyzeCheck._operator.end(context)
+        
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        for selected in context.selected_objects:
+            selected.select_set(False)
+        obj.select_set(True)
+        context.view_layer.objects.active = obj
+        bpy.ops.object.mode_set(mode='EDIT')
+        
+        # Frame object trong viewport (operator được gọi từ sidebar → cần WINDOW region)
+        region = next((r for r in context.area.regions if r.type == 'WINDOW'), None)
+        if region is not None:
+            with context.temp_override(region=region):
+                bpy.ops.view3d.view_selected()
+        
+        bpy.ops.keyhabit.analyze_check('INVOKE_DEFAULT')
+        return {'FINISHED'}
+
+
+class KHABIT_UL_AnalysisBatch(bpy.types.UIList):
+    '''Per-object problem table, sortable by any count column'''
+    
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        split = layout.split(factor=0.4, align=True)
+        op = split.operator("keyhabit.analysis_batch_jump", text=item.name,
+                            icon='ERROR' if item.total else 'CHECKMARK', emboss=False)
+        op.object_name = item.name
+        row = split.row(align=True)
+        for key in BATCH_COUNT_KEYS:
+            value = getattr(item, key)
+            col = row.column()
+            col.alert = value > 0
+            col.label(text=str(value))
+    
+    def filter_items(self, context, data, propname):
+        items = getattr(data, propname)
+        helper = bpy.types.UI_UL_list
+        
+        if self.filter_name:
+            flt_flags = helper.filter_items_by_name(self.filter_name, self.bitflag_filter_item, items, "name")
+        else:
+            flt_flags = [self.bitflag_filter_item] * len(items)
+        
+        key = data.sort_key
+        if key == 'name':
+            flt_neworder = helper.sort_items_by_name(items, "name")
+        else:
+            flt_neworder = helper.sort_items_helper(
+                [(i, getattr(item, key)) for i, item in enumerate(items)],
+                key=lambda pair: pair[1], reverse=True,
+            )
+        return flt_flags, flt_neworder
+
+
+class KHABIT_PT_AnalysisBatchPanel(bpy.types.Panel):
+    '''Panel for multi-object Mesh Analysis'''
+    bl_label = "Batch Mesh Analysis"
+    bl_idname = "KHABIT_PT_analysis_batch_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "KeyHabit"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw(self, context):
+        layout = self.layout
+        props = context.scene.khb_analysis_batch
+        
+        col = layout.column(align=True)
+        col.prop(props, "scope", expand=True)
+        if props.scope == 'COLLECTION':
+            col.prop(props, "collection", text="")
+        col.prop(props, "use_evaluated")
+        layout.operator("keyhabit.analyze_batch", text="Analyze Objects", icon='VIEWZOOM')
+        
+        if not props.items:
+            return
+        
+        layout.prop(props, "sort_key")
+        header = layout.split(factor=0.4, align=True)
+        header.label(text="Object")
+        row = header.row(align=True)
+        for label in ("Ng", "NM", "Dg", "Ls", "Sm", "Cc"):
+            row.column().label(text=label)
+        layout.template_list("KHABIT_UL_AnalysisBatch", "", props, "items", props, "active_index", rows=8)
 
 
 # Register
@@ -1010,12 +2370,37 @@ def register():
     bpy.utils.register_class(KHABIT_OT_SelectConcaveFaces)
     bpy.utils.register_class(KHABIT_OT_SelectNonManifoldVertices)
     bpy.utils.register_class(KHABIT_OT_SelectNonManifoldEdges)
+    bpy.utils.register_class(KHABIT_OT_SelectAnalysis)
+    bpy.utils.register_class(KHABIT_OT_ExportAnalysisReport)
+    bpy.utils.register_class(KHABIT_OT_DiffAnalysisReport)
+    bpy.utils.register_class(KHABIT_OT_ClearAnalysisDiff)
+    bpy.utils.register_class(KHABIT_OT_SelectAnalysisDiff)
     bpy.utils.register_class(KHABIT_PT_AnalysisPanel)
+    bpy.utils.register_class(KHABIT_AnalysisBatchItem)
+    bpy.utils.register_class(KHABIT_AnalysisBatchProperties)
+    bpy.utils.register_class(KHABIT_OT_AnalyzeBatch)
+    bpy.utils.register_class(KHABIT_OT_AnalysisBatchJump)
+    bpy.utils.register_class(KHABIT_UL_AnalysisBatch)
+    bpy.utils.register_class(KHABIT_PT_AnalysisBatchPanel)
+    bpy.types.Scene.khb_analysis_batch = bpy.props.PointerProperty(type=KHABIT_AnalysisBatchProperties)
 
 
 def unregister():
     try:
+        if hasattr(bpy.types.Scene, 'khb_analysis_batch'):
+            del bpy.types.Scene.khb_analysis_batch
+        bpy.utils.unregister_class(KHABIT_PT_AnalysisBatchPanel)
+        bpy.utils.unregister_class(KHABIT_UL_AnalysisBatch)
+        bpy.utils.unregister_class(KHABIT_OT_AnalysisBatchJump)
+        bpy.utils.unregister_class(KHABIT_OT_AnalyzeBatch)
+        bpy.utils.unregister_class(KHABIT_AnalysisBatchProperties)
+        bpy.utils.unregister_class(KHABIT_AnalysisBatchItem)
         bpy.utils.unregister_class(KHABIT_PT_AnalysisPanel)
+        bpy.utils.unregister_class(KHABIT_OT_SelectAnalysisDiff)
+        bpy.utils.unregister_class(KHABIT_OT_ClearAnalysisDiff)
+        bpy.utils.unregister_class(KHABIT_OT_DiffAnalysisReport)
+        bpy.utils.unregister_class(KHABIT_OT_ExportAnalysisReport)
+        bpy.utils.unregister_class(KHABIT_OT_SelectAnalysis)
         bpy.utils.unregister_class(KHABIT_OT_SelectNonManifoldEdges)
         bpy.utils.unregister_class(KHABIT_OT_SelectNonManifoldVertices)
         bpy.utils.unregister_class(KHABIT_OT_SelectConcaveFaces)
@@ -0,0 +1,364 @@
+# KHB_Benchmark.py - KeyHabit Mesh Analysis Benchmark
+# Đo thời gian từng stage của KHB_Analysis trên mesh sinh tự động (grid, cube, n-gon fan, defects)
+#
+# Chạy trong Blender (background):
+#   blender -b --factory-startup --python KHB_Benchmark.py -- --output bench.json
+#   blender -b --factory-startup --python KHB_Benchmark.py -- --sizes 1000 100000 --meshes grid defects
+#
+# So sánh với kết quả cũ (exit code 1 nếu có stage chậm hơn --tolerance):
+#   blender -b --factory-startup --python KHB_Benchmark.py -- --output new.json --compare old.json
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000, 2000000)
+DEFAULT_EDGE_RATIO = 1.0
+DEFAULT_CONCAVE_THRESHOLD = 0.1
+
+
+# ========== SYNTHETIC MESH GENERATORS ==========
+# Mỗi generator trả về (co, face_size, loop_verts) - đủ để tạo mesh bằng foreach_set
+
+def _grid_side(faces):
+    return max(1, int(round(np.sqrt(faces))))
+
+
+def generate_grid(faces, seed=0):
+    '''Flat quad grid with slightly jittered vertices (~faces quads)'''
+    n = _grid_side(faces)
+    rng = np.random.default_rng(seed)
+    y, x = np.divmod(np.arange((n + 1) * (n + 1)), n + 1)
+    co = np.column_stack((x, y, np.zeros_like(x))).astype(np.float32)
+    co[:, :2] += rng.normal(0.0, 0.05, (len(co), 2)).astype(np.float32)
+
+    fy, fx = np.divmod(np.arange(n * n), n)
+    v0 = fy * (n + 1) + fx
+    loop_verts = np.column_stack((v0, v0 + 1, v0 + n + 2, v0 + n + 1)).ravel()
+    return co, np.full(n * n, 4, dtype=np.int32), loop_verts.astype(np.int32)
+
+
+def generate_cube(faces, seed=0):
+    '''Closed subdivided cube (~faces quads over 6 sides), outward winding'''
+    k = _grid_side(faces / 6)
+    j, i = np.divmod(np.arange(k * k), k)
+    quad = np.array([(0, 0), (1, 0), (1, 1), (0, 1)])
+    corners = []
+    for axis in range(3):
+        u_axis, v_axis = (axis + 1) % 3, (axis + 2) % 3
+        for side in (0, k):
+            p = np.zeros((k * k, 4, 3), dtype=np.int64)
+            p[:, :, axis] = side
+            p[:, :, u_axis] = i[:, None] + quad[:, 0]
+            p[:, :, v_axis] = j[:, None] + quad[:, 1]
+            # (u, v, axis) là hệ thuận → normal hướng +axis; mặt side=0 phải đảo chiều
+            corners.append(p[:, ::-1] if side == 0 else p)
+
+    # Lattice points chung giữa các mặt → np.unique (trên key int64) gộp thành một vertex
+    p = np.concatenate(corners).reshape(-1, 3)
+    keys, loop_verts = np.unique((p[:, 0] * (k + 1) + p[:, 1]) * (k + 1) + p[:, 2], return_inverse=True)
+    z = keys % (k + 1)
+    y = keys // (k + 1) % (k + 1)
+    x = keys // (k + 1) ** 2
+    co = (np.column_stack((x, y, z)) / k - 0.5).astype(np.float32)
+    return co, np.full(len(loop_verts) // 4, 4, dtype=np.int32), loop_verts.ravel().astype(np.int32)
+
+
+def generate_ngon_fan(faces, seed=0, wedges=8, arc=4):
+    '''Disks split into n-gon wedges around a hub vertex (faces of arc + 2 corners)'''
+    cells = max(1, faces // wedges)
+    n = int(np.ceil(np.sqrt(cells)))
+    ring = wedges * arc
+
+    angle = np.arange(ring) * (2.0 * np.pi / ring)
+    cell = np.arange(cells)
+    offset = np.column_stack((cell % n, cell // n, np.zeros(cells))) * 2.5
+    rim = (offset[:, None, :] + np.column_stack((np.cos(angle), np.sin(angle), np.zeros(ring)))).reshape(-1, 3)
+    co = np.concatenate((offset, rim)).astype(np.float32)
+
+    # Wedge w của cell c: hub, rim[w*arc .. w*arc + arc] (điểm cuối chung với wedge kế tiếp)
+    w = np.arange(wedges)
+    rim_idx = (w[:, None] * arc + np.arange(arc + 1)) % ring
+    rim_idx = cells + cell[:, None, None] * ring + rim_idx
+    hub_idx = np.broadcast_to(cell[:, None, None], (cells, wedges, 1))
+    loop_verts = np.concatenate((hub_idx, rim_idx), axis=2).ravel()
+    return co, np.full(cells * wedges, arc + 2, dtype=np.int32), loop_verts.astype(np.int32)
+
+
+def inject_defects(mesh, rate=0.01, seed=0):
+    '''Add non-manifold fins, bow-ties and collapsed (degenerate) edges to a quad mesh'''
+    co, face_size, loop_verts = mesh
+    rng = np.random.default_rng(seed)
+    n_faces = len(face_size)
+    face_start = np.cumsum(face_size) - face_size
+    count = max(1, int(n_faces * rate))
+    co = co.copy()
+
+    # Degenerate: kéo vertex thứ 2 của face trùng vertex đầu → zero-length edge
+    picked = rng.choice(n_faces, count, replace=False)
+    co[loop_verts[face_start[picked] + 1]] = co[loop_verts[face_start[picked]]]
+
+    # Non-manifold: thêm fin (triangle) lên edge đầu của face → edge có 3+ faces
+    picked = rng.choice(n_faces, count, replace=False)
+    a, b = loop_verts[face_start[picked]], loop_verts[face_start[picked] + 1]
+    tip = (co[a] + co[b]) * 0.5 + np.array((0.0, 0.0, 1.0), dtype=np.float32)
+    tip_idx = len(co) + np.arange(count)
+    fins = np.column_stack((a, b, tip_idx)).ravel()
+
+    # Bow-tie: triangle mới chỉ chạm mesh tại 1 vertex → 2 fans rời nhau
+    picked = rng.choice(n_faces, count, replace=False)
+    apex = loop_verts[face_start[picked]]
+    wing = co[apex] + np.array((-0.3, -0.3, 0.5), dtype=np.float32)
+    wing_idx = len(co) + count + np.arange(count) * 2
+    bowties = np.column_stack((apex, wing_idx, wing_idx + 1)).ravel()
+    wings = np.stack((wing, wing + np.array((0.2, -0.1, 0.0), dtype=np.float32)), axis=1).reshape(-1, 3)
+
+    return (
+        np.concatenate((co, tip, wings)).astype(np.float32),
+        np.concatenate((face_size, np.full(2 * count, 3, dtype=np.int32))),
+        np.concatenate((loop_verts, fins, bowties)).astype(np.int32),
+    )
+
+
+GENERATORS = {
+    'grid': generate_grid,
+    'cube': generate_cube,
+    'ngon_fan': generate_ngon_fan,
+    'defects': lambda faces, seed=0: inject_defects(generate_grid(faces, seed), seed=seed),
+}
+
+
+def create_mesh(name, co, face_size, loop_verts):
+    '''Build a bpy mesh from flat arrays with foreach_set (no from_pydata overhead)'''
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(len(co))
+    me.vertices.foreach_set("co", co.ravel())
+    me.loops.add(len(loop_verts))
+    me.loops.foreach_set("vertex_index", loop_verts)
+    me.polygons.add(len(face_size))
+    me.polygons.foreach_set("loop_start", (np.cumsum(face_size) - face_size).astype(np.int32))
+    me.update(calc_edges=True)
+    return me
+
+
+# ========== STAGE TIMING ==========
+
+def _import_analysis():
+    '''Import KHB_Analysis without running the addon __init__ (Display needs a GPU context)'''
+    addon_dir = os.path.dirname(os.path.abspath(__file__))
+    package = types.ModuleType("_khb_benchmark_addon")
+    package.__path__ = [addon_dir]
+    sys.modules[package.__name__] = package
+    return importlib.import_module(f"{package.__name__}.KHB_Analysis")
+
+
+def _stages(analysis, me, matrix, edge_ratio, concave_threshold):
+    '''(state, [(stage name, callable)]) in pipeline order; each stage feeds the next via state'''
+    state = {}
+
+    def read():
+        state['arrays'] = analysis.MeshArrays(me)
+
+    def content_hash():
+        analysis.mesh_content_hash(state['arrays'])
+
+    def topology():
+        state['topology'] = analysis.analyze_topology(state['arrays'])
+
+    def corners():
+        arrays = state['arrays']
+        state['co'] = arrays.co[arrays.loop_verts].astype(np.float64)
+        state['world'] = analysis._to_world(state['co'], matrix)
+
+    def degenerate():
+        state['degenerate'] = analysis._degenerate_faces(state['arrays'], state['co'], state['world'])
+
+    def edge_ratio_stage():
+        state['ratio'] = analysis._edge_ratio(state['arrays'], state['world'])
+
+    def concavity():
+        state['concavity'] = analysis._concavity(state['arrays'], state['world'], matrix)
+
+    def categories():
+        small, concave = analysis.classify_faces(state['ratio'], state['concavity'], edge_ratio, concave_threshold)
+        state['categories'] = analysis.build_categories(
+            state['arrays'], state['topology'], state['degenerate'], small, concave,
+        )
+
+    def results():
+        state['results'] = analysis.AnalysisResults.from_arrays(state['arrays'], state['categories'])
+
+    def full():
+        analysis.analyze_mesh_arrays(state['arrays'], matrix, edge_ratio, concave_threshold)
+
+    return state, [
+        ('read', read),
+        ('content_hash', content_hash),
+        ('topology', topology),
+        ('corners', corners),
+        ('degenerate', degenerate),
+        ('edge_ratio', edge_ratio_stage),
+        ('concavity', concavity),
+        ('categories', categories),
+        ('results', results),
+        ('full', full),
+    ]
+
+
+def benchmark_mesh(analysis, me, matrix, repeat, edge_ratio, concave_threshold):
+    '''Best-of-repeat seconds and tracemalloc peak bytes for every stage'''
+    seconds = {}
+    for _ in range(repeat):
+        _, stages = _stages(analysis, me, matrix, edge_ratio, concave_threshold)
+        for name, stage in stages:
+            start_time = time.perf_counter()
+            stage()
+            elapsed = time.perf_counter() - start_time
+            seconds[name] = min(seconds.get(name, elapsed), elapsed)
+
+    # Đo memory ở pass riêng: tracemalloc làm chậm allocations nên không lẫn vào timing
+    peak = {}
+    state, stages = _stages(analysis, me, matrix, edge_ratio, concave_threshold)
+    tracemalloc.start()
+    try:
+        for name, stage in stages:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            stage()
+            peak[name] = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+    counts = analysis.category_counts(state['categories'])
+    return {name: round(value, 6) for name, value in seconds.items()}, peak, counts
+
+
+def _peak_rss():
+    '''Process peak resident memory in bytes (None nếu platform không hỗ trợ)'''
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+# ========== RUNNER ==========
+
+def compare_runs(current, baseline, tolerance):
+    '''Stage regressions (> tolerance slower) of current vs a baseline report'''
+    previous = {(r['mesh'], r['target_faces']): r for r in baseline['runs']}
+    regressions = []
+    for run in current['runs']:
+        old = previous.get((run['mesh'], run['target_faces']))
+        if old is None:
+            continue
+        for stage, seconds in run['seconds'].items():
+            old_seconds = old['seconds'].get(stage)
+            if not old_seconds:
+                continue
+            ratio = seconds / old_seconds
+            print(f"  {run['mesh']:>9} {run['target_faces']:>8} {stage:<13} "
+                  f"{old_seconds * 1000:9.2f} ms → {seconds * 1000:9.2f} ms  x{ratio:.2f}")
+            if ratio > 1.0 + tolerance:
+                regressions.append({'mesh': run['mesh'], 'target_faces': run['target_faces'],
+                                    'stage': stage, 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def run_in_blender(argv):
+    parser = argparse.ArgumentParser(prog="KHB_Benchmark.py (blender)")
+    parser.add_argument("--output", default="khb_benchmark.json", help="JSON report path")
+    parser.add_argument("--sizes", type=int, nargs='+', default=list(DEFAULT_SIZES), help="Target face counts")
+    parser.add_argument("--meshes", nargs='+', choices=sorted(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per mesh (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--edge-ratio", type=float, default=DEFAULT_EDGE_RATIO)
+    parser.add_argument("--concave-threshold", type=float, default=DEFAULT_CONCAVE_THRESHOLD)
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown ratio per stage")
+    args = parser.parse_args(argv)
+
+    from mathutils import Matrix
+    analysis = _import_analysis()
+    matrix = Matrix.Diagonal((1.0, 2.0, 1.0, 1.0))  # scale không đều → world ≠ object space
+
+    report = {
+        'version': 1,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'blender': bpy.app.version_string,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'parameters': {'repeat': args.repeat, 'edge_ratio': args.edge_ratio,
+                       'concave_threshold': args.concave_threshold, 'matrix': 'diag(1, 2, 1)'},
+        'runs': [],
+    }
+
+    for mesh_name in args.meshes:
+        for target in args.sizes:
+            start_time = time.perf_counter()
+            co, face_size, loop_verts = GENERATORS[mesh_name](target, seed=args.seed)
+            me = create_mesh(f"KHB_Benchmark_{mesh_name}_{target}", co, face_size, loop_verts)
+            build_seconds = time.perf_counter() - start_time
+            try:
+                seconds, peak, counts = benchmark_mesh(
+                    analysis, me, matrix, args.repeat, args.edge_ratio, args.concave_threshold,
+                )
+            finally:
+                bpy.data.meshes.remove(me)
+
+            report['runs'].append({
+                'mesh': mesh_name,
+                'target_faces': target,
+                'faces': len(face_size),
+                'vertices': len(co),
+                'loops': len(loop_verts),
+                'build_seconds': round(build_seconds, 4),
+                'seconds': seconds,
+                'peak_bytes': peak,
+                'counts': counts,
+            })
+            print(f"KHB_Benchmark: {mesh_name:>9} {len(face_size):>8} faces  "
+                  f"full {seconds['full'] * 1000:9.2f} ms  peak {max(peak.values()) / 2**20:8.1f} MB")
+
+    report['peak_rss_bytes'] = _peak_rss()
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"KHB_Benchmark: compare with {args.compare}")
+        report['regressions'] = compare_runs(report, baseline, args.tolerance)
+        for r in report['regressions']:
+            print(f"  REGRESSION {r['mesh']} {r['target_faces']} {r['stage']}: x{r['ratio']}")
+        status = 1 if report['regressions'] else 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"KHB_Benchmark: {len(report['runs'])} runs → {args.output}")
+    return status
+
+
+if __name__ == "__main__":
+    if bpy is None:
+        print("KHB_Benchmark.py must run inside Blender:\n"
+              "  blender -b --factory-startup --python KHB_Benchmark.py -- --output bench.json")
+        sys.exit(2)
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(run_in_blender(argv))
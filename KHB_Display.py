@@ -3,10 +3,12 @@
 
 import bpy
 from bpy.types import GizmoGroup, Operator
-from mathutils import Vector
+from mathutils import Matrix, Vector
 import blf
 import math
+from collections import OrderedDict
 import gpu
+import numpy as np
 from gpu_extras.batch import batch_for_shader
 
 # Import KHB_Analysis for button state checking
@@ -98,6 +100,20 @@ CUSTOM_ICON_BY_MOD = {
 
 FALLBACK_ICON_PATH = os.path.join(get_icon_path(), 'blender_icon_question.png')
 
+# Mapping overlay button -> tên file icon PNG (cũng được pack vào icon atlas)
+BUTTON_ICON_BY_NAME = {
+    'All Modifiers'   : 'blender_icon_modifier_data.png',
+    'Subdivision'     : 'blender_icon_mod_subsurf.png',
+    'Wireframe'       : 'blender_icon_mod_wireframe.png',
+    'Edge Length'     : 'blender_icon_driver_distance.png',
+    'Split Normals'   : 'blender_icon_mod_normaledit.png',
+    'Shading Data'    : 'blender_icon_mod_smooth.png',
+    'Retopology'      : 'blender_icon_mod_lineart.png',
+    'Transform Origin': 'blender_icon_transform_origins.png',
+    'Mesh Analysis'   : 'blender_icon_ghost_enabled.png',
+    'Analyze Check'   : 'blender_icon_ghost_disabled.png',
+}
+
 # Emoji legacy để so sánh khi cần (fallback UI test)
 _EMOJI_BY_MOD = {
     'ARRAY':'📦', 'BEVEL':'💎', 'BOOLEAN':'🔀', 'MIRROR':'🪞', 'SUBSURF':'🌊', 'SOLIDIFY':'📦',
@@ -113,132 +129,186 @@ _EMOJI_BY_MOD = {
 
 # ==== GPU SHADER + TEXTURE VẼ ICON ====
 _image_shader = gpu.shader.from_builtin('IMAGE')
+_color_shader = gpu.shader.from_builtin('UNIFORM_COLOR')
 
 # ==== VẼ KHUNG CHO TEXT ====
 def draw_text_background(x, y, text_width, text_height, padding=4, bg_color=(0.1, 0.1, 0.1, 0.8)):
     """Vẽ khung nền cho text với padding"""
-    import gpu
-    from gpu_extras.batch import batch_for_shader
-    
-    # Tính kích thước khung
-    frame_x = x - padding
-    frame_y = y - padding
-    frame_w = text_width + padding * 2
-    frame_h = text_height + padding * 2
-    
-    # Tạo vertices cho khung
-    vertices = (
-        (frame_x, frame_y),
-        (frame_x + frame_w, frame_y),
-        (frame_x + frame_w, frame_y + frame_h),
-        (frame_x, frame_y + frame_h)
-    )
-    
-    # Tạo batch và vẽ
-    shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-    batch = batch_for_shader(shader, 'TRI_FAN', {"pos": vertices})
-    
-    gpu.state.blend_set('ALPHA')
-    shader.bind()
-    shader.uniform_float("color", bg_color)
-    batch.draw(shader)
-    gpu.state.blend_set('NONE')
+    draw_rect(x - padding, y - padding, text_width + padding * 2, text_height + padding * 2, bg_color)
+
+# ==== ICON ATLAS ====
+# OPTIMIZATION: Tất cả icon PNG được pack vào 1 GPUTexture (timer sau register, không build trong draw),
+# mỗi frame chỉ vẽ 1 batch quad UV-mapped cho toàn bộ icon (không phụ thuộc số modifier/viewport)
+ICON_ATLAS_GUTTER = 1  # viền trong suốt giữa các ô (px), tránh bleed khi sampler filter linear
+ICON_ATLAS_RETRY_MAX = 30.0  # giây chờ tối đa giữa các lần build lại khi lỗi
+
+def _atlas_icon_paths():
+    '''Every PNG the overlay can draw: modifier icons, button icons and the fallback'''
+    names = set(CUSTOM_ICON_BY_MOD.values()) | set(BUTTON_ICON_BY_NAME.values())
+    names.add(os.path.basename(FALLBACK_ICON_PATH))
+    return sorted(os.path.join(get_icon_path(), name) for name in names)
+
+def _srgb_to_linear(rgb):
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+def _read_png_pixels(icon_path):
+    '''Load PNG qua bpy.data.images → (w, h, float32 RGBA linear), xóa image tạm ngay sau khi đọc'''
+    image = bpy.data.images.load(icon_path, check_existing=False)
+    try:
+        w, h = image.size
+        pixels = np.empty(w * h * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        pixels = pixels.reshape(h, w, 4)
+        # image.pixels của PNG 8-bit là giá trị sRGB (chưa decode), texture float được shader coi là
+        # linear → decode trước khi upload (như gpu.texture.from_image), nếu không icon sẽ bị bạc màu
+        if not image.is_float and image.colorspace_settings.name == 'sRGB':
+            pixels[..., :3] = _srgb_to_linear(pixels[..., :3])
+        return w, h, pixels
+    finally:
+        bpy.data.images.remove(image)
+
+class IconAtlas:
+    '''All overlay icons packed into one GPUTexture, looked up by file path'''
+
+    def __init__(self):
+        self.texture = None
+        self.uv_rects = {}  # icon_path -> (u0, v0, u1, v1)
+        self.failures = 0   # số lần build lỗi liên tiếp → giãn thời gian thử lại
+
+    def build(self, icon_paths):
+        '''Pack the icons into one texture; True only if the texture was created'''
+        self.texture = None
+        self.uv_rects.clear()
+        icons = []
+        for icon_path in icon_paths:
+            if not os.path.exists(icon_path):
+                print(f"Icon file not found: {icon_path}")
+                continue
+            try:
+                icons.append((icon_path, *_read_png_pixels(icon_path)))
+            except Exception as e:
+                print(f"Error loading icon {icon_path}: {e}")
+        if not icons:
+            return False
+
+        # Lưới ô vuông đều nhau, ô = icon lớn nhất + gutter 2 bên
+        cell = max(max(w, h) for _, w, h, _ in icons) + 2 * ICON_ATLAS_GUTTER
+        cols = math.ceil(math.sqrt(len(icons)))
+        rows = math.ceil(len(icons) / cols)
+        width, height = cols * cell, rows * cell
+        pixels = np.zeros((height, width, 4), dtype=np.float32)
+        for i, (icon_path, w, h, icon) in enumerate(icons):
+            x0 = (i % cols) * cell + ICON_ATLAS_GUTTER
+            y0 = (i // cols) * cell + ICON_ATLAS_GUTTER
+            pixels[y0:y0 + h, x0:x0 + w] = icon
+            # UV ở tâm texel biên để không lấy màu từ gutter/ô bên cạnh
+            self.uv_rects[icon_path] = (
+                (x0 + 0.5) / width, (y0 + 0.5) / height,
+                (x0 + w - 0.5) / width, (y0 + h - 0.5) / height,
+            )
+
+        try:
+            buf = gpu.types.Buffer('FLOAT', pixels.size, pixels.ravel())
+            self.texture = gpu.types.GPUTexture((width, height), format='RGBA16F', data=buf)
+        except Exception as e:
+            print(f"Error creating icon atlas: {e}")
+            self.uv_rects.clear()
+            return False
+        return True
+
+    def free(self):
+        self.texture = None
+        self.uv_rects.clear()
+        self.failures = 0
+
+_icon_atlas = IconAtlas()
+
+# Quad icon của frame hiện tại: (icon_path, x, y, w, h) → vẽ 1 lần ở flush_icon_quads()
+_icon_quads = []
+# OPTIMIZATION: Giữ batch của frame trước - overlay tĩnh / nhiều viewport cùng layout dùng lại batch
+_icon_batch_cache = {'key': None, 'batch': None}
+
+def _build_icon_atlas():
+    '''Timer: build the atlas outside drawing, retrying with backoff after a failure'''
+    atlas = _icon_atlas
+    if atlas.texture is not None:
+        return None
+    if atlas.build(_atlas_icon_paths()):
+        atlas.failures = 0
+        tag_redraw_all_view3d()  # Overlay đang vẽ không có icon → vẽ lại với atlas
+        return None
+    atlas.failures += 1
+    return min(2.0 ** atlas.failures, ICON_ATLAS_RETRY_MAX)
+
+def icon_atlas_ready():
+    return _icon_atlas.texture is not None
+
+def queue_icon(icon_path, x, y, w, h):
+    '''Queue one atlas icon quad; returns False if the icon is not in the atlas'''
+    if icon_path not in _icon_atlas.uv_rects:
+        return False
+    _icon_quads.append((icon_path, x, y, w, h))
+    return True
+
+def flush_icon_quads():
+    '''Draw every queued icon quad with a single batch'''
+    if not _icon_quads:
+        return
+    key = tuple(_icon_quads)
+    _icon_quads.clear()
+    if _icon_atlas.texture is None:
+        return
+
+    if _icon_batch_cache['key'] != key:
+        pos, uv = [], []
+        for icon_path, x, y, w, h in key:
+            u0, v0, u1, v1 = _icon_atlas.uv_rects[icon_path]
+            pos.extend(((x, y), (x + w, y), (x + w, y + h), (x, y), (x + w, y + h), (x, y + h)))
+            uv.extend(((u0, v0), (u1, v0), (u1, v1), (u0, v0), (u1, v1), (u0, v1)))
+        _icon_batch_cache['batch'] = batch_for_shader(_image_shader, 'TRIS', {"pos": pos, "texCoord": uv})
+        _icon_batch_cache['key'] = key
 
-def _draw_texture(tex, x, y, w, h):
-    if tex is None:
-        return 0
-    
-    pos = ((x, y), (x + w, y), (x + w, y + h), (x, y + h))
-    uv  = ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0))
-    batch = batch_for_shader(_image_shader, 'TRI_FAN', {"pos": pos, "texCoord": uv})
     gpu.state.blend_set('ALPHA')
     _image_shader.bind()
-    
-    try:
-        # Thử bind texture
-        if hasattr(tex, 'bind'):
-            tex.bind(0)
-            _image_shader.uniform_sampler("image", tex)
-        else:
-            # Fallback: sử dụng image trực tiếp
-            _image_shader.uniform_sampler("image", tex)
-    except Exception as e:
-        print(f"Error binding texture: {e}")
-        gpu.state.blend_set('NONE')
-        return 0
-    
-    batch.draw(_image_shader)
+    _image_shader.uniform_sampler("image", _icon_atlas.texture)
+    _icon_batch_cache['batch'].draw(_image_shader)
     gpu.state.blend_set('NONE')
-    return w
-
-# Load PNG icon từ file
-def _load_png_icon(icon_path):
-    """Load PNG icon từ file path"""
-    try:
-        import bpy
-        # Load image từ file
-        image = bpy.data.images.load(icon_path)
-        # Tạo GPUTexture từ image
-        if hasattr(gpu, 'texture') and hasattr(gpu.texture, 'from_image'):
-            return gpu.texture.from_image(image)
-        else:
-            # Fallback: sử dụng image trực tiếp
-            return image
-    except Exception as e:
-        print(f"Error loading icon {icon_path}: {e}")
-    return None
-
-# OPTIMIZATION: Cache modifier icons để không load lại mỗi frame
-_modifier_icon_cache = {}
 
 # OPTIMIZATION: Cache modifier state để không loop modifiers mỗi frame
 _modifier_state_cache = {
     'object_name': None,
-    'modifiers_hash': None,
+    'dirty': True,     # Chỉ bật lại bởi msgbus/depsgraph handler khi stack thực sự thay đổi
     'all_modifiers_on': False,
     'subdivision_on': False,
-    'last_update_time': 0.0
 }
-_CACHE_UPDATE_INTERVAL = 0.5  # Update cache tối đa 2 lần/giây (tối ưu cho hiệu suất)
 
 # OPTIMIZATION: Cache modifier text để không tạo text list mỗi frame
 _modifier_text_cache = {
     'object_name': None,
-    'modifiers_hash': None,
-    'text_lines': [],  # List of (mod_index, text_chunks)
-    'last_update_time': 0.0
+    'dirty': True,
+    'text_lines': [],  # List of (mod_type, text_chunks)
+    'dependencies': set(),  # Tên object mà text tham chiếu (Boolean object, Mirror object...)
+    'version': 0,      # Tăng khi nội dung text thực sự thay đổi → overlay offscreen render lại
 }
 
+# Thuộc tính modifier trỏ tới object khác - đổi tên object đó thì text phải build lại
+_MODIFIER_OBJECT_ATTRS = ('object', 'mirror_object', 'target', 'offset_object', 'start_cap', 'end_cap')
+
+def _needs_rebuild(cache, obj):
+    return cache.get('dirty', True) or cache.get('object_name') != obj.name
+
 def _update_modifier_state_cache(obj):
-    """Update modifier state cache - chỉ gọi khi cần thiết"""
+    """Update modifier state cache - chỉ khi bị đánh dấu dirty hoặc đổi object"""
     global _modifier_state_cache
-    import time
-    
-    current_time = time.time()
     
-    # Kiểm tra xem có cần update không
     if obj is None or not hasattr(obj, 'modifiers'):
         _modifier_state_cache['object_name'] = None
         return
     
-    # Tạo hash từ modifiers để detect thay đổi
-    mod_hash = hash((
-        obj.name,
-        len(obj.modifiers),
-        tuple((m.type, m.show_viewport, getattr(m, 'levels', 0)) for m in obj.modifiers)
-    ))
-    
-    # Nếu object hoặc modifiers thay đổi, hoặc đã quá lâu → update
-    need_update = (
-        _modifier_state_cache['object_name'] != obj.name or
-        _modifier_state_cache['modifiers_hash'] != mod_hash or
-        (current_time - _modifier_state_cache['last_update_time']) > _CACHE_UPDATE_INTERVAL
-    )
-    
-    if need_update:
+    if _needs_rebuild(_modifier_state_cache, obj):
         # Update cache
         _modifier_state_cache['object_name'] = obj.name
-        _modifier_state_cache['modifiers_hash'] = mod_hash
+        _modifier_state_cache['dirty'] = False
         _modifier_state_cache['all_modifiers_on'] = any(mod.show_viewport for mod in obj.modifiers) if obj.modifiers else False
         
         # Check subdivision
@@ -248,7 +318,6 @@ def _update_modifier_state_cache(obj):
                 subdivision_on = True
                 break
         _modifier_state_cache['subdivision_on'] = subdivision_on
-        _modifier_state_cache['last_update_time'] = current_time
 
 def _get_cached_modifier_state(obj, state_name):
     """Lấy modifier state từ cache"""
@@ -261,52 +330,33 @@ def _get_cached_modifier_state(obj, state_name):
     return _modifier_state_cache.get(state_name, False)
 
 def _update_modifier_text_cache(obj):
-    """Update modifier text cache - chỉ gọi khi cần thiết"""
+    """Update modifier text cache - chỉ khi bị đánh dấu dirty hoặc đổi object"""
     global _modifier_text_cache
-    import time
-    
-    current_time = time.time()
     
     if obj is None or not hasattr(obj, 'modifiers'):
         _modifier_text_cache['object_name'] = None
         _modifier_text_cache['text_lines'] = []
+        _modifier_text_cache['dependencies'] = set()
         return
     
-    # Tạo hash chi tiết từ modifiers (bao gồm cả properties)
-    mod_hash = hash((
-        obj.name,
-        len(obj.modifiers),
-        tuple((
-            m.name,
-            m.type,
-            m.show_viewport,
-            m.show_render,
-            m.show_in_editmode,
-            m.show_on_cage,
-            getattr(m, 'levels', None),
-            getattr(m, 'render_levels', None),
-        ) for m in obj.modifiers)
-    ))
-    
-    # Chỉ update khi cần
-    need_update = (
-        _modifier_text_cache.get('object_name') != obj.name or
-        _modifier_text_cache.get('modifiers_hash') != mod_hash or
-        (current_time - _modifier_text_cache.get('last_update_time', 0.0)) > _CACHE_UPDATE_INTERVAL
-    )
-    
-    if need_update:
+    if _needs_rebuild(_modifier_text_cache, obj):
         # Update cache
         _modifier_text_cache['object_name'] = obj.name
-        _modifier_text_cache['modifiers_hash'] = mod_hash
-        _modifier_text_cache['text_lines'] = []
+        _modifier_text_cache['dirty'] = False
+        _modifier_text_cache['dependencies'] = {
+            target.name
+            for mod in obj.modifiers
+            for target in (getattr(mod, attr, None) for attr in _MODIFIER_OBJECT_ATTRS)
+            if isinstance(target, bpy.types.Object)
+        }
         
         # Build text lines cho mỗi modifier
-        for mod in obj.modifiers:
-            text_chunks = get_modifier_line(mod)
-            _modifier_text_cache['text_lines'].append((mod, text_chunks))
-        
-        _modifier_text_cache['last_update_time'] = current_time
+        text_lines = [(mod.type, get_modifier_line(mod)) for mod in obj.modifiers]
+        if _modifier_profiler['enabled']:
+            text_lines = _with_modifier_timings(obj, text_lines)
+        if text_lines != _modifier_text_cache.get('text_lines'):
+            _modifier_text_cache['text_lines'] = text_lines
+            _modifier_text_cache['version'] = _modifier_text_cache.get('version', 0) + 1
 
 def _get_cached_modifier_text_lines(obj):
     """Lấy modifier text lines từ cache"""
@@ -318,34 +368,14 @@ def _get_cached_modifier_text_lines(obj):
     # Return cached lines
     return _modifier_text_cache.get('text_lines', [])
 
-# Lấy texture icon từ loại modifier bằng mapping CUSTOM_ICON_BY_MOD
-def _get_icon_texture_for_mod(mod_type):
-    # OPTIMIZATION: Check cache trước
-    if mod_type in _modifier_icon_cache:
-        return _modifier_icon_cache[mod_type]
-    
-    icon_filename = CUSTOM_ICON_BY_MOD.get(mod_type, 'blender_icon_question.png')
-    icon_path = os.path.join(get_icon_path(), icon_filename)
-    
-    # Kiểm tra file tồn tại
-    if not os.path.exists(icon_path):
-        print(f"Icon file not found: {icon_path}")
-        icon_path = FALLBACK_ICON_PATH
-    
-    # Load và cache
-    texture = _load_png_icon(icon_path)
-    _modifier_icon_cache[mod_type] = texture
-    return texture
-
 # Vẽ icon modifier: Sử dụng icon PNG từ thư mục icons, fallback emoji nếu không load được
 # Trả về width để canh chữ an toàn.
 def draw_modifier_icon(font_id, x, y, mod_type, icon_size=ICON_SIZE_PX):
     if not USE_EMOJI_ICONS:
-        tex = _get_icon_texture_for_mod(mod_type)
-        if tex is not None:
-            w = int(icon_size)
-            h = int(icon_size)
-            _draw_texture(tex, x, y, w, h)
+        # Icon được queue vào batch atlas, vẽ cùng lúc ở cuối frame
+        w = int(icon_size)
+        icon_path = os.path.join(get_icon_path(), CUSTOM_ICON_BY_MOD.get(mod_type, 'blender_icon_question.png'))
+        if queue_icon(icon_path, x, y, w, w) or queue_icon(FALLBACK_ICON_PATH, x, y, w, w):
             return w
     # Fallback emoji
     emoji = _EMOJI_BY_MOD.get(mod_type, '🔧')
@@ -476,6 +506,129 @@ def get_modifier_line(mod):
 
 # ================== DRAW OVERLAY ==================
 
+def _draw_modifier_lines(font_id, lines, x, y, lh):
+    '''Draw icon + text chunks per modifier, the last modifier at the bottom line'''
+    for mod_type, tc in reversed(lines):
+        cx = x
+        icon_w = draw_modifier_icon(font_id, cx, y, mod_type, icon_size=ICON_SIZE_PX)
+        cx += int(icon_w) + ICON_PAD_PX
+        # tc đã được cache - không cần gọi get_modifier_line mỗi frame
+        for txt, col in tc:
+            blf.position(font_id, cx, y, 0)
+            blf.color(font_id, *col)
+            blf.draw(font_id, txt)
+            text_w = blf.dimensions(font_id, txt)[0]
+            cx += int(text_w)
+        y += lh
+
+# ==== OFFSCREEN MODIFIER OVERLAY ====
+# OPTIMIZATION: Text overlay chỉ render vào GPUOffScreen khi _modifier_text_cache đổi version
+# (hoặc atlas/cỡ chữ/UI scale/region đổi), mỗi frame chỉ blit 1 quad texture thay vì hàng trăm lệnh blf
+OVERLAY_OFFSCREEN_PAD = 4    # px quanh nội dung (chừa chỗ cho phần chữ thò xuống dưới baseline)
+OVERLAY_OFFSCREEN_STEP = 64  # làm tròn kích thước offscreen → không tạo lại khi text dài/ngắn đi chút
+
+_modifier_overlay_offscreen = {
+    'offscreen': None,
+    'render_key': None,  # (text version, atlas ready, font size, lh, UI scale, region size) đã render
+    'batch': None,       # quad blit, giữ lại khi vị trí/kích thước không đổi
+    'batch_key': None,
+    'failed': False,     # GPUOffScreen không dùng được → vẽ trực tiếp bằng blf
+}
+
+def _pixel_projection(width, height):
+    '''Orthographic projection mapping pixel coordinates (0..width, 0..height) to clip space'''
+    return Matrix((
+        (2.0 / width, 0.0, 0.0, -1.0),
+        (0.0, 2.0 / height, 0.0, -1.0),
+        (0.0, 0.0, 1.0, 0.0),
+        (0.0, 0.0, 0.0, 1.0),
+    ))
+
+def _render_modifier_overlay(font_id, lines, lh):
+    '''Render the modifier lines into the (re)used offscreen buffer'''
+    entry = _modifier_overlay_offscreen
+    pad = OVERLAY_OFFSCREEN_PAD
+    step = OVERLAY_OFFSCREEN_STEP
+    
+    text_w = max(sum(blf.dimensions(font_id, txt)[0] for txt, _ in tc) for _, tc in lines)
+    width = int(ICON_SIZE_PX + ICON_PAD_PX + text_w) + 2 * pad + 1
+    height = len(lines) * lh + 2 * pad
+    width = -(-width // step) * step
+    height = -(-height // step) * step
+    
+    offscreen = entry['offscreen']
+    if offscreen is None or offscreen.width != width or offscreen.height != height:
+        if offscreen is not None:
+            offscreen.free()
+        entry['offscreen'] = None
+        offscreen = gpu.types.GPUOffScreen(width, height)
+        entry['offscreen'] = offscreen
+    
+    with offscreen.bind():
+        framebuffer = gpu.state.active_framebuffer_get()
+        framebuffer.clear(color=(0.0, 0.0, 0.0, 0.0))
+        with gpu.matrix.push_pop(), gpu.matrix.push_pop_projection():
+            gpu.matrix.load_identity()
+            gpu.matrix.load_projection_matrix(_pixel_projection(width, height))
+            _draw_modifier_lines(font_id, lines, pad, pad, lh)
+            # Icon modifier vẽ bằng batch atlas vào cùng offscreen
+            flush_icon_quads()
+
+def _overlay_render_key(font_size, lh):
+    '''Everything the offscreen content depends on besides the text lines themselves'''
+    region = bpy.context.region
+    return (
+        _modifier_text_cache.get('version'),
+        icon_atlas_ready(),  # Atlas xong sau lần render đầu → render lại để có icon
+        font_size, lh,
+        bpy.context.preferences.system.ui_scale,
+        (region.width, region.height) if region else None,
+    )
+
+def _draw_modifier_overlay_offscreen(font_id, font_size, lines, x, y, lh):
+    '''Blit the cached modifier overlay; returns False if offscreen drawing is unavailable'''
+    entry = _modifier_overlay_offscreen
+    if entry['failed'] or not lines:
+        return False
+    
+    try:
+        render_key = _overlay_render_key(font_size, lh)
+        if entry['offscreen'] is None or entry['render_key'] != render_key:
+            entry['render_key'] = None
+            _render_modifier_overlay(font_id, lines, lh)
+            entry['render_key'] = render_key
+        
+        offscreen = entry['offscreen']
+        x0 = x - OVERLAY_OFFSCREEN_PAD
+        y0 = y - OVERLAY_OFFSCREEN_PAD
+        key = (x0, y0, offscreen.width, offscreen.height)
+        if entry['batch_key'] != key:
+            x1, y1 = x0 + offscreen.width, y0 + offscreen.height
+            entry['batch'] = batch_for_shader(_image_shader, 'TRI_FAN', {
+                "pos": ((x0, y0), (x1, y0), (x1, y1), (x0, y1)),
+                "texCoord": ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)),
+            })
+            entry['batch_key'] = key
+    except Exception as e:
+        print(f"Modifier overlay offscreen unavailable, drawing text directly: {e}")
+        free_modifier_overlay_offscreen()
+        entry['failed'] = True
+        return False
+    
+    # Text trong offscreen đã nhân alpha (blend ALPHA lên nền trong suốt) → blit premultiplied
+    gpu.state.blend_set('ALPHA_PREMULT')
+    _image_shader.bind()
+    _image_shader.uniform_sampler("image", offscreen.texture_color)
+    entry['batch'].draw(_image_shader)
+    gpu.state.blend_set('NONE')
+    return True
+
+def free_modifier_overlay_offscreen():
+    entry = _modifier_overlay_offscreen
+    if entry['offscreen'] is not None:
+        entry['offscreen'].free()
+    entry.update(offscreen=None, render_key=None, batch=None, batch_key=None, failed=False)
+
 def draw_overlay_demo():
     # OPTIMIZATION: Chỉ vẽ khi cần thiết - tránh xung đột với nSolve
     # Kiểm tra context hợp lệ
@@ -487,160 +640,98 @@ def draw_overlay_demo():
         obj = bpy.context.active_object
         if obj and obj.type == 'MESH' and obj.modifiers:
             # Chỉ vẽ modifier overlay khi có modifiers
-            font_id, lh = 0, 18
-            blf.size(font_id, 12)
+            font_id, font_size, lh = 0, 12, 18
+            blf.size(font_id, font_size)
             
             # Padding bên trái chung cho cả text và button
             left_padding = 50  # Khớp với base_offset_x của GizmoGroup
             
             # Tính toán vị trí bắt đầu cho modifier info (từ trên xuống)
             y_start = 80  # Vị trí Y thấp hơn = lùi xuống phía dưới màn hình
-            y = y_start
             
-            # OPTIMIZATION: Vẽ modifier info từ cache thay vì tạo mới mỗi frame
+            # OPTIMIZATION: Vẽ modifier info từ cache thay vì tạo mới mỗi frame,
+            # blit từ offscreen (1 draw call) - chỉ vẽ trực tiếp bằng blf khi không có offscreen
             cached_lines = _get_cached_modifier_text_lines(obj)
-            for mod, tc in reversed(cached_lines):
-                x = left_padding
-                icon_w = draw_modifier_icon(font_id, x, y, mod.type, icon_size=ICON_SIZE_PX)
-                x += int(icon_w) + ICON_PAD_PX
-                # tc đã được cache - không cần gọi get_modifier_line mỗi frame
-                for txt, col in tc:
-                    blf.position(font_id, x, y, 0)
-                    blf.color(font_id, *col)
-                    blf.draw(font_id, txt)
-                    text_w = blf.dimensions(font_id, txt)[0]
-                    x += int(text_w)
-                y += lh
+            if not _draw_modifier_overlay_offscreen(font_id, font_size, cached_lines, left_padding, y_start, lh):
+                _draw_modifier_lines(font_id, cached_lines, left_padding, y_start, lh)
     
     # Vẽ icon buttons LUÔN LUÔN (không phụ thuộc vào modifiers)
     draw_simple_icon_buttons(bpy.context)
-
-def draw_rect(x, y, width, height, color):
-    """Vẽ hình chữ nhật"""
-    vertices = ((x, y), (x + width, y), (x + width, y + height), (x, y + height))
-    shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-    batch = batch_for_shader(shader, 'TRI_FAN', {"pos": vertices})
     
-    gpu.state.blend_set('ALPHA')
-    shader.bind()
-    shader.uniform_float("color", color)
-    batch.draw(shader)
-    gpu.state.blend_set('NONE')
-
-def draw_rounded_rect(x, y, width, height, radius, color):
-    """Vẽ hình chữ nhật bo góc"""
-    import math
+    # Toàn bộ icon (modifier + button) trong 1 draw call
+    flush_icon_quads()
+
+# ==== CACHED RECT GEOMETRY ====
+# OPTIMIZATION: Geometry hình chữ nhật / bo góc chỉ build 1 lần mỗi (size, radius) ở gốc (0, 0),
+# vị trí đặt bằng model-view matrix và màu bằng uniform → không tính trig / tạo batch mỗi frame
+_unit_quad_batch = None
+_rounded_rect_batches = {}  # (width, height, radius) -> GPUBatch TRI_FAN ở gốc (0, 0)
+
+def _rounded_rect_batch(width, height, radius):
+    key = (width, height, radius)
+    batch = _rounded_rect_batches.get(key)
+    if batch is not None:
+        return batch
     
     vertices = []
     segments = 8  # Số segments cho mỗi góc
     
-    # Tạo vertices cho hình chữ nhật bo góc
-    # Góc dưới trái
-    for i in range(segments + 1):
-        angle = math.pi + i * (math.pi / 2) / segments
-        vx = x + radius + math.cos(angle) * radius
-        vy = y + radius + math.sin(angle) * radius
-        vertices.append((vx, vy))
-    
-    # Góc dưới phải
-    for i in range(segments + 1):
-        angle = 1.5 * math.pi + i * (math.pi / 2) / segments
-        vx = x + width - radius + math.cos(angle) * radius
-        vy = y + radius + math.sin(angle) * radius
-        vertices.append((vx, vy))
-    
-    # Góc trên phải
-    for i in range(segments + 1):
-        angle = i * (math.pi / 2) / segments
-        vx = x + width - radius + math.cos(angle) * radius
-        vy = y + height - radius + math.sin(angle) * radius
-        vertices.append((vx, vy))
-    
-    # Góc trên trái
-    for i in range(segments + 1):
-        angle = 0.5 * math.pi + i * (math.pi / 2) / segments
-        vx = x + radius + math.cos(angle) * radius
-        vy = y + height - radius + math.sin(angle) * radius
-        vertices.append((vx, vy))
-    
-    shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-    batch = batch_for_shader(shader, 'TRI_FAN', {"pos": vertices})
+    # Tâm các góc theo thứ tự: dưới trái, dưới phải, trên phải, trên trái
+    corners = (
+        (radius, radius, math.pi),
+        (width - radius, radius, 1.5 * math.pi),
+        (width - radius, height - radius, 0.0),
+        (radius, height - radius, 0.5 * math.pi),
+    )
+    for cx, cy, start in corners:
+        for i in range(segments + 1):
+            angle = start + i * (math.pi / 2) / segments
+            vertices.append((cx + math.cos(angle) * radius, cy + math.sin(angle) * radius))
     
-    gpu.state.blend_set('ALPHA')
-    shader.bind()
-    shader.uniform_float("color", color)
-    batch.draw(shader)
-    gpu.state.blend_set('NONE')
+    batch = batch_for_shader(_color_shader, 'TRI_FAN', {"pos": vertices})
+    _rounded_rect_batches[key] = batch
+    return batch
+
+def _draw_cached_batch(batch, x, y, color, scale=None):
+    with gpu.matrix.push_pop():
+        gpu.matrix.translate((x, y))
+        if scale is not None:
+            gpu.matrix.scale(scale)
+        gpu.state.blend_set('ALPHA')
+        _color_shader.bind()
+        _color_shader.uniform_float("color", color)
+        batch.draw(_color_shader)
+        gpu.state.blend_set('NONE')
+
+def draw_rect(x, y, width, height, color):
+    """Vẽ hình chữ nhật"""
+    global _unit_quad_batch
+    if _unit_quad_batch is None:
+        _unit_quad_batch = batch_for_shader(_color_shader, 'TRI_FAN', {"pos": ((0, 0), (1, 0), (1, 1), (0, 1))})
+    _draw_cached_batch(_unit_quad_batch, x, y, color, scale=(width, height))
+
+def draw_rounded_rect(x, y, width, height, radius, color):
+    """Vẽ hình chữ nhật bo góc"""
+    _draw_cached_batch(_rounded_rect_batch(width, height, radius), x, y, color)
 
 def draw_icon_simple(x, y, size, color):
     """Vẽ icon (hình vuông) - fallback khi không load được PNG"""
     draw_rect(x, y, size, size, color)
 
-# Cache để lưu texture đã load
-_icon_texture_cache = {}
-
 def draw_icon_png(x, y, size, icon_path, tint_color):
     """Vẽ icon PNG với màu tint và bo góc"""
-    global _icon_texture_cache
-    
     # Bo góc
     corner_radius = 4
     
-    # Kiểm tra file tồn tại
-    if not os.path.exists(icon_path):
-        # Fallback: vẽ hình vuông màu bo góc
-        draw_rounded_rect(x, y, size, size, corner_radius, tint_color)
-        return
-    
-    # Load texture từ cache hoặc load mới
-    if icon_path not in _icon_texture_cache:
-        try:
-            # Load image
-            img = bpy.data.images.load(icon_path, check_existing=True)
-            _icon_texture_cache[icon_path] = img
-        except Exception as e:
-            print(f"Error loading icon {icon_path}: {e}")
-            draw_rounded_rect(x, y, size, size, corner_radius, tint_color)
-            return
-    
-    img = _icon_texture_cache[icon_path]
-    
-    # Vẽ background với màu tint (bo góc)
+    # Vẽ background với màu tint (bo góc) - icon thiếu trong atlas thì chỉ còn background
     draw_rounded_rect(x, y, size, size, corner_radius, tint_color)
     
-    # Vẽ icon PNG nhỏ hơn lên trên background (padding 4px)
-    icon_padding = 4
-    icon_x = x + icon_padding
-    icon_y = y + icon_padding
-    icon_size = size - icon_padding * 2
-    
-    try:
-        # Tạo vertices và UV coords cho icon nhỏ hơn
-        vertices = (
-            (icon_x, icon_y), 
-            (icon_x + icon_size, icon_y), 
-            (icon_x + icon_size, icon_y + icon_size), 
-            (icon_x, icon_y + icon_size)
-        )
-        uvs = ((0, 0), (1, 0), (1, 1), (0, 1))
-        
-        # Bind texture
-        if img.bindcode == 0:
-            img.gl_load()
-        
-        # Vẽ texture
-        shader = gpu.shader.from_builtin('IMAGE')
-        batch = batch_for_shader(shader, 'TRI_FAN', {"pos": vertices, "texCoord": uvs})
-        
-        gpu.state.blend_set('ALPHA')
-        shader.bind()
-        shader.uniform_sampler("image", gpu.texture.from_image(img))
-        batch.draw(shader)
-        gpu.state.blend_set('NONE')
-    except Exception as e:
-        print(f"Error drawing icon texture: {e}")
-        # Fallback: chỉ vẽ background màu
-        pass
+    # Icon PNG nhỏ hơn lên trên background (padding 4px), vẽ cùng batch atlas cuối frame
+    # icon_path = None: file không tồn tại (đã kiểm tra 1 lần ở GizmoGroup.setup)
+    if icon_path is not None:
+        icon_padding = 4
+        icon_size = size - icon_padding * 2
+        queue_icon(icon_path, x + icon_padding, y + icon_padding, icon_size, icon_size)
 
 def draw_simple_icon_buttons(context):
     """Vẽ icon buttons với PNG icons"""
@@ -733,6 +824,190 @@ def draw_simple_icon_buttons(context):
             
     except (ReferenceError, Exception):
         _gizmo_group_instance = None
+# ================== CACHE INVALIDATION ==================
+# OPTIMIZATION: Cache modifier chỉ bị đánh dấu dirty khi active object / modifier stack thay đổi
+# (msgbus + depsgraph handler) → draw handler chỉ đọc cache, không hash modifiers mỗi frame
+_msgbus_owner = object()
+
+def mark_modifier_caches_dirty(*args):
+    _modifier_state_cache['dirty'] = True
+    _modifier_text_cache['dirty'] = True
+
+@bpy.app.handlers.persistent
+def _modifier_depsgraph_update(scene, depsgraph):
+    # Mesh thay đổi → thời gian đo cũ của mọi stack trên mesh đó không còn đúng
+    if _modifier_profiler['enabled']:
+        for update in depsgraph.updates:
+            if isinstance(update.id, bpy.types.Mesh) and update.is_updated_geometry:
+                if _forget_modifier_timings(update.id.original.name):
+                    mark_modifier_caches_dirty()
+    
+    # msgbus không bắt được add/remove/reorder modifier và thay đổi qua operator/driver
+    # → object đang hiển thị (hoặc object được modifier tham chiếu) được update thì đánh dấu dirty
+    watched = set(_modifier_text_cache.get('dependencies', ()))
+    watched.add(_modifier_state_cache.get('object_name'))
+    watched.add(_modifier_text_cache.get('object_name'))
+    watched.discard(None)
+    if not watched:
+        return
+    
+    for update in depsgraph.updates:
+        if not isinstance(update.id, bpy.types.Object):
+            continue
+        # Chỉ move/rotate/scale: text và trạng thái button không đổi
+        if update.is_updated_transform and not update.is_updated_geometry:
+            continue
+        if update.id.original.name in watched:
+            mark_modifier_caches_dirty()
+            return
+
+@bpy.app.handlers.persistent
+def _modifier_undo_redo(*args):
+    mark_modifier_caches_dirty()
+
+def _subscribe_modifier_changes():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    # Đổi active object
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.LayerObjects, "active"),
+        owner=_msgbus_owner,
+        args=(),
+        notify=mark_modifier_caches_dirty,
+    )
+    # Đổi bất kỳ property nào của modifier từ UI (tên, show_viewport, levels...)
+    bpy.msgbus.subscribe_rna(
+        key=bpy.types.Modifier,
+        owner=_msgbus_owner,
+        args=(),
+        notify=mark_modifier_caches_dirty,
+    )
+
+@bpy.app.handlers.persistent
+def _modifier_load_post(dummy):
+    # Load file .blend xóa toàn bộ msgbus subscription → đăng ký lại
+    _subscribe_modifier_changes()
+    mark_modifier_caches_dirty()
+
+_CACHE_HANDLERS = (
+    ('depsgraph_update_post', _modifier_depsgraph_update),
+    ('undo_post', _modifier_undo_redo),
+    ('redo_post', _modifier_undo_redo),
+    ('load_post', _modifier_load_post),
+)
+
+# ================== MODIFIER PROFILER ==================
+# Thời gian evaluate từng modifier (ms + màu heat) cạnh mỗi dòng overlay.
+# Kết quả cache theo stack hash, chỉ đo lại khi stack hoặc mesh thay đổi
+PROFILE_DELAY = 0.3          # giây chờ sau thay đổi cuối cùng trước khi đo (debounce)
+PROFILE_HOT_SHARE = 0.5      # modifier chiếm >= 50% thời gian cả stack → đỏ hoàn toàn
+PROFILE_CACHE_SIZE = 256     # số stack tối đa giữ kết quả đo
+
+COLOR_HEAT_COOL = (0.4, 0.9, 0.3, 1.0)   # Xanh lá - rẻ
+COLOR_HEAT_WARM = (1.0, 0.85, 0.2, 1.0)  # Vàng
+COLOR_HEAT_HOT  = COLOR_OFF              # Đỏ - modifier làm chậm viewport
+
+_modifier_profiler = {
+    'enabled': False,
+    'scheduled': False,
+    'timings': OrderedDict(),  # stack key -> tuple(ms hoặc None) theo thứ tự modifier (LRU)
+}
+
+def _modifier_stack_key(obj, text_lines):
+    # Text đã chứa type, tên, trạng thái bật/tắt và các thông số chính của từng modifier
+    mesh_name = obj.data.name if obj.data else None
+    return (obj.name, mesh_name, obj.mode, tuple((mod_type, tuple(tc)) for mod_type, tc in text_lines))
+
+def _forget_modifier_timings(mesh_name):
+    timings = _modifier_profiler['timings']
+    stale = [key for key in timings if key[1] == mesh_name]
+    for key in stale:
+        del timings[key]
+    return bool(stale)
+
+def _heat_color(share):
+    t = min(max(share / PROFILE_HOT_SHARE, 0.0), 1.0)
+    if t < 0.5:
+        low, high, t = COLOR_HEAT_COOL, COLOR_HEAT_WARM, t * 2.0
+    else:
+        low, high, t = COLOR_HEAT_WARM, COLOR_HEAT_HOT, (t - 0.5) * 2.0
+    return tuple(a + (b - a) * t for a, b in zip(low, high))
+
+def _with_modifier_timings(obj, text_lines):
+    '''Append "ms" chunks to the text lines, scheduling a profile pass on cache miss'''
+    key = _modifier_stack_key(obj, text_lines)
+    timings = _modifier_profiler['timings'].get(key)
+    if timings is None or len(timings) != len(text_lines):
+        _schedule_modifier_profile()
+        return text_lines
+    _modifier_profiler['timings'].move_to_end(key)
+
+    total = sum(ms for ms in timings if ms is not None)
+    lines = []
+    for (mod_type, tc), ms in zip(text_lines, timings):
+        if ms is not None:
+            share = ms / total if total > 0.0 else 0.0
+            tc = tc + [(f"  {ms:.1f} ms", _heat_color(share))]
+        lines.append((mod_type, tc))
+    return lines
+
+def measure_modifier_times(obj, depsgraph):
+    '''Per-modifier evaluation time in ms (None for modifiers disabled in the viewport)'''
+    # Blender ghi sẵn execution_time cho modifier của object đã evaluate → không cần evaluate lại
+    eval_mods = obj.evaluated_get(depsgraph).modifiers
+    if len(eval_mods) != len(obj.modifiers):
+        return None  # Stack vừa đổi, depsgraph chưa evaluate lại → đo ở lần sau
+    return tuple(
+        eval_mod.execution_time * 1000.0 if mod.show_viewport else None
+        for eval_mod, mod in zip(eval_mods, obj.modifiers)
+    )
+
+def _schedule_modifier_profile():
+    if _modifier_profiler['scheduled']:
+        return
+    _modifier_profiler['scheduled'] = True
+    bpy.app.timers.register(_run_modifier_profile, first_interval=PROFILE_DELAY)
+
+def _run_modifier_profile():
+    # Đo trong timer - draw handler không được phép sửa data
+    _modifier_profiler['scheduled'] = False
+    if not _modifier_profiler['enabled']:
+        return None
+
+    view_layer = bpy.context.view_layer
+    obj = view_layer.objects.active if view_layer else None
+    if obj is None or obj.type != 'MESH' or not obj.modifiers:
+        return None
+
+    text_lines = [(mod.type, get_modifier_line(mod)) for mod in obj.modifiers]
+    key = _modifier_stack_key(obj, text_lines)
+    timings = _modifier_profiler['timings']
+    if key in timings:
+        return None
+
+    try:
+        result = measure_modifier_times(obj, bpy.context.evaluated_depsgraph_get())
+    except Exception as e:
+        print(f"Error profiling modifiers of {obj.name}: {e}")
+        return None
+    if result is None:
+        return None
+
+    # OPTIMIZATION: LRU eviction giống AnalysisCache - chỉ bỏ stack lâu không dùng nhất
+    timings[key] = result
+    while len(timings) > PROFILE_CACHE_SIZE:
+        timings.popitem(last=False)
+    mark_modifier_caches_dirty()
+    tag_redraw_all_view3d()
+    return None
+
+def set_modifier_profiling(enabled):
+    '''Turn the per-modifier timing overlay on or off'''
+    _modifier_profiler['enabled'] = bool(enabled)
+    if not enabled:
+        _modifier_profiler['timings'].clear()
+    mark_modifier_caches_dirty()
+    tag_redraw_all_view3d()
+
 # ================== MODIFIER OVERLAY FUNCTIONS ==================
 # Moved to preferences - no longer need operator
 
@@ -775,6 +1050,16 @@ def tag_redraw_view3d(context):
             area.tag_redraw()
             break  # Chỉ tag 1 area đầu tiên
 
+def tag_redraw_all_view3d():
+    '''Redraw every 3D View (timers and handlers have no context area)'''
+    wm = bpy.context.window_manager
+    if wm is None:
+        return
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
 # ========== Operators ==========
 
 class KHABIT_OT_toggle_wireframe(Operator):
@@ -1100,18 +1385,26 @@ class KHABIT_GGT_overlay_buttons(GizmoGroup):
         # Lấy đường dẫn thư mục icons
         icon_dir = get_icon_path()
         
-        self.button_info = [
-            ("All Modifiers", self.all_mods_btn, os.path.join(icon_dir, 'blender_icon_modifier_data.png'), None),  # None = kiểm tra trạng thái riêng
-            ("Subdivision", self.subsurf_btn, os.path.join(icon_dir, 'blender_icon_mod_subsurf.png'), None),
-            ("Wireframe", self.wireframe_btn, os.path.join(icon_dir, 'blender_icon_mod_wireframe.png'), 'show_wireframes'),
-            ("Edge Length", self.edge_length_btn, os.path.join(icon_dir, 'blender_icon_driver_distance.png'), 'show_extra_edge_length'),
-            ("Split Normals", self.split_normals_btn, os.path.join(icon_dir, 'blender_icon_mod_normaledit.png'), 'show_split_normals'),
-            ("Shading Data", self.custom_normals_btn, os.path.join(icon_dir, 'blender_icon_mod_smooth.png'), None),
-            ("Retopology", self.retopo_btn, os.path.join(icon_dir, 'blender_icon_mod_lineart.png'), 'show_retopology'),
-            ("Transform Origin", self.transform_origin_btn, os.path.join(icon_dir, 'blender_icon_transform_origins.png'), None),
-            ("Mesh Analysis", self.mesh_analysis_btn, os.path.join(icon_dir, 'blender_icon_ghost_enabled.png'), 'show_statvis'),
-            ("Analyze Check", self.analyze_check_btn, os.path.join(icon_dir, 'blender_icon_ghost_disabled.png'), None)
+        button_states = [
+            ("All Modifiers", self.all_mods_btn, None),  # None = kiểm tra trạng thái riêng
+            ("Subdivision", self.subsurf_btn, None),
+            ("Wireframe", self.wireframe_btn, 'show_wireframes'),
+            ("Edge Length", self.edge_length_btn, 'show_extra_edge_length'),
+            ("Split Normals", self.split_normals_btn, 'show_split_normals'),
+            ("Shading Data", self.custom_normals_btn, None),
+            ("Retopology", self.retopo_btn, 'show_retopology'),
+            ("Transform Origin", self.transform_origin_btn, None),
+            ("Mesh Analysis", self.mesh_analysis_btn, 'show_statvis'),
+            ("Analyze Check", self.analyze_check_btn, None)
         ]
+        self.button_info = []
+        for name, button, overlay_attr in button_states:
+            # OPTIMIZATION: Kiểm tra file 1 lần ở đây thay vì os.path.exists mỗi frame
+            icon_path = os.path.join(icon_dir, BUTTON_ICON_BY_NAME[name])
+            if not os.path.exists(icon_path):
+                print(f"Icon file not found: {icon_path}")
+                icon_path = None
+            self.button_info.append((name, button, icon_path, overlay_attr))
 
     @classmethod
     def poll(cls, context):
@@ -1173,10 +1466,21 @@ classes = (
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    
+    _subscribe_modifier_changes()
+    for name, handler in _CACHE_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler not in handlers:
+            handlers.append(handler)
+    
+    # Icon atlas build trong timer - lúc register bpy.data còn bị hạn chế (bật addon khi khởi động)
+    # nên images.load lỗi, còn draw callback không được load/remove image
+    if not bpy.app.timers.is_registered(_build_icon_atlas):
+        bpy.app.timers.register(_build_icon_atlas, first_interval=0.0)
 
 def unregister():
     # Disable overlay if active
-    global _handler, _gizmo_group_instance, _icon_texture_cache, _modifier_icon_cache
+    global _handler, _gizmo_group_instance, _unit_quad_batch
     global _modifier_state_cache, _modifier_text_cache
     
     if _handler is not None:
@@ -1189,11 +1493,27 @@ def unregister():
     # Clear gizmo group reference
     _gizmo_group_instance = None
     
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    for name, handler in _CACHE_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler in handlers:
+            handlers.remove(handler)
+    
     # OPTIMIZATION: Clear all caches
-    _icon_texture_cache.clear()
-    _modifier_icon_cache.clear()
+    if bpy.app.timers.is_registered(_build_icon_atlas):
+        bpy.app.timers.unregister(_build_icon_atlas)
+    _icon_atlas.free()
+    _icon_quads.clear()
+    free_modifier_overlay_offscreen()
+    _icon_batch_cache.update(key=None, batch=None)
+    _rounded_rect_batches.clear()
+    _unit_quad_batch = None
     _modifier_state_cache.clear()
     _modifier_text_cache.clear()
+    _modifier_profiler['timings'].clear()
+    if bpy.app.timers.is_registered(_run_modifier_profile):
+        bpy.app.timers.unregister(_run_modifier_profile)
+    _modifier_profiler['scheduled'] = False
     
     for cls in reversed(classes):
         try:
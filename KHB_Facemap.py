@@ -5,6 +5,12 @@
 import bpy
 import bmesh
 import json
+import numpy as np
+
+from .KHB_Topology import (
+    MeshTopology, edge_face_counts, face_components, greedy_coloring,
+    label_adjacency, label_boundary_edges,
+)
 
 
 # ============================================================================
@@ -96,33 +102,25 @@ def set_viewport_color_display(context, enable=True):
                         space.shading.color_type = 'MATERIAL'
 
 
-def set_boundary_sharp_edges(bm, manager):
-    """Set sharp edges at face map boundaries, returns count"""
-    sharp_count = 0
+def face_map_boundary_mask(topology, face_labels):
+    """Edges between different face maps (or mapped/unmapped faces) and open edges"""
+    counts = edge_face_counts(topology)
+    return (counts == 1) | ((counts == 2) & label_boundary_edges(topology, face_labels))
+
+
+def set_boundary_sharp_edges(bm, topology, manager):
+    """Set sharp edges at face map boundaries, returns count
     
-    # Clear all sharp edges first
-    for edge in bm.edges:
-        edge.smooth = True
+    topology must be read from the same mesh state as bm (MeshTopology.from_mesh
+    after obj.update_from_editmode()) so edge indices match.
+    """
+    sharp = face_map_boundary_mask(topology, manager.face_labels(topology.n_faces))
     
-    # Mark boundaries between different face maps as sharp
-    for edge in bm.edges:
-        if len(edge.link_faces) == 2:
-            face1_idx = edge.link_faces[0].index
-            face2_idx = edge.link_faces[1].index
-            
-            group1 = manager.face_to_group.get(face1_idx)
-            group2 = manager.face_to_group.get(face2_idx)
-            
-            # Different groups or one has no group
-            if (group1 is not None and group2 is not None and group1 != group2) or \
-               ((group1 is None) != (group2 is None)):
-                edge.smooth = False
-                sharp_count += 1
-        elif edge.is_boundary:
-            edge.smooth = False
-            sharp_count += 1
+    # Clear all sharp edges first, mark boundaries between different face maps as sharp
+    for edge, is_sharp in zip(bm.edges, sharp.tolist()):
+        edge.smooth = not is_sharp
     
-    return sharp_count
+    return int(sharp.sum())
 
 
 def enable_auto_smooth(mesh):
@@ -254,6 +252,16 @@ class FaceMapManager:
             self.face_to_group[face_idx] = group_index
             self.groups[group_index].faces.add(face_idx)
     
+    def face_labels(self, n_faces):
+        """Group index per face as an int32 array (-1 = no face map)"""
+        labels = np.full(n_faces, -1, dtype=np.int32)
+        if self.face_to_group:
+            faces = np.fromiter(self.face_to_group.keys(), dtype=np.int64, count=len(self.face_to_group))
+            groups = np.fromiter(self.face_to_group.values(), dtype=np.int32, count=len(self.face_to_group))
+            inside = faces < n_faces
+            labels[faces[inside]] = groups[inside]
+        return labels
+    
     def update_color_attribute(self, obj, safe_mode=False):
         """Update color attribute based on face maps
         
@@ -306,45 +314,27 @@ class FaceMapManager:
             if mode == 'EDIT':
                 bpy.ops.object.mode_set(mode='EDIT')
     
-    def initialize_by_sharp_edges(self, obj):
-        """Initialize face maps based on sharp edges using flood fill"""
+    def initialize_by_sharp_edges(self, obj, topology=None):
+        """Initialize face maps based on sharp edges (face islands across smooth edges)
+        
+        obj must be synced from Edit Mode (obj.update_from_editmode()) before calling.
+        """
         self.clear()
         self.mesh_object = obj
         
-        bm = bmesh.from_edit_mesh(obj.data)
-        bm.faces.ensure_lookup_table()
-        
-        visited = set()
-        
-        def flood_fill(start_face):
-            stack = [start_face]
-            group_faces = []
-            
-            while stack:
-                face = stack.pop()
-                if face.index in visited:
-                    continue
-                
-                visited.add(face.index)
-                group_faces.append(face.index)
-                
-                for edge in face.edges:
-                    if not edge.smooth:
-                        continue
-                    for linked_face in edge.link_faces:
-                        if linked_face.index not in visited:
-                            stack.append(linked_face)
-            
-            return group_faces
-        
-        for i, face in enumerate(bm.faces):
-            if face.index not in visited:
-                group_faces = flood_fill(face)
-                if group_faces:
-                    group_idx = self.add_group(f"Face Map {i + 1:02d}")
-                    self.assign_faces(group_faces, group_idx)
+        me = obj.data
+        if topology is None:
+            topology = MeshTopology.from_mesh(me)
+        sharp = np.empty(len(me.edges), dtype=bool)
+        me.edges.foreach_get("use_edge_sharp", sharp)
         
-        bmesh.update_edit_mesh(obj.data)
+        # Islands được đánh số theo face index nhỏ nhất → cùng thứ tự với flood fill theo index
+        labels = face_components(topology, ~sharp)
+        order = np.argsort(labels, kind='stable')
+        starts = np.flatnonzero(np.r_[True, labels[order][1:] != labels[order][:-1]])
+        for group_faces in np.split(order, starts[1:]):
+            group_idx = self.add_group(f"Face Map {group_faces[0] + 1:02d}")
+            self.assign_faces(group_faces.tolist(), group_idx)
 
 
 # ============================================================================
@@ -369,16 +359,17 @@ class FACEMAP_OT_InitializeBySharp(bpy.types.Operator):
         
         # Update from edit mode
         obj.update_from_editmode()
+        topology = MeshTopology.from_mesh(obj.data)
         
         # Step 1-4: Initialize face maps by sharp edges
-        manager.initialize_by_sharp_edges(obj)
+        manager.initialize_by_sharp_edges(obj, topology)
         
         # Step 5: Clear all sharp edges, then set face map boundaries as sharp
         bm = bmesh.from_edit_mesh(obj.data)
         bm.faces.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
         
-        sharp_count = set_boundary_sharp_edges(bm, manager)
+        sharp_count = set_boundary_sharp_edges(bm, topology, manager)
         bmesh.update_edit_mesh(obj.data)
         
         enable_auto_smooth(obj.data)
@@ -472,7 +463,7 @@ class FACEMAP_OT_CreateFromSelection(bpy.types.Operator):
         manager.assign_faces(selected_faces, group_idx)
         
         # Clear all sharp edges and rebuild from all face map boundaries
-        sharp_count = set_boundary_sharp_edges(bm, manager)
+        sharp_count = set_boundary_sharp_edges(bm, MeshTopology.from_mesh(obj.data), manager)
         bmesh.update_edit_mesh(obj.data)
         
         enable_auto_smooth(obj.data)
@@ -510,31 +501,11 @@ class FACEMAP_OT_Optimize(bpy.types.Operator):
         
         obj = context.edit_object
         obj.update_from_editmode()
-        me = obj.data
-        bm = bmesh.from_edit_mesh(me)
-        bm.faces.ensure_lookup_table()
-        bm.edges.ensure_lookup_table()
+        topology = MeshTopology.from_mesh(obj.data)
         
-        # Build adjacency graph
-        adjacency = {i: set() for i in range(len(manager.groups))}
-        
-        for edge in bm.edges:
-            if len(edge.link_faces) == 2:
-                group1 = manager.face_to_group.get(edge.link_faces[0].index)
-                group2 = manager.face_to_group.get(edge.link_faces[1].index)
-                
-                if group1 is not None and group2 is not None and group1 != group2:
-                    adjacency[group1].add(group2)
-                    adjacency[group2].add(group1)
-        
-        # Greedy graph coloring
-        colors = {}
-        for group_idx in range(len(manager.groups)):
-            used_colors = {colors[adj] for adj in adjacency[group_idx] if adj in colors}
-            color = 0
-            while color in used_colors:
-                color += 1
-            colors[group_idx] = color
+        # Build adjacency graph + greedy graph coloring
+        pairs = label_adjacency(topology, manager.face_labels(topology.n_faces))
+        colors = dict(enumerate(greedy_coloring(len(manager.groups), pairs).tolist()))
         
         # Merge groups with same color
         new_groups_data = {}
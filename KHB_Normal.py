@@ -1,8 +1,10 @@
 import bpy
 import bmesh
+import numpy as np
 from bpy.types import Operator, Panel
 from bpy.props import BoolProperty, StringProperty, IntProperty, FloatProperty
 from typing import List, Set
+from .KHB_Topology import find_coincident_vertices
 
 # -----------------------------------------------------------------------------
 # Helpers
@@ -70,12 +72,21 @@ def _get_face_vertices(context) -> List[int]:
     
     return sorted(sel)
 
-def _co_key(vec) -> tuple:
-    """Round coordinates để tránh float equality issues"""
-    try:
-        return (round(vec.x, 6), round(vec.y, 6), round(vec.z, 6))
-    except Exception:
-        return (round(vec[0], 6), round(vec[1], 6), round(vec[2], 6))
+# Ngưỡng khớp vertex sau split - giữ độ chính xác của cách round(co, 6) trước đây
+CO_MATCH_DISTANCE = 1e-6
+
+def _coincident_indices(co, targets, distance: float = CO_MATCH_DISTANCE) -> List[int]:
+    """Indices trong co nằm trùng (< distance) với một điểm bất kỳ trong targets"""
+    if not len(co) or not len(targets):
+        return []
+    points = np.concatenate((np.asarray(targets, dtype=np.float64).reshape(-1, 3),
+                             np.asarray(co, dtype=np.float64).reshape(-1, 3)))
+    pairs = find_coincident_vertices(points, distance)
+    
+    # Chỉ giữ cặp (target, vertex) - pairs luôn có i < j nên target nằm ở cột đầu
+    n_targets = len(targets)
+    cross = pairs[(pairs[:, 0] < n_targets) & (pairs[:, 1] >= n_targets)]
+    return np.unique(cross[:, 1] - n_targets).tolist()
 
 def _safe_set_attr(obj, attr_name: str, value, fallback=None):
     """Safely set attribute với fallback"""
@@ -364,10 +375,10 @@ class KEYHABIT_OT_split_faces_and_weld(Operator):
         bm = bmesh.from_edit_mesh(obj.data)
         bm.verts.ensure_lookup_table()
         
-        boundary_keys = set()
-        for v in bm.verts:
-            if v.select and any((not f.select) for f in v.link_faces):
-                boundary_keys.add(_co_key(v.co))
+        boundary_co = [
+            v.co.to_tuple() for v in bm.verts
+            if v.select and any((not f.select) for f in v.link_faces)
+        ]
         
         # Split selected faces
         try:
@@ -379,7 +390,8 @@ class KEYHABIT_OT_split_faces_and_weld(Operator):
         # Get boundary vertices after split
         bm = bmesh.from_edit_mesh(obj.data)
         bm.verts.ensure_lookup_table()
-        boundary_all_indices = [v.index for v in bm.verts if _co_key(v.co) in boundary_keys]
+        # Vertices trùng vị trí với boundary (cả 2 phía sau split)
+        boundary_all_indices = _coincident_indices([v.co.to_tuple() for v in bm.verts], boundary_co)
         
         bpy.ops.object.mode_set(mode='OBJECT')
         
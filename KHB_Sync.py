@@ -6,9 +6,11 @@ import os
 import json
 import re
 import bmesh
+import numpy as np
 from datetime import datetime
 from bpy.types import Operator, Panel, PropertyGroup
 from bpy.props import StringProperty, BoolProperty, FloatVectorProperty, EnumProperty
+from .KHB_Topology import MeshTopology, edge_face_counts, label_boundary_edges, pack_uvs
 
 # ================ VALIDATION FUNCTIONS ================
 
@@ -383,30 +385,30 @@ def get_face_maps_from_object(obj):
         print(f"Error loading face map data: {e}")
         return {}
 
-def cut_seams_for_face_maps(bm, face_maps_dict):
-    """Cắt seam ở boundary edges giữa các face maps"""
-    face_to_map = {}
+def face_map_labels(face_maps_dict, n_faces):
+    """Face map id per face as an array (-1 = không thuộc face map nào)"""
+    labels = np.full(n_faces, -1, dtype=np.int64)
     for face_map_id, face_indices in face_maps_dict.items():
-        for face_idx in face_indices:
-            face_to_map[face_idx] = face_map_id
+        faces = np.asarray(face_indices, dtype=np.int64)
+        labels[faces[(faces >= 0) & (faces < n_faces)]] = face_map_id
+    return labels
+
+def cut_seams_for_face_maps(bm, topology, face_maps_dict):
+    """Cắt seam ở boundary edges giữa các face maps
     
-    bm.faces.ensure_lookup_table()
-    bm.edges.ensure_lookup_table()
+    topology phải đọc từ cùng mesh với bm (MeshTopology.from_mesh) để edge index khớp.
+    """
+    labels = face_map_labels(face_maps_dict, topology.n_faces)
+    counts = edge_face_counts(topology)
     
-    seam_count = 0
-    for edge in bm.edges:
-        linked_faces = edge.link_faces
-        
-        if len(linked_faces) >= 2:
-            face_maps = {face_to_map[f.index] for f in linked_faces if f.index in face_to_map}
-            if len(face_maps) > 1:
-                edge.seam = True
-                seam_count += 1
-        elif len(linked_faces) == 1:
-            edge.seam = True
-            seam_count += 1
+    # Faces không thuộc face map nào được bỏ qua khi so sánh, open edges luôn là seam
+    seam = (counts == 1) | ((counts >= 2) & label_boundary_edges(topology, labels, ignore_label=-1))
     
-    return seam_count
+    bm.edges.ensure_lookup_table()
+    for edge_idx in np.flatnonzero(seam).tolist():
+        bm.edges[edge_idx].seam = True
+    
+    return int(seam.sum())
 
 def scale_and_pack_uvs(bm, face_map, uv_layer_bm, margin):
     """Scale và pack UVs vào [0,1] với margin"""
@@ -415,34 +417,13 @@ def scale_and_pack_uvs(bm, face_map, uv_layer_bm, margin):
     
     bm.faces.ensure_lookup_table()
     
-    min_u = min_v = float('inf')
-    max_u = max_v = float('-inf')
-    
-    for face_idx in face_map:
-        if face_idx >= len(bm.faces):
-            continue
-        for loop in bm.faces[face_idx].loops:
-            uv = loop[uv_layer_bm].uv
-            min_u, max_u = min(min_u, uv.x), max(max_u, uv.x)
-            min_v, max_v = min(min_v, uv.y), max(max_v, uv.y)
-    
-    width = max_u - min_u
-    height = max_v - min_v
-    
-    if width == 0 or height == 0:
+    loops = [loop for face_idx in face_map if face_idx < len(bm.faces) for loop in bm.faces[face_idx].loops]
+    if not loops:
         return
+    uvs = np.array([loop[uv_layer_bm].uv[:] for loop in loops], dtype=np.float64)
     
-    available_space = 1.0 - (2 * margin)
-    scale = min(available_space / width, available_space / height)
-    
-    for face_idx in face_map:
-        if face_idx >= len(bm.faces):
-            continue
-        for loop in bm.faces[face_idx].loops:
-            uv = loop[uv_layer_bm].uv
-            u = (uv.x - min_u) * scale + margin + (available_space - width * scale) / 2
-            v = (uv.y - min_v) * scale + margin + (available_space - height * scale) / 2
-            loop[uv_layer_bm].uv = (u, v)
+    for loop, uv in zip(loops, pack_uvs(uvs, margin).tolist()):
+        loop[uv_layer_bm].uv = uv
 
 def unwrap_face_map_to_udim(obj, bm, face_map, uv_layer_bm, udim_tile, margin):
     """Unwrap face map vào UDIM tile với padding"""
@@ -520,7 +501,7 @@ def convert_face_maps_to_udim_uvs(obj, margin=0.01):
     bm.faces.ensure_lookup_table()
     bm.edges.ensure_lookup_table()
     
-    cut_seams_for_face_maps(bm, face_maps_dict)
+    cut_seams_for_face_maps(bm, MeshTopology.from_mesh(obj.data), face_maps_dict)
     
     bm.to_mesh(obj.data)
     obj.data.update()
@@ -0,0 +1,389 @@
+# KHB_Topology.py - KeyHabit Mesh Topology Kernel
+# Topology trên plain NumPy arrays, không import bpy/bmesh → test và profile được bằng Python thường
+#
+# Mesh = co (N, 3) + face_offsets (F + 1) + face_verts (L), giống layout face offsets của Blender 4.x.
+# Các module addon chỉ đọc arrays bằng foreach_get (MeshTopology.from_mesh) rồi gọi kernel;
+# mọi object có cùng attributes (vd. KHB_Analysis.MeshArrays) đều dùng được với các hàm bên dưới.
+
+import numpy as np
+
+
+# ========== MESH ARRAYS ==========
+
+def loop_next(face_start, face_size, n_loops):
+    '''Index of the next corner inside the same face for every loop.'''
+    nxt = np.arange(1, n_loops + 1, dtype=np.int32)
+    if len(face_start):
+        nxt[face_start + face_size - 1] = face_start
+    return nxt
+
+
+def build_edges(loop_verts, nxt):
+    '''Unique undirected edges of the face corners: (edge_verts (E, 2), loop_edges (L,))'''
+    a = loop_verts.astype(np.int64)
+    b = loop_verts[nxt].astype(np.int64)
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    n = int(hi.max()) + 1 if len(hi) else 1
+    keys, loop_edges = np.unique(lo * n + hi, return_inverse=True)
+    edge_verts = np.column_stack((keys // n, keys % n)).astype(np.int32)
+    return edge_verts, loop_edges.ravel().astype(np.int32)
+
+
+class MeshTopology:
+    '''Flat mesh topology: corners (loops) grouped by face offsets, edges derived or given.
+
+    Attributes follow KHB_Analysis.MeshArrays (co, face_start, face_size, loop_verts,
+    loop_edges, loop_faces, loop_next, edge_verts and *_hide) so both work with the kernel.
+    '''
+
+    def __init__(self, co, face_offsets, face_verts, edge_verts=None, loop_edges=None):
+        face_offsets = np.asarray(face_offsets, dtype=np.int32)
+        self.co = np.asarray(co, dtype=np.float32).reshape(-1, 3)
+        self.loop_verts = np.asarray(face_verts, dtype=np.int32)
+        self.face_start = face_offsets[:-1]
+        self.face_size = np.diff(face_offsets).astype(np.int32)
+        n_loops = len(self.loop_verts)
+        self.loop_faces = np.repeat(np.arange(len(self.face_start), dtype=np.int32), self.face_size)
+        self.loop_next = loop_next(self.face_start, self.face_size, n_loops)
+
+        if loop_edges is None:
+            edge_verts, loop_edges = build_edges(self.loop_verts, self.loop_next)
+        self.edge_verts = np.asarray(edge_verts, dtype=np.int32).reshape(-1, 2)
+        self.loop_edges = np.asarray(loop_edges, dtype=np.int32)
+
+        self.vert_hide = np.zeros(len(self.co), dtype=bool)
+        self.edge_hide = np.zeros(len(self.edge_verts), dtype=bool)
+        self.face_hide = np.zeros(len(self.face_start), dtype=bool)
+
+    @classmethod
+    def from_mesh(cls, me):
+        '''Read a bpy Mesh with foreach_get (edge order stays Blender's); hide state is ignored'''
+        n_verts, n_edges, n_loops, n_faces = len(me.vertices), len(me.edges), len(me.loops), len(me.polygons)
+        co = np.empty(n_verts * 3, dtype=np.float32)
+        me.vertices.foreach_get("co", co)
+        face_offsets = np.empty(n_faces + 1, dtype=np.int32)
+        me.polygons.foreach_get("loop_start", face_offsets[:-1])
+        face_offsets[-1] = n_loops
+        face_verts = np.empty(n_loops, dtype=np.int32)
+        me.loops.foreach_get("vertex_index", face_verts)
+        loop_edges = np.empty(n_loops, dtype=np.int32)
+        me.loops.foreach_get("edge_index", loop_edges)
+        edge_verts = np.empty(n_edges * 2, dtype=np.int32)
+        me.edges.foreach_get("vertices", edge_verts)
+        return cls(co, face_offsets, face_verts, edge_verts, loop_edges)
+
+    @property
+    def n_faces(self):
+        return len(self.face_start)
+
+    @property
+    def n_edges(self):
+        return len(self.edge_verts)
+
+
+# ========== ADJACENCY ==========
+
+def edge_face_counts(mesh, face_mask=None):
+    '''Number of faces (optionally only faces in face_mask) using every edge'''
+    loop_edges = mesh.loop_edges if face_mask is None else mesh.loop_edges[face_mask[mesh.loop_faces]]
+    return np.bincount(loop_edges, minlength=len(mesh.edge_verts))
+
+
+def edge_face_pairs(mesh, edge_mask=None):
+    '''Face pairs (a, b) linking the faces of each edge as a chain, optionally only edges in edge_mask'''
+    loops = np.arange(len(mesh.loop_edges)) if edge_mask is None else np.flatnonzero(edge_mask[mesh.loop_edges])
+    order = loops[np.argsort(mesh.loop_edges[loops], kind='stable')]
+    edges = mesh.loop_edges[order]
+    same = edges[1:] == edges[:-1]
+    return mesh.loop_faces[order[:-1][same]], mesh.loop_faces[order[1:][same]]
+
+
+def connected_components(n, a, b):
+    '''Root label (smallest node index) of every node of an undirected graph with edges (a, b).
+
+    Union-find on arrays: each round hooks the larger root of every edge onto the
+    smaller one, then compresses paths by pointer jumping until labels are stable.
+    '''
+    parent = np.arange(n)
+    while len(a):
+        root_a, root_b = parent[a], parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+        a, b = a[differ], b[differ]
+        root_a, root_b = root_a[differ], root_b[differ]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+
+def face_components(mesh, edge_mask=None):
+    '''Face islands connected across edges in edge_mask (all edges if None).
+
+    Returns labels 0..k-1 numbered by the lowest face index of each island, i.e. the
+    order a flood fill visiting faces by index would create them.
+    '''
+    a, b = edge_face_pairs(mesh, edge_mask)
+    roots = connected_components(len(mesh.face_start), a, b)
+    return np.unique(roots, return_inverse=True)[1].ravel()
+
+
+# ========== BOUNDARIES ==========
+
+def label_boundary_edges(mesh, face_labels, ignore_label=None):
+    '''Edges whose faces carry 2+ different labels; faces labeled ignore_label are skipped'''
+    labels = np.asarray(face_labels)[mesh.loop_faces]
+    loop_edges = mesh.loop_edges
+    if ignore_label is not None:
+        keep = labels != ignore_label
+        labels, loop_edges = labels[keep], loop_edges[keep]
+
+    n_edges = len(mesh.edge_verts)
+    lo = np.full(n_edges, np.iinfo(np.int64).max)
+    hi = np.full(n_edges, np.iinfo(np.int64).min)
+    np.minimum.at(lo, loop_edges, labels)
+    np.maximum.at(hi, loop_edges, labels)
+    return hi > lo
+
+
+def label_adjacency(mesh, face_labels):
+    '''Unique label pairs (i < j) of faces sharing a 2-face edge; negative labels are skipped'''
+    face_labels = np.asarray(face_labels)
+    a, b = edge_face_pairs(mesh, edge_face_counts(mesh) == 2)
+    la, lb = face_labels[a], face_labels[b]
+    keep = (la != lb) & (la >= 0) & (lb >= 0)
+    pairs = np.column_stack((np.minimum(la, lb)[keep], np.maximum(la, lb)[keep]))
+    return np.unique(pairs, axis=0) if len(pairs) else pairs.reshape(0, 2)
+
+
+def greedy_coloring(n, pairs):
+    '''Smallest free color per node, visiting nodes in index order (sequential by nature)'''
+    pairs = np.asarray(pairs).reshape(-1, 2)
+    a = np.concatenate((pairs[:, 0], pairs[:, 1]))
+    b = np.concatenate((pairs[:, 1], pairs[:, 0]))
+    order = np.argsort(a, kind='stable')
+    neighbors = b[order].tolist()
+    ends = np.cumsum(np.bincount(a, minlength=n)).tolist()
+
+    colors = [-1] * n
+    start = 0
+    for node in range(n):
+        used = {colors[m] for m in neighbors[start:ends[node]]}
+        start = ends[node]
+        color = 0
+        while color in used:
+            color += 1
+        colors[node] = color
+    return np.array(colors, dtype=np.int32)
+
+
+# ========== COINCIDENT POINTS ==========
+
+# Hệ số trộn (uint64, tràn số là chủ ý) → mỗi cell (group, x, y, z) thành một key 64-bit
+_HASH_PRIMES = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+                         0x165667B19E3779F9, 0x27D4EB2F165667C5], dtype=np.uint64)
+
+# 8 lưới lệch nhau nửa cell: 2 points cách nhau < distance luôn chung cell ở ít nhất 1 lưới
+_GRID_SHIFTS = [(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+
+
+def _cell_keys(group, cell):
+    with np.errstate(over='ignore'):
+        key = group.astype(np.uint64) * _HASH_PRIMES[0]
+        for axis in range(3):
+            key ^= cell[:, axis].astype(np.uint64) * _HASH_PRIMES[axis + 1]
+    return key
+
+
+def _ranges(counts):
+    '''Concatenated arange(c) for every c in counts.'''
+    ends = np.cumsum(counts)
+    return np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - counts, counts)
+
+
+def find_coincident_vertices(co, distance, groups=None):
+    '''Index pairs (i < j) of points closer than distance, as an (N, 2) array.
+
+    Points are snapped onto hash grids with cell size 2 * distance (8 grids shifted
+    by half a cell), so only points sharing a cell are compared: a few sorts and
+    linear passes instead of all pairs. groups (one int per point, e.g. face index)
+    restricts matches to points of the same group.
+    '''
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    n = len(co)
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64)
+
+    group = np.zeros(n, dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    half_cells = np.floor(co / distance).astype(np.int64)
+
+    pairs = []
+    for shift in _GRID_SHIFTS:
+        keys = _cell_keys(group, (half_cells + shift) >> 1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # Runs của key bằng nhau = points chung cell; cell chỉ có 1 point (đa số) bị bỏ qua
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        counts = np.diff(np.r_[starts, n])
+        shared = counts > 1
+        if not shared.any():
+            continue
+        starts, counts = starts[shared], counts[shared]
+
+        # Ghép mỗi point với các points đứng sau nó trong cùng run
+        run_pos = np.repeat(starts, counts) + _ranges(counts)
+        after = np.repeat(starts + counts, counts) - run_pos - 1
+        i = np.repeat(run_pos, after)
+        j = i + 1 + _ranges(after)
+        i, j = order[i], order[j]
+
+        # Va chạm hash hiếm gặp chỉ tạo thêm ứng viên → lọc lại bằng group + khoảng cách
+        diff = co[i] - co[j]
+        close = (np.einsum('ij,ij->i', diff, diff) < distance * distance) & (group[i] == group[j])
+        pairs.append(np.column_stack((i[close], j[close])))
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Cặp ở gần nhau thường chung cell ở nhiều lưới → loại trùng
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+# ========== CLASSIFICATION ==========
+
+def run_to_end(job):
+    '''Run a progress generator to completion and return its result'''
+    while True:
+        try:
+            next(job)
+        except StopIteration as stop:
+            return stop.value
+
+
+def _split_fans(verts, edges_a, edges_b, edge_face_count, n_verts):
+    '''Vertices whose corners form 2+ fans; corner i sits at verts[i] between edges_a[i] and edges_b[i]'''
+    corner = np.arange(len(verts))
+    entry_corner = np.concatenate((corner, corner))
+    entry_vert = np.concatenate((verts, verts))
+    entry_edge = np.concatenate((edges_a, edges_b))
+    manifold = edge_face_count[entry_edge] == 2
+    entry_corner, entry_vert, entry_edge = entry_corner[manifold], entry_vert[manifold], entry_edge[manifold]
+
+    # Group theo (edge, vertex): mỗi nhóm đúng 2 corners → 1 liên kết trong fan
+    order = np.lexsort((entry_vert, entry_edge))
+    entry_corner, entry_vert, entry_edge = entry_corner[order], entry_vert[order], entry_edge[order]
+    same = (entry_edge[1:] == entry_edge[:-1]) & (entry_vert[1:] == entry_vert[:-1])
+    fan = connected_components(len(verts), entry_corner[:-1][same], entry_corner[1:][same])
+
+    # Số fan mỗi vertex = số label khác nhau trong các corners của nó
+    fan_key = np.unique(verts.astype(np.int64) * len(verts) + fan)
+    fans = np.bincount(fan_key // len(verts), minlength=n_verts)
+    return fans > 1
+
+
+def iter_non_manifold_vertices(mesh, visible_loop, edge_face_count, vert_in_face, chunk_verts=None):
+    '''Generator version of non_manifold_vertices(): yields progress (0..1), returns the mask.
+
+    Fans never cross vertices, so corners are processed in vertex index ranges of
+    chunk_verts (all at once if None) with the same result.
+    '''
+    mask = np.zeros(len(mesh.co), dtype=bool)
+
+    # Check 1: Edge có 3+ faces
+    mask[mesh.edge_verts[edge_face_count >= 3].ravel()] = True
+
+    # Check 2: Wire edges (không có face) nối vào vertex thuộc face
+    wire_verts = mesh.edge_verts[(edge_face_count == 0) & ~mesh.edge_hide].ravel()
+    mask[wire_verts[vert_in_face[wire_verts]]] = True
+
+    # Check 3: Disjoint face fans - mỗi corner chạm 2 edges tại vertex của nó;
+    # 2 corners chung một edge 2-face tại cùng vertex thuộc cùng fan
+    loops = np.flatnonzero(visible_loop)
+    if not len(loops):
+        return mask
+    loop_prev = np.empty_like(mesh.loop_next)
+    loop_prev[mesh.loop_next] = np.arange(len(mesh.loop_next), dtype=mesh.loop_next.dtype)
+    verts = mesh.loop_verts[loops]
+    edges_out = mesh.loop_edges[loops]
+    edges_in = mesh.loop_edges[loop_prev[loops]]
+
+    n_verts = len(mask)
+    if chunk_verts is None or chunk_verts >= n_verts:
+        mask |= _split_fans(verts, edges_out, edges_in, edge_face_count, n_verts)
+        return mask
+    for start in range(0, n_verts, chunk_verts):
+        yield start / n_verts
+        corners = np.flatnonzero((verts >= start) & (verts < start + chunk_verts))
+        if len(corners):
+            mask |= _split_fans(verts[corners], edges_out[corners], edges_in[corners], edge_face_count, n_verts)
+    return mask
+
+
+def non_manifold_vertices(mesh, visible_loop, edge_face_count, vert_in_face):
+    '''Non-manifold vertex mask from edge-face incidence arrays (không cần BMesh).
+
+    A vertex used by a face is non-manifold when it touches an edge with 3+ faces,
+    a wire edge, or when its faces form more than one fan (faces connected through
+    2-face edges around the vertex). This also covers 3+ boundary edges and
+    bow-tie / hourglass vertices.
+    '''
+    return run_to_end(iter_non_manifold_vertices(mesh, visible_loop, edge_face_count, vert_in_face))
+
+
+def iter_classify_topology(mesh, chunk_verts=None):
+    '''Generator version of classify_topology(): yields progress (0..1), returns the categories'''
+    n_verts = len(mesh.co)
+
+    visible_face = ~mesh.face_hide
+    visible_loop = visible_face[mesh.loop_faces]
+
+    edge_face_count = edge_face_counts(mesh, visible_face)
+    vert_in_face = np.zeros(n_verts, dtype=bool)
+    vert_in_face[mesh.loop_verts[visible_loop]] = True
+    yield 0.0
+
+    non_manifold_edge = edge_face_count >= 3
+    non_manifold_vert = yield from iter_non_manifold_vertices(
+        mesh, visible_loop, edge_face_count, vert_in_face, chunk_verts)
+    non_manifold_vert &= ~mesh.vert_hide
+    loose_vert = ~mesh.vert_hide & ~vert_in_face & ~non_manifold_vert
+    boundary_edge = edge_face_count == 1
+    loose_edge = (edge_face_count == 0) & ~mesh.edge_hide & ~loose_vert[mesh.edge_verts].all(axis=1)
+
+    return {
+        'visible_face': visible_face,
+        'ngon': visible_face & (mesh.face_size > 4),
+        'boundary_edges': np.flatnonzero(boundary_edge),
+        'loose_edges': np.flatnonzero(loose_edge),
+        'non_manifold_edges': np.flatnonzero(non_manifold_edge),
+        'loose_vertices': np.flatnonzero(loose_vert),
+        'non_manifold_vertices': np.flatnonzero(non_manifold_vert),
+    }
+
+
+def classify_topology(mesh):
+    '''Topology-only categories: n-gons, boundary/loose/non-manifold edges and vertices.'''
+    return run_to_end(iter_classify_topology(mesh))
+
+
+# ========== UV ==========
+
+def pack_uvs(uv, margin):
+    '''Scale (N, 2) UVs uniformly into [margin, 1 - margin]², centered; flat islands are unchanged'''
+    uv = np.asarray(uv, dtype=np.float64)
+    if not len(uv):
+        return uv
+    lo, hi = uv.min(axis=0), uv.max(axis=0)
+    size = hi - lo
+    if (size == 0).any():
+        return uv
+
+    available_space = 1.0 - 2 * margin
+    scale = min(available_space / size[0], available_space / size[1])
+    return (uv - lo) * scale + margin + (available_space - size * scale) / 2
@@ -0,0 +1,189 @@
+# KHB_Validate.py - KeyHabit Headless Mesh Validation
+# Chạy các topology checks của KHB_Analysis ngoài viewport (nightly asset audit)
+#
+# 1 file .blend (chạy trong Blender, background):
+#   blender -b file.blend --python KHB_Validate.py -- --output report.json [--format csv] [--evaluated]
+#
+# Nhiều file .blend (driver, Python thường hoặc Python của Blender):
+#   python KHB_Validate.py --blender /path/to/blender --out-dir reports/ assets/ other.blend [--jobs 8]
+#   → mỗi file chạy trong một Blender background instance riêng, số instance song song = số CPU,
+#     kết quả gộp vào reports/summary.json (hoặc summary.csv)
+
+import argparse
+import csv
+import hashlib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+import types
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+REPORT_FIELDS = (
+    'file', 'object', 'mesh', 'evaluated', 'vertices', 'faces',
+    'ngons', 'non_manifold', 'degenerate', 'loose', 'small', 'concave', 'boundary',
+    'seconds',
+)
+
+
+def _write_report(rows, path, fmt):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'objects': rows}, f, indent=2)
+
+
+# ========== RUNNER (TRONG BLENDER) ==========
+
+def _import_analysis():
+    '''Import KHB_Analysis without running the addon __init__ (Display needs a GPU context)'''
+    addon_dir = os.path.dirname(os.path.abspath(__file__))
+    package = types.ModuleType("_khb_validate_addon")
+    package.__path__ = [addon_dir]
+    sys.modules[package.__name__] = package
+    return importlib.import_module(f"{package.__name__}.KHB_Analysis")
+
+
+def run_in_blender(argv):
+    parser = argparse.ArgumentParser(prog="KHB_Validate.py (blender)")
+    parser.add_argument("--output", required=True, help="Report path")
+    parser.add_argument("--format", choices=('json', 'csv'), default='json')
+    parser.add_argument("--evaluated", action='store_true', help="Analyze meshes after modifiers")
+    parser.add_argument("--edge-ratio", type=float, default=1.0)
+    parser.add_argument("--concave-threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    analysis = _import_analysis()
+    scene = bpy.context.scene
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    rows = []
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH':
+            continue
+
+        # Object không thuộc scene hiện tại không có trong depsgraph → dùng mesh gốc
+        evaluated = args.evaluated and scene.objects.get(obj.name) is not None
+        start_time = time.perf_counter()
+        arrays = analysis.snapshot_object_arrays(obj, depsgraph, evaluated)
+        result = analysis.analyze_mesh_arrays(
+            arrays, obj.matrix_world, args.edge_ratio, args.concave_threshold,
+        )
+
+        row = {
+            'file': bpy.data.filepath,
+            'object': obj.name,
+            'mesh': obj.data.name,
+            'evaluated': evaluated,
+            'vertices': len(arrays.co),
+            'faces': len(arrays.face_start),
+            'boundary': len(result['boundary_edges']),
+        }
+        row.update(analysis.category_counts(result))
+        row['seconds'] = round(time.perf_counter() - start_time, 4)
+        rows.append(row)
+
+    _write_report(rows, args.output, args.format)
+    print(f"KHB_Validate: {len(rows)} meshes → {args.output}")
+
+
+# ========== DRIVER (NHIỀU FILE .BLEND) ==========
+
+def _collect_blend_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith('.blend'))
+        elif path.endswith('.blend'):
+            files.append(path)
+    return files
+
+
+def _run_blender(blender, blend_path, report_path, evaluated, timeout):
+    '''Validate one .blend in its own background Blender; returns (rows, error)'''
+    cmd = [
+        blender, "-b", "--factory-startup", "--python-exit-code", "1",
+        blend_path, "--python", os.path.abspath(__file__), "--",
+        "--output", report_path, "--format", "json",
+    ]
+    if evaluated:
+        cmd.append("--evaluated")
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return [], f"timeout after {timeout}s"
+    if proc.returncode != 0 or not os.path.exists(report_path):
+        tail = (proc.stderr or proc.stdout).strip().splitlines()[-1:] or ["no output"]
+        return [], f"exit code {proc.returncode}: {tail[0]}"
+    with open(report_path, encoding='utf-8') as f:
+        return json.load(f)['objects'], None
+
+
+def run_driver(argv):
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    parser = argparse.ArgumentParser(prog="KHB_Validate.py", description="Validate meshes in many .blend files")
+    parser.add_argument("paths", nargs='+', help=".blend files or directories (searched recursively)")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--out-dir", default="khb_reports")
+    parser.add_argument("--format", choices=('json', 'csv'), default='json', help="Summary format")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel Blender instances")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds per file")
+    parser.add_argument("--evaluated", action='store_true', help="Analyze meshes after modifiers")
+    args = parser.parse_args(argv)
+
+    files = _collect_blend_files(args.paths)
+    if not files:
+        print("KHB_Validate: no .blend files found")
+        return 1
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    start_time = time.perf_counter()
+    rows, failures = [], []
+
+    # Mỗi job là một process Blender riêng → thread pool chỉ điều phối subprocess
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {}
+        for path in files:
+            digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+            report_path = os.path.join(args.out_dir, f"{os.path.splitext(os.path.basename(path))[0]}-{digest}.json")
+            futures[pool.submit(_run_blender, args.blender, path, report_path, args.evaluated, args.timeout)] = path
+
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            file_rows, error = future.result()
+            if error:
+                failures.append({'file': path, 'error': error})
+                print(f"[{done}/{len(files)}] FAILED {path}: {error}")
+            else:
+                rows.extend(file_rows)
+                print(f"[{done}/{len(files)}] {path}: {len(file_rows)} meshes")
+
+    summary_path = os.path.join(args.out_dir, f"summary.{args.format}")
+    _write_report(rows, summary_path, args.format)
+    if failures:
+        with open(os.path.join(args.out_dir, "failures.json"), 'w', encoding='utf-8') as f:
+            json.dump(failures, f, indent=2)
+
+    print(f"KHB_Validate: {len(files)} files, {len(rows)} meshes, {len(failures)} failed "
+          f"in {time.perf_counter() - start_time:.1f}s → {summary_path}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    if bpy is not None and bpy.app.background and "--" in sys.argv:
+        run_in_blender(sys.argv[sys.argv.index("--") + 1:])
+    else:
+        sys.exit(run_driver(sys.argv[1:]))
@@ -18,6 +18,7 @@ _addon_name = __name__
 
 # Danh sách các sub-modules cần reload
 _modules = [
+    "KHB_Topology",  # Kernel không có register() - reload trước các module import nó
     "KHB_Normal",
     "KHB_Display", 
     "KHB_Sync",
@@ -77,6 +78,13 @@ def update_modifier_overlay(self, context):
     except Exception as e:
         print(f"Error calling overlay functions: {e}")
 
+def update_modifier_timings(self, context):
+    """Callback function khi show_modifier_timings thay đổi"""
+    try:
+        KHB_Display.set_modifier_profiling(self.show_modifier_timings)
+    except Exception as e:
+        print(f"Error toggling modifier profiler: {e}")
+
 class KEYHABIT_Preferences(AddonPreferences):
     bl_idname = "KeyHabit"
     show_modifier_overlay: BoolProperty(
@@ -85,6 +93,12 @@ class KEYHABIT_Preferences(AddonPreferences):
         default=False,
         update=update_modifier_overlay,
     )
+    show_modifier_timings: BoolProperty(
+        name="Show Modifier Timings",
+        description="Profile each modifier's evaluation time and show it (ms + heat colour) in the modifier overlay",
+        default=False,
+        update=update_modifier_timings,
+    )
     def draw(self, context):
         layout = self.layout
         layout.label(text="KeyHabit Add-on Settings")
@@ -95,6 +109,9 @@ class KEYHABIT_Preferences(AddonPreferences):
         col = box.column(align=True)
         col.prop(self, "show_modifier_overlay")
         col.label(text="Show modifier information in viewport", icon='INFO')
+        row = col.row()
+        row.enabled = self.show_modifier_overlay
+        row.prop(self, "show_modifier_timings")
 
 from . import KHB_Normal, KHB_Display, KHB_Sync, KHB_Analysis, KHB_BakeSet, KHB_Facemap
 
@@ -115,6 +132,8 @@ def load_post_handler(dummy):
             if prefs.preferences.show_modifier_overlay:
                 # Re-enable overlay nếu nó đã được bật
                 update_modifier_overlay(prefs.preferences, bpy.context)
+            if getattr(prefs.preferences, 'show_modifier_timings', False):
+                update_modifier_timings(prefs.preferences, bpy.context)
     except Exception as e:
         print(f"KeyHabit: Warning during post-load init: {e}")
 
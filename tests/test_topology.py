@@ -0,0 +1,277 @@
+# test_topology.py - KHB_Topology so với các vòng lặp Python cũ (bản trước khi vectorize)
+# Chạy không cần Blender, từ thư mục addon: python -m pytest -q
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import KHB_Topology as T  # noqa: E402
+
+
+# ========== MESHES ==========
+
+def make_mesh(faces, n_verts=None, wires=()):
+    '''MeshTopology from face vertex lists; wires are extra edges without faces'''
+    offsets = np.cumsum([0] + [len(f) for f in faces])
+    face_verts = np.array([v for f in faces for v in f], dtype=np.int32)
+    n_verts = n_verts or (int(face_verts.max()) + 1 if len(face_verts) else 0)
+    mesh = T.MeshTopology(np.zeros((n_verts, 3)), offsets, face_verts)
+    if wires:
+        edge_verts = np.concatenate((mesh.edge_verts, np.array(wires, dtype=np.int32).reshape(-1, 2)))
+        mesh = T.MeshTopology(mesh.co, offsets, face_verts, edge_verts, mesh.loop_edges)
+    return mesh
+
+
+def random_faces(seed, size=6):
+    '''Grid of quads/triangles with holes (bow-ties) and fins (edges with 3+ faces)'''
+    rng = np.random.default_rng(seed)
+    vid = lambda x, y: y * (size + 1) + x
+    faces = []
+    for y in range(size):
+        for x in range(size):
+            if rng.random() < 0.25:
+                continue  # Lỗ → vertex chỉ chạm 2 faces đối đỉnh (bow-tie)
+            a, b, c, d = vid(x, y), vid(x + 1, y), vid(x + 1, y + 1), vid(x, y + 1)
+            if rng.random() < 0.3:
+                faces += [[a, b, c], [a, c, d]]
+            else:
+                faces.append([a, b, c, d])
+    n_verts = (size + 1) ** 2
+    for face in [faces[i] for i in rng.choice(len(faces), 3, replace=False)]:
+        faces.append([face[0], face[1], n_verts])  # Fin trên edge đã có 2 faces → 3 faces
+        n_verts += 1
+    return faces, n_verts
+
+
+FAN_CASES = {
+    # 4 quads quanh vertex 4 (disk kín) → manifold
+    'closed_fan': ([[0, 1, 4, 3], [1, 2, 5, 4], [3, 4, 7, 6], [4, 5, 8, 7]], set()),
+    # 3 quads (fan hở, 2 boundary edges tại vertex 4) → manifold
+    'open_fan': ([[0, 1, 4, 3], [1, 2, 5, 4], [3, 4, 7, 6]], set()),
+    # 2 quads chỉ chung vertex 4 → bow-tie
+    'bow_tie': ([[0, 1, 4, 3], [4, 5, 8, 7]], {4}),
+    # 2 tam giác chung vertex 0 (hourglass)
+    'hourglass': ([[0, 1, 2], [0, 3, 4]], {0}),
+    # 3 faces chung edge (0, 1)
+    'three_faces_on_edge': ([[0, 1, 2], [1, 0, 3], [0, 1, 4]], {0, 1}),
+}
+
+
+# ========== BASELINE LOOPS ==========
+
+def ref_edge_faces(faces):
+    edge_faces = {}
+    for fi, face in enumerate(faces):
+        for i in range(len(face)):
+            key = tuple(sorted((face[i], face[(i + 1) % len(face)])))
+            edge_faces.setdefault(key, []).append(fi)
+    return edge_faces
+
+
+def ref_non_manifold_vertices(faces, wires=()):
+    '''Fallback checks của Analyze Check cũ (BMesh link_edges/link_faces), chỉ vertex thuộc face'''
+    edge_faces = ref_edge_faces(faces)
+    for wire in wires:
+        edge_faces.setdefault(tuple(sorted(wire)), [])
+    vert_edges = {}
+    for key in edge_faces:
+        for v in key:
+            vert_edges.setdefault(v, []).append(key)
+
+    result = set()
+    for v, edges in vert_edges.items():
+        link_faces = {f for e in edges for f in edge_faces[e]}
+        if not link_faces:
+            continue
+        if any(len(edge_faces[e]) >= 3 for e in edges):
+            result.add(v)
+        elif sum(1 for e in edges if len(edge_faces[e]) == 1) > 2:
+            result.add(v)
+        elif any(len(edge_faces[e]) == 0 for e in edges):
+            result.add(v)
+        else:
+            start = min(link_faces)
+            visited, stack = {start}, [start]
+            while stack:
+                face = stack.pop()
+                for e in edges:
+                    if face in edge_faces[e]:
+                        for other in edge_faces[e]:
+                            if other not in visited:
+                                visited.add(other)
+                                stack.append(other)
+            if len(visited) < len(link_faces):
+                result.add(v)
+    return result
+
+
+def ref_flood_fill(faces, blocked):
+    '''initialize_by_sharp_edges cũ: group index theo thứ tự face được gặp đầu tiên'''
+    edge_faces = ref_edge_faces(faces)
+    labels = [-1] * len(faces)
+    group = 0
+    for start in range(len(faces)):
+        if labels[start] >= 0:
+            continue
+        stack = [start]
+        while stack:
+            fi = stack.pop()
+            if labels[fi] >= 0:
+                continue
+            labels[fi] = group
+            face = faces[fi]
+            for i in range(len(face)):
+                key = tuple(sorted((face[i], face[(i + 1) % len(face)])))
+                if key in blocked:
+                    continue
+                stack.extend(other for other in edge_faces[key] if labels[other] < 0)
+        group += 1
+    return labels
+
+
+def ref_greedy_coloring(n, pairs):
+    adjacency = {i: set() for i in range(n)}
+    for a, b in pairs:
+        adjacency[a].add(b)
+        adjacency[b].add(a)
+    colors = {}
+    for node in range(n):
+        used = {colors[adj] for adj in adjacency[node] if adj in colors}
+        color = 0
+        while color in used:
+            color += 1
+        colors[node] = color
+    return [colors[i] for i in range(n)]
+
+
+def ref_pack_uvs(uv, margin):
+    min_u, min_v = min(u for u, _ in uv), min(v for _, v in uv)
+    width, height = max(u for u, _ in uv) - min_u, max(v for _, v in uv) - min_v
+    if width == 0 or height == 0:
+        return [tuple(p) for p in uv]
+    available_space = 1.0 - (2 * margin)
+    scale = min(available_space / width, available_space / height)
+    return [((u - min_u) * scale + margin + (available_space - width * scale) / 2,
+             (v - min_v) * scale + margin + (available_space - height * scale) / 2) for u, v in uv]
+
+
+def edge_keys(mesh):
+    return [tuple(e) for e in mesh.edge_verts.tolist()]
+
+
+# ========== TESTS ==========
+
+@pytest.mark.parametrize('seed', range(8))
+def test_build_edges_and_counts(seed):
+    faces, n_verts = random_faces(seed)
+    mesh = make_mesh(faces, n_verts)
+    edge_faces = ref_edge_faces(faces)
+
+    keys = edge_keys(mesh)
+    assert sorted(keys) == sorted(edge_faces)
+    corners = [tuple(sorted((f[i], f[(i + 1) % len(f)]))) for f in faces for i in range(len(f))]
+    assert [keys[e] for e in mesh.loop_edges.tolist()] == corners
+
+    counts = T.edge_face_counts(mesh)
+    assert counts.tolist() == [len(edge_faces[key]) for key in keys]
+
+
+def _non_manifold(mesh):
+    visible_loop = np.ones(len(mesh.loop_verts), dtype=bool)
+    counts = T.edge_face_counts(mesh)
+    vert_in_face = np.zeros(len(mesh.co), dtype=bool)
+    vert_in_face[mesh.loop_verts] = True
+    return set(np.flatnonzero(T.non_manifold_vertices(mesh, visible_loop, counts, vert_in_face)).tolist())
+
+
+@pytest.mark.parametrize('name', sorted(FAN_CASES))
+def test_non_manifold_vertices_fans(name):
+    faces, expected = FAN_CASES[name]
+    assert _non_manifold(make_mesh(faces)) == ref_non_manifold_vertices(faces) == expected
+
+
+def test_non_manifold_vertices_wire_edge():
+    faces = FAN_CASES['closed_fan'][0]
+    wires = [(4, 9), (9, 10)]  # Wire edge nối vào vertex của face; vertex 10 là loose
+    result = _non_manifold(make_mesh(faces, 11, wires))
+    assert result == ref_non_manifold_vertices(faces, wires) == {4}
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_non_manifold_vertices_random(seed):
+    faces, n_verts = random_faces(seed)
+    assert _non_manifold(make_mesh(faces, n_verts)) == ref_non_manifold_vertices(faces)
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_classify_topology_chunked(seed):
+    faces, n_verts = random_faces(seed)
+    mesh = make_mesh(faces, n_verts)
+    expected = T.classify_topology(mesh)
+    job = T.iter_classify_topology(mesh, chunk_verts=5)
+    progress = []
+    while True:
+        try:
+            progress.append(next(job))
+        except StopIteration as stop:
+            result = stop.value
+            break
+    assert len(progress) > 2 and progress == sorted(progress) and 0.0 <= progress[-1] < 1.0
+    for name, value in expected.items():
+        assert np.array_equal(result[name], value), name
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_face_components(seed):
+    faces, n_verts = random_faces(seed)
+    mesh = make_mesh(faces, n_verts)
+    rng = np.random.default_rng(seed)
+    sharp = rng.random(len(mesh.edge_verts)) < 0.4
+    blocked = {key for key, is_sharp in zip(edge_keys(mesh), sharp.tolist()) if is_sharp}
+    assert T.face_components(mesh, ~sharp).tolist() == ref_flood_fill(faces, blocked)
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_label_boundaries_and_coloring(seed):
+    faces, n_verts = random_faces(seed)
+    mesh = make_mesh(faces, n_verts)
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(-1, 6, len(faces))  # -1 = face không thuộc face map nào
+    edge_faces = ref_edge_faces(faces)
+
+    # set_boundary_sharp_edges cũ: edge 2 faces khác group (hoặc chỉ 1 face có group)
+    boundary = T.label_boundary_edges(mesh, labels)
+    expected = [len(edge_faces[key]) == 2 and labels[edge_faces[key][0]] != labels[edge_faces[key][1]]
+                for key in edge_keys(mesh)]
+    counts = T.edge_face_counts(mesh)
+    assert (boundary & (counts == 2)).tolist() == expected
+
+    # Optimize Face Maps cũ: adjacency qua edge 2 faces rồi greedy coloring theo thứ tự group
+    pairs = T.label_adjacency(mesh, labels)
+    expected_pairs = {tuple(sorted((labels[a], labels[b])))
+                      for a, b in (edge_faces[key] for key in edge_faces if len(edge_faces[key]) == 2)
+                      if labels[a] >= 0 and labels[b] >= 0 and labels[a] != labels[b]}
+    assert set(map(tuple, pairs.tolist())) == expected_pairs
+    assert T.greedy_coloring(6, pairs).tolist() == ref_greedy_coloring(6, expected_pairs)
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_greedy_coloring_random_graph(seed):
+    rng = np.random.default_rng(seed)
+    n = 30
+    pairs = np.unique(np.sort(rng.integers(0, n, (60, 2)), axis=1), axis=0)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    assert T.greedy_coloring(n, pairs).tolist() == ref_greedy_coloring(n, pairs.tolist())
+
+
+@pytest.mark.parametrize('uv', [
+    [(0.2, 0.1), (0.8, 0.3), (0.5, 0.9)],
+    [(-3.0, 2.0), (5.0, 2.5), (1.0, 4.0), (0.0, 2.2)],
+    [(0.0, 0.5), (1.0, 0.5)],  # Island phẳng → giữ nguyên
+])
+def test_pack_uvs(uv):
+    packed = T.pack_uvs(np.array(uv), 0.01)
+    assert np.allclose(packed, ref_pack_uvs(uv, 0.01))